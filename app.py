@@ -3,8 +3,10 @@ import streamlit.components.v1 as components
 from dotenv import load_dotenv
 from mapper import build_mapping, store_successful_mapping
 from hunter import extract_data, produce_stats
+from pipeline_log import StageTimer
 from learning_system import learning_system
 from llm_extractor import extract_with_full_context, produce_stats_for_llm
+from workbook import snapshot_cache, skipped_summary, memory_report
 
 load_dotenv()
 st.set_page_config(page_title="Census Mapper & Extractor", layout="wide")
@@ -269,105 +271,34 @@ else:
     st.error("❌ No API key found in .env file!")
     st.stop()
 
-uploaded = st.file_uploader("Upload Excel file", type=["xlsx"])
+uploaded = st.file_uploader("Upload Excel or CSV file", type=["xlsx", "csv", "tsv", "txt"])
 if not uploaded:
     st.stop()
 
 # ---- 1. read all sheets with proper header handling ------------------------
-# Read Excel file to get sheet names first
-xl = pd.ExcelFile(uploaded)
-all_sheets = {}  # Processed sheets (for extraction)
-original_sheets = {}  # Original sheets (for display - as-is from Excel)
-
-for sheet_name in xl.sheet_names:
-    # Try to read with header=0 first
-    try:
-        # Read original data AS-IS for display
-        df_original = pd.read_excel(uploaded, sheet_name=sheet_name)
-        original_sheets[sheet_name] = df_original.copy()
-        
-        # Create processed copy for extraction (with dtype=str for consistency)
-        df = df_original.copy().astype(str)
-        
-        # Improved header row detection
-        # Strategy: Find the row that looks most like a header (has text labels, not data values)
-        header_row_idx = 0  # Default to first row
-        best_header_score = 0
-        
-        # Check first 10 rows for the best header candidate
-        for i in range(min(10, len(df))):
-            row = df.iloc[i]
-            score = 0
-            
-            # Count non-null values
-            non_null_count = row.notna().sum()
-            
-            # Check if row values look like column headers (text, short, no numbers/dates)
-            header_like_count = 0
-            for val in row:
-                if pd.notna(val):
-                    val_str = str(val).strip()
-                    # Header-like characteristics:
-                    # - Short strings (typically < 50 chars)
-                    # - Contains letters (not just numbers)
-                    # - Doesn't look like a date
-                    # - Doesn't look like a number
-                    if (len(val_str) < 50 and 
-                        any(c.isalpha() for c in val_str) and 
-                        not val_str.replace('.', '').replace('-', '').isdigit() and
-                        '/' not in val_str[:10]):  # Not a date
-                        header_like_count += 1
-            
-            # Calculate score: prefer rows with many header-like values
-            if non_null_count > 0:
-                header_ratio = header_like_count / non_null_count
-                # Prefer rows with many non-null values AND header-like values
-                score = non_null_count * header_ratio
-            
-            if score > best_header_score:
-                best_header_score = score
-                header_row_idx = i
-        
-        # If we found a better header row (and it's not row 0), use it
-        if header_row_idx > 0 or any('Unnamed' in str(col) for col in df.columns):
-            print(f"🔍 Debug: Detected header row at index {header_row_idx} for sheet '{sheet_name}'")
-            # Use the detected row as headers
-            df.columns = df.iloc[header_row_idx]
-            # Remove header row and all rows before it
-            df = df.iloc[header_row_idx+1:].reset_index(drop=True)
-        
-        # Clean up any remaining "Unnamed" columns
-        df.columns = [f"Column_{i}" if 'Unnamed' in str(col) else str(col) for i, col in enumerate(df.columns)]
-        
-        # Ensure all column names are unique
-        new_columns = []
-        seen = set()
-        for col in df.columns:
-            if col in seen:
-                # Add a suffix to make it unique
-                counter = 1
-                new_col = f"{col}_{counter}"
-                while new_col in seen:
-                    counter += 1
-                    new_col = f"{col}_{counter}"
-                new_columns.append(new_col)
-                seen.add(new_col)
-            else:
-                new_columns.append(col)
-                seen.add(col)
-        df.columns = new_columns
-        
-        all_sheets[sheet_name] = df  # Processed version for extraction
-        
-    except Exception as e:
-        st.warning(f"⚠️ Could not read sheet '{sheet_name}': {e}")
-        continue
+# Parse the workbook once; every later step reuses this snapshot.
+# Reruns (Edit/Save/Cancel clicks) get it from the content-hash cache instead of re-parsing.
+snapshot = snapshot_cache.load(uploaded)
+cache_stats = snapshot_cache.stats()
+st.sidebar.subheader("🗄️ Sheet Cache")
+st.sidebar.write(f"Hits: {cache_stats['hits']} | Misses: {cache_stats['misses']} | Evictions: {cache_stats['evictions']}")
+st.sidebar.write(f"Cached workbooks: {cache_stats['entries']} ({cache_stats['bytes'] / 1024 / 1024:.1f} MB of {cache_stats['max_bytes'] / 1024 / 1024:.0f} MB)")
+all_sheets = snapshot.sheets  # Processed sheets (for extraction)
+original_sheets = snapshot.original_sheets  # Original sheets (for display - as-is from Excel)
+for sheet_name, error in snapshot.errors.items():
+    st.warning(f"⚠️ Could not read sheet '{sheet_name}': {error}")
 st.subheader("1. Excel inspection")
 st.write(f"**Filename:** {uploaded.name}")
 st.write(f"**Total sheets:** {len(all_sheets)}")
 sheet_info = [(name, df.shape[0], df.shape[1]) for name, df in all_sheets.items()]
 sheet_df = pd.DataFrame(sheet_info, columns=["Sheet", "Rows", "Columns"])
 st.dataframe(sheet_df, width='stretch')
+with st.expander("💾 Memory per sheet", expanded=False):
+    st.dataframe(pd.DataFrame(memory_report(all_sheets)), width='stretch', hide_index=True)
+if snapshot.skipped:
+    skipped = skipped_summary(snapshot.skipped)
+    st.caption(f"⏭️ Not loaded (no census columns in the first rows): {', '.join(snapshot.skipped)} "
+               f"— {skipped['rows']:,} rows, {skipped['bytes'] / 1024:,.0f} KB skipped")
 
 # ============================================================================
 # FULL LLM EXTRACTION MODE (Recommended)
@@ -396,11 +327,8 @@ if extraction_mode == "🚀 Full LLM Extraction (Recommended)":
                     pass
         
         try:
-            # Reset file pointer for upload
-            uploaded.seek(0)
-            
-            # Extract using full context
-            extracted_df = extract_with_full_context(uploaded, log=log_function)
+            # Extract using full context (reuses the already parsed workbook)
+            extracted_df = extract_with_full_context(snapshot, log=log_function)
             
             progress_bar.progress(1.0)
             status_text.text("✅ Extraction completed!")
@@ -540,7 +468,8 @@ else:
     sample_rows = 5
     thin_csv = io.StringIO()
     for sh_name, df in all_sheets.items():
-        tiny = pd.concat([df.head(0), df.dropna(how="all").sample(n=min(sample_rows, len(df)), random_state=42)])
+        filled = df.dropna(how="all")
+        tiny = pd.concat([df.head(0), filled.sample(n=min(sample_rows, len(filled)), random_state=42)])
         tiny = tiny.map(lambda x: "" if pd.isna(x) else str(x))
         tiny.insert(0, "__sheet__", sh_name)
         tiny.to_csv(thin_csv, index=False, header=True)
@@ -758,9 +687,7 @@ else:
                                 mapped_sheets.add(sheet_name)
                 
                 # Include all sheets that have mapped columns (content-based, not name-based)
-                for sheet_name in mapped_sheets:
-                    if sheet_name in all_sheets:
-                        relevant_sheets[sheet_name] = all_sheets[sheet_name]
+                relevant_sheets = snapshot.select(mapped_sheets)
                 
                 # If no mapped sheets found, show all sheets (handles files with unexpected sheet names)
                 if not relevant_sheets:
@@ -926,9 +853,7 @@ else:
                         mapped_sheets.add(sheet_name)
         
         # Include sheets with mapped columns (content-based detection - works with any sheet names)
-        for sheet_name in mapped_sheets:
-            if sheet_name in all_sheets:
-                relevant_sheets[sheet_name] = all_sheets[sheet_name]
+        relevant_sheets = snapshot.select(mapped_sheets)
         
         # If no mapped sheets found, use all sheets (ensures we don't miss data due to sheet naming)
         if not relevant_sheets:
@@ -986,13 +911,17 @@ else:
         if st.button("🚀 Proceed with Full Extraction", type="primary"):
             with st.spinner("Extracting all data..."):
                 # Use only relevant sheets for full extraction
-                extracted_full, stats_full = extract_data(relevant_sheets, mapping)
+                timer = StageTimer()
+                extracted_full, stats_full = extract_data(relevant_sheets, mapping, timer=timer)
                 
                 st.subheader("5. Full Extracted Data")
                 st.dataframe(extracted_full, width='stretch')
 
             st.subheader("6. Full Statistics")
             st.markdown(stats_full)
+            # Timings are for us, not the client: shown here, left out of the Stats sheet
+            with st.expander("⏱️ Stage timings", expanded=False):
+                st.markdown(timer.to_markdown())
 
             # Create Excel file with multiple sheets as per spec
             from datetime import datetime
@@ -0,0 +1,50 @@
+"""
+Grouping Benchmarks
+===================
+Family grouping (hunter.group_employees_and_dependents) at 10k, 50k and 200k records,
+batch and streamed (iter_family_groups), against the original scan over every employee
+(tests/baseline_hunter.py) where that still finishes in reasonable time.
+
+Run from the repository root: python benchmarks/bench_grouping.py
+"""
+
+import contextlib
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import hunter  # noqa: E402
+from tests import baseline_hunter  # noqa: E402
+from tests.synthetic import family_records  # noqa: E402
+
+# The original grouping is quadratic; above this many records it is not timed
+BASELINE_MAX_RECORDS = 10_000
+
+
+def _timed(func, *args):
+    "(result, seconds) of func, with its log output silenced"
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        result = func(*args)
+        return result, time.perf_counter() - start
+
+
+def _streamed(records):
+    in_order = sorted(records, key=lambda rec: (rec.get("__sheet_name__", ""), rec.get("__original_row_idx__", 999999)))
+    return [record for family in hunter.iter_family_groups(in_order) for record in family]
+
+
+if __name__ == "__main__":
+    for count in (10_000, 50_000, 200_000):
+        records = family_records(count)
+        grouped, seconds = _timed(hunter.group_employees_and_dependents, records)
+        _, stream_seconds = _timed(_streamed, records)
+        line = (f"⏱️ Grouping: {count:,} records -> {max(rec['Family Group'] for rec in grouped):,} family groups "
+                f"in {seconds:.2f}s, streamed {stream_seconds:.2f}s")
+        if count <= BASELINE_MAX_RECORDS:
+            _, baseline_seconds = _timed(baseline_hunter.group_employees_and_dependents, records)
+            line += f", original scan {baseline_seconds:.2f}s"
+        print(line)
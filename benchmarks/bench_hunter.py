@@ -0,0 +1,98 @@
+"""
+Hunter Benchmarks
+=================
+Timings of the extraction in hunter.py on synthetic census sheets (tests/synthetic.py):
+- the column-wise engine against the original row loop (tests/baseline_hunter.py)
+- column-wise name splitting against split_full_name per name
+- Dependents descriptor parsing
+- per-sheet extraction, serial and in a process pool
+- streamed families end to end (first family latency, CSV written)
+
+Run from the repository root: python benchmarks/bench_hunter.py
+Correctness is covered by the tests (python -m pytest); this script only reports times.
+"""
+
+import contextlib
+import io
+import os
+import sys
+import time
+from itertools import chain
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import hunter  # noqa: E402
+from tests import baseline_hunter  # noqa: E402
+from tests.synthetic import MAPPINGS, census_sheet  # noqa: E402
+
+
+def _timed(func, *args, **kwargs):
+    "(result, seconds) of func, with its debug output silenced"
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        return result, time.perf_counter() - start
+
+
+def bench_engine():
+    col_map = hunter._flatten_mapping(MAPPINGS[0])
+    baseline_map, _ = _timed(baseline_hunter._flatten_mapping, MAPPINGS[0])
+    sheet = census_sheet(3000)
+    _, baseline_seconds = _timed(baseline_hunter._extract_sheet_records, "Census", sheet, baseline_map)
+    _, seconds = _timed(hunter._extract_sheet_records, "Census", sheet, col_map)
+    print(f"⏱️ 3,000 rows: original row loop {baseline_seconds:.2f}s, column-wise {seconds:.3f}s")
+    for rows in (10_000, 50_000, 100_000):
+        records, seconds = _timed(hunter._extract_sheet_records, "Census", census_sheet(rows), col_map)
+        print(f"⏱️ Column-wise engine: {rows:,} rows -> {len(records):,} records in {seconds:.2f}s "
+              f"({rows / seconds:,.0f} rows/s)")
+
+
+def bench_names():
+    shapes = ["Last{i}, First{i}", "First{i} Mid Last{i}", "Last{i}, Jr., First{i}", "Last{i}, First{i} III",
+              "First{i} Last{i} Sr", "Last{i}", "nan"]
+    for distinct in (100_000, 2_000):
+        names = [shapes[i % len(shapes)].format(i=i % distinct) for i in range(100_000)]
+        scalar, scalar_seconds = _timed(lambda: [hunter.split_full_name(name) for name in names])
+        (first, last), seconds = _timed(hunter.split_names, names)
+        print(f"⏱️ Name splitting, 100,000 names ({distinct:,} distinct): split_full_name {scalar_seconds:.2f}s, "
+              f"split_names {seconds:.2f}s, identical {list(zip(first, last)) == scalar}")
+
+
+def bench_descriptors():
+    cells = [f"Ann Lee{i} (Wife, DOB 2/3/1981); Bo Lee{i} (Relationship: SON, Date of Birth: 2012-05-06)"
+             for i in range(50_000)]
+    descriptors, seconds = _timed(hunter.parse_dependent_descriptors, cells)
+    print(f"⏱️ Dependents descriptors: {len(cells):,} distinct cells -> {len(descriptors):,} dependents in {seconds:.2f}s")
+
+
+def bench_parallel():
+    col_map = hunter._flatten_mapping(MAPPINGS[0])
+    sites = {f"Site {i + 1}": census_sheet(25_000, seed=i) for i in range(8)}
+    serial, serial_seconds = _timed(hunter.extract_sheets, sites, col_map, parallel=False)
+    pooled, pooled_seconds = _timed(hunter.extract_sheets, sites, col_map, parallel=True)
+    print(f"⏱️ Per-sheet extraction, 8 sheets x 25,000 rows: serial {serial_seconds:.2f}s, "
+          f"{min(hunter.MAX_EXTRACT_WORKERS, len(sites))} processes {pooled_seconds:.2f}s, "
+          f"identical {serial == pooled}")
+
+
+def bench_streaming():
+    sheets = {"Census": census_sheet(50_000), "Dependents": census_sheet(50_000, seed=1)}
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        families = hunter.iter_families(sheets, MAPPINGS[0])
+        first_family = next(families)
+        first_seconds = time.perf_counter() - start
+        counts = hunter.write_families_csv(chain([first_family], families), io.StringIO())
+        stream_seconds = time.perf_counter() - start
+    _, batch_seconds = _timed(hunter.extract_data, sheets, MAPPINGS[0], parallel=False)
+    print(f"⏱️ Streaming extraction: {counts['records']:,} records in {counts['families']:,} families, "
+          f"first family after {first_seconds:.2f}s, CSV written in {stream_seconds:.2f}s "
+          f"(extract_data {batch_seconds:.2f}s)")
+
+
+if __name__ == "__main__":
+    bench_engine()
+    bench_names()
+    bench_descriptors()
+    bench_parallel()
+    bench_streaming()
@@ -0,0 +1,64 @@
+"""
+LLM Dispatch Benchmarks
+=======================
+15 chunk requests against the local Groq stub (tests/groq_stub.py, 0.5s
+latency): the previous one-by-one loop with sleep(1), the dispatcher with 429s on the
+first requests, and the dispatcher paced by a 120 requests/minute limiter.
+
+Run from the repository root: python benchmarks/bench_llm_dispatch.py
+"""
+
+import json
+import os
+import sys
+import time
+
+from groq import Groq
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from llm_dispatch import TokenBucketLimiter, dispatch, estimate_tokens  # noqa: E402
+from tests.groq_stub import GroqStubServer  # noqa: E402
+
+
+def make_send(client, limiter=None):
+    def send(chunk):
+        if limiter is not None:
+            limiter.acquire(estimate_tokens(chunk))
+        reply = client.chat.completions.create(model="stub", messages=[{"role": "user", "content": chunk}])
+        return reply.choices[0].message.content
+    return send
+
+
+if __name__ == "__main__":
+    chunks = [f"Table chunk\nrow block {i}" for i in range(15)]
+    expected = [json.dumps([{"line": f"row block {i}"}]) for i in range(15)]
+
+    with GroqStubServer(latency=0.5) as stub:
+        send = make_send(Groq(api_key="stub", base_url=stub.base_url, max_retries=0))
+        start = time.perf_counter()
+        sequential = []
+        for chunk in chunks:
+            sequential.append(send(chunk))
+            time.sleep(1)  # Rate limiting (previous loop)
+        print(f"⏱️ Sequential + sleep(1): {len(chunks)} chunks in {time.perf_counter() - start:.2f}s, "
+              f"in order {sequential == expected}")
+
+    with GroqStubServer(latency=0.5, fail_first=3, retry_after=1) as stub:
+        limiter = TokenBucketLimiter(requests_per_minute=600, tokens_per_minute=100_000)
+        send = make_send(Groq(api_key="stub", base_url=stub.base_url, max_retries=0), limiter)
+        counters = {}
+        start = time.perf_counter()
+        results = list(dispatch(chunks, send, max_in_flight=4, limiter=limiter, counters=counters))
+        print(f"⏱️ Dispatcher (4 in flight, first 3 requests get 429): {len(chunks)} chunks in "
+              f"{time.perf_counter() - start:.2f}s, in order {results == expected}, stub {stub.counters}, "
+              f"retried {counters.get('rate_limited', 0)}")
+
+    with GroqStubServer(latency=0.5) as stub:
+        limiter = TokenBucketLimiter(requests_per_minute=120)  # 2 per second once the first minute's budget is spent
+        limiter.levels[0] = 0
+        send = make_send(Groq(api_key="stub", base_url=stub.base_url, max_retries=0), limiter)
+        start = time.perf_counter()
+        results = list(dispatch(chunks, send, max_in_flight=8, limiter=limiter))
+        print(f"⏱️ Dispatcher at 120 req/min from an empty bucket: {len(chunks)} chunks in "
+              f"{time.perf_counter() - start:.2f}s (pacing floor {len(chunks) / 2:.1f}s), in order {results == expected}")
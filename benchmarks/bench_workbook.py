@@ -0,0 +1,51 @@
+"""
+Workbook Benchmarks
+===================
+Serial vs process-pool sheet parsing (workbook.parse_sheets) for growing sheet counts,
+on synthetic one-sheet-per-division workbooks (tests/synthetic.py).
+
+Run from the repository root: python benchmarks/bench_workbook.py
+"""
+
+import contextlib
+import io
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from workbook import MAX_PARSE_WORKERS, WorkbookSnapshot, use_parallel  # noqa: E402
+from tests.synthetic import census_workbook  # noqa: E402
+
+
+def benchmark_parallel_parse(sheet_counts=(4, 10, 20, 40, 60), rows_per_sheet=1000):
+    """Time serial vs process-pool parsing for growing sheet counts; returns a list of result dicts."""
+    results = []
+    for n_sheets in sheet_counts:
+        data = census_workbook(n_sheets, rows_per_sheet)
+        timings = {}
+        for label, parallel in (("serial", False), ("parallel", True)):
+            with contextlib.redirect_stdout(io.StringIO()):   # silence per-sheet header debug output
+                start = time.perf_counter()
+                snapshot = WorkbookSnapshot.from_upload(data, parallel=parallel)
+                timings[label] = time.perf_counter() - start
+            timings[label + "_sheets"] = snapshot.sheet_names
+        results.append({
+            "Sheets": n_sheets,
+            "Size (KB)": round(len(data) / 1024),
+            "Serial (s)": round(timings["serial"], 2),
+            "Parallel (s)": round(timings["parallel"], 2),
+            "Speedup": round(timings["serial"] / timings["parallel"], 2),
+            "Auto": "parallel" if use_parallel(data, timings["serial_sheets"]) else "serial",
+            "Same sheets": timings["serial_sheets"] == timings["parallel_sheets"],
+        })
+        print(f"📊 {results[-1]}")
+    return results
+
+
+if __name__ == "__main__":
+    print(f"⚙️ Benchmarking sheet parsing with up to {MAX_PARSE_WORKERS} workers")
+    print(pd.DataFrame(benchmark_parallel_parse()).to_string(index=False))
@@ -0,0 +1,78 @@
+"""
+LLM Call Count
+==============
+Requests per extraction with the token-budgeted chunks of llm_extractor, against the
+previous 40,000-character chunks, for synthetic sheets and any workbooks given.
+
+Output tokens decide the count. A reply can hold at most max_tokens, so the fewest
+requests that return every record is rows x tokens per record / max_tokens ("floor").
+The previous chunks were sized by input characters alone. A chunk of hundreds of rows
+hit max_tokens (16,384), and its continuation was sent without the conversation, so it
+could not resume the list. The "Old records" column is the most records those requests
+could return.
+
+Token counts are llm_extractor's estimates (LLM_TOKENIZER selects a real tokenizer);
+LLM_TOKENS_PER_MINUTE sets the account limit the chunks are sized for.
+Run from the repository root: python benchmarks/llm_call_count.py [book.xlsx ...]
+"""
+
+import math
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GROQ_API_KEY", "unused")  # llm_extractor builds its client at import; nothing is sent
+
+import llm_extractor  # noqa: E402
+from table_format import _sample_census  # noqa: E402
+from tests.synthetic import census_workbook  # noqa: E402
+
+# Previous llm_extractor: characters per chunk, max_tokens per request
+OLD_CHUNK_CHARS = 40000
+OLD_MAX_TOKENS = 16384
+
+
+def call_counts(name, sheets):
+    """Old and budgeted request counts for one workbook (sheet name -> DataFrame)."""
+    included = dict(llm_extractor._included_sheets(sheets))
+    rows = sum(len(df) for df in included.values())
+    budget = llm_extractor.chunk_budget()
+    per_record = budget["output_tokens_per_record"]
+
+    old_text = "".join(f"\n\n### SHEET: {sheet}\n{df.to_string(index=False)}" for sheet, df in included.items())
+    old_chunks = math.ceil(len(old_text) / OLD_CHUNK_CHARS)
+    old_records_per_reply = OLD_MAX_TOKENS // per_record
+    rows_per_old_chunk = rows / old_chunks
+    truncated = old_chunks if rows_per_old_chunk > old_records_per_reply else 0
+
+    chunks = list(llm_extractor.pack_chunks(llm_extractor.iter_family_units(included.items()),
+                                            budget["input_tokens"], llm_extractor.estimator.count,
+                                            budget["max_records"]))
+    return {
+        "Workbook": name,
+        "Rows": rows,
+        "Old requests": old_chunks + truncated,
+        "Old records": min(rows, old_chunks * old_records_per_reply),
+        "Requests": len(chunks),
+        "Rows/request": budget["max_records"],
+        "Floor": math.ceil(rows * per_record / budget["max_output_tokens"]),
+        "Tokens/record": per_record,
+    }
+
+
+if __name__ == "__main__":
+    workbooks = {
+        "800 rows x 3 columns": {"Census": pd.DataFrame({
+            "Employee Name": [f"Person {i}" for i in range(800)], "DOB": ["1980-01-01"] * 800,
+            "Relationship": ["Employee"] * 800})},
+        "sample census (400 rows)": _sample_census(),
+        "4 divisions x 250 rows": llm_extractor.read_sheets(census_workbook(4, 250)),
+    }
+    for path in sys.argv[1:]:
+        workbooks[path] = llm_extractor.read_sheets(path)
+    print(f"📏 Requests per extraction at {llm_extractor.LLM_TOKENS_PER_MINUTE:,} tokens/minute, "
+          f"max_tokens {llm_extractor.output_token_limit():,} "
+          f"(previously {OLD_MAX_TOKENS:,} with {OLD_CHUNK_CHARS:,}-char chunks)")
+    print(pd.DataFrame([call_counts(name, sheets) for name, sheets in workbooks.items()]).to_string(index=False))
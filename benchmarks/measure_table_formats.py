@@ -0,0 +1,30 @@
+"""
+Table Format Sizes
+==================
+Characters and tokens of census sheets in every prompt format of table_format.py,
+with the savings against DataFrame.to_string.
+
+Run from the repository root: python benchmarks/measure_table_formats.py [book.xlsx ...]
+Without workbooks it measures a generated census sheet (table_format._sample_census).
+"""
+
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from table_format import _sample_census, measure_formats  # noqa: E402
+from token_budget import LocalTokenizer, get_estimator  # noqa: E402
+
+
+if __name__ == "__main__":
+    sheets = {}
+    for path in sys.argv[1:]:
+        for sheet_name, df in pd.read_excel(path, sheet_name=None).items():
+            sheets[f"{path}:{sheet_name}"] = df
+    sheets = sheets or _sample_census()
+    exact = isinstance(get_estimator("pipe"), LocalTokenizer)
+    print(f"📏 Prompt size per format ({'tokenizer counts' if exact else 'estimated tokens'})")
+    print(pd.DataFrame(measure_formats(sheets)).to_string(index=False))
@@ -0,0 +1,144 @@
+"""
+Header Row Detection
+====================
+Find the header row of a census sheet, shared by app.py (via workbook.py) and ui_app.py.
+
+Carrier and HRIS exports often put titles or blank rows above the real header,
+or split the header over two rows (a merged "Medical" group cell above
+"Coverage" / "Plan"). Candidate rows are scored with column-wise string
+operations over a small NumPy block instead of a per-cell Python loop, so wide
+sheets (200+ columns) cost the same handful of vectorized calls as narrow ones.
+
+Candidate -1 is the header pandas already parsed (df.columns); rows 0..N-1 are
+the first data rows. A cell is "header-like" when it is short, contains
+letters, is not a number and does not look like a date.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Cell values treated as empty (astype(str) turns NaN into "nan")
+NULL_STRINGS = ["", "nan", "none", "null", "nat", "<na>"]
+
+
+def _is_null(value):
+    if value is None:
+        return True
+    try:
+        if pd.isna(value):
+            return True
+    except (TypeError, ValueError):
+        pass
+    return str(value).strip().lower() in NULL_STRINGS
+
+
+def _score_block(block):
+    """
+    Score every row of a 2-D object block at once.
+
+    Returns (non_null, header_like, null_mask): per-row counts plus the cell-level null mask.
+    """
+    n_rows, n_cols = block.shape
+    flat = pd.Series(block.ravel(), dtype=object)
+    text = flat.where(flat.notna(), "").astype(str).str.strip()
+
+    null = (flat.isna() | text.str.lower().isin(NULL_STRINGS)).to_numpy(dtype=bool)
+    short = (text.str.len() < 50).to_numpy(dtype=bool)
+    has_alpha = text.str.contains(r"[^\W\d_]", regex=True).to_numpy(dtype=bool)
+    numeric = text.str.replace(".", "", regex=False).str.replace("-", "", regex=False).str.isdigit().to_numpy(dtype=bool)
+    date_like = text.str[:10].str.contains("/", regex=False).to_numpy(dtype=bool)
+
+    header_like = ~null & short & has_alpha & ~numeric & ~date_like
+    null_mask = null.reshape(n_rows, n_cols)
+    return (~null_mask).sum(axis=1), header_like.reshape(n_rows, n_cols).sum(axis=1), null_mask
+
+
+def _is_group_row(candidate, non_null, header_like, null_mask):
+    """A group row (merged "Medical" / "Dental" cells) is sparse, all header-like and has gaps between labels."""
+    if non_null[candidate] < 2 or header_like[candidate] != non_null[candidate]:
+        return False
+    positions = np.flatnonzero(~null_mask[candidate])
+    return positions[-1] - positions[0] + 1 > len(positions)
+
+
+def detect_header(df, max_rows=10, max_header_rows=2):
+    """
+    Detect the header row(s) of a sheet.
+
+    Returns a dict:
+        row          - last header row (-1 = keep df.columns); data starts at row + 1
+        header_rows  - all header rows, top to bottom (more than one for multi-row headers)
+        score        - score of the winning row
+        candidates   - score breakdown per candidate row: row, non_null, header_like, ratio, score
+    """
+    n = min(max_rows, len(df))
+    block = np.empty((n + 1, df.shape[1]), dtype=object)
+    block[0] = [None if str(c).startswith("Unnamed") else c for c in df.columns]
+    if n:
+        block[1:] = df.iloc[:n].to_numpy(dtype=object)
+
+    non_null, header_like, null_mask = _score_block(block)
+    ratio = np.divide(header_like, non_null, out=np.zeros(len(non_null)), where=non_null > 0)
+    # non_null * ratio: rows with many header-like labels win
+    scores = non_null * ratio
+
+    best = int(np.argmax(scores)) if len(scores) and scores.max() > 0 else 0
+    header_candidates = [best]
+    while len(header_candidates) < max_header_rows and header_candidates[0] > 0:
+        above = header_candidates[0] - 1
+        if non_null[above] >= non_null[best] or not _is_group_row(above, non_null, header_like, null_mask):
+            break
+        header_candidates.insert(0, above)
+
+    return {
+        "row": best - 1,
+        "header_rows": [c - 1 for c in header_candidates],
+        "score": float(scores[best]) if len(scores) else 0.0,
+        "candidates": [
+            {
+                "row": i - 1,
+                "non_null": int(non_null[i]),
+                "header_like": int(header_like[i]),
+                "ratio": round(float(ratio[i]), 3),
+                "score": float(scores[i]),
+            }
+            for i in range(len(scores))
+        ],
+    }
+
+
+def apply_header(df, detection):
+    """
+    Return df with the detected header applied and the rows above the data removed.
+
+    Multi-row headers are joined with a space ("Medical Coverage"); group labels are
+    carried across the blank cells of merged ranges. Empty labels become "Unnamed: i".
+    """
+    if detection["header_rows"] == [-1]:
+        return df
+
+    label_rows = []
+    for r in detection["header_rows"]:
+        if r == -1:
+            values = [None if str(c).startswith("Unnamed") else c for c in df.columns]
+        else:
+            values = list(df.iloc[r])
+        label_rows.append([None if _is_null(v) else str(v).strip() for v in values])
+
+    # Carry group labels (all rows but the last) across merged cells
+    for labels in label_rows[:-1]:
+        current = None
+        for i, label in enumerate(labels):
+            if label is None:
+                labels[i] = current
+            else:
+                current = label
+
+    columns = []
+    for i in range(df.shape[1]):
+        parts = [labels[i] for labels in label_rows if labels[i]]
+        columns.append(" ".join(parts) if parts else f"Unnamed: {i}")
+
+    out = df.iloc[detection["row"] + 1:].reset_index(drop=True)
+    out.columns = columns
+    return out
@@ -1,913 +1,1111 @@
-import pandas as pd, io, csv, string, re, sys
-from collections import defaultdict
+import pandas as pd, numpy as np, io, csv, string, re, sys, os
+from concurrent.futures import ProcessPoolExecutor
+from bisect import bisect_right
+from collections import defaultdict, deque
+from contextlib import ExitStack
+from itertools import groupby, islice
 from datetime import datetime
+from workbook import WorkbookSnapshot
+from pipeline_log import DEBUG, log, StageTimer
+from output_schema import OutputSchema
 
-def safe_print(*args, **kwargs):
-    """Safely print without raising BrokenPipeError in Streamlit"""
-    try:
-        print(*args, **kwargs)
-    except (BrokenPipeError, OSError):
-        # Streamlit redirects stdout, pipe can close - ignore the error
-        pass
-
-def _find_cols(df, patterns, sheet):
-    "Return list of (sheet, col_name) that match any pattern"
-    hits = []
-    for col_idx, col_name in enumerate(df.columns):
-        name = str(col_name).lower()
-        if any(p in name for p in patterns):
-            hits.append((sheet, col_name))
-    return hits
-
-def _hunt_value(df, row_idx, col_refs, value_patterns):
-    "Return first non-null value in any of the col_refs that matches value_patterns"
-    for sh, col in col_refs:
-        if sh != df.name: continue
-        if col not in df.columns: continue
-        val = str(df.iloc[row_idx, df.columns.get_loc(col)]).strip()
-        if val=="" or val.lower()=="nan": continue
-        if any(vp in val.lower() for vp in value_patterns):
-            return val
-    return None
+# Relationship values that mark a dependent row
+DEPENDENT_KEYWORDS = ["SPOUSE", "CHILD", "SON", "DAUGHTER", "WIFE", "HUSBAND", "DEPENDENT"]
 
-def extract_data(all_sheets: dict[str, pd.DataFrame], mapping: dict):
-    safe_print(f"🔍 Debug: extract_data called with {len(all_sheets)} sheets")
-    safe_print(f"🔍 Debug: mapping = {mapping}")
-    
-    # Flatten mapping
+# Job titles typed into the Relationship column mark an employee row
+JOB_TITLE_KEYWORDS = ["MANAGER", "ASSISTANT", "ACCOUNTANT", "DIRECTOR", "COORDINATOR", 
+                      "SPECIALIST", "ANALYST", "SUPERVISOR", "EXECUTIVE", "OFFICER",
+                      "REPRESENTATIVE", "TECHNICIAN", "ADMINISTRATOR", "CARE", "PATIENT",
+                      "STAFF", "CLERK", "LEAD", "SENIOR", "JUNIOR", "PRINCIPAL"]
+
+# Unmapped columns with these words never hold a person's name
+NON_NAME_COLUMN_TERMS = ["zip", "code", "phone", "email", "address", "city", "state", "dob", "birth",
+                         "date", "id", "number", "ssn", "coverage", "plan"]
+
+# Roles of unmapped columns, by words in the column name
+DEPENDENTS_COLUMN_TERMS = ["dependent", "spouse", "child"]
+NAME_COLUMN_TERMS = ["first", "last", "name", "dependent"]
+RELATIONSHIP_COLUMN_TERMS = ["relation"]
+# Any column (mapped or not) with these words holds dependents' dates of birth
+BIRTH_COLUMN_TERMS = ["birth", "dob"]
+
+# Output fields copied straight from their mapped columns
+OTHER_FIELDS = ["DOB","Gender","Medical Coverage","Medical Plan Name",
+                "Dental Coverage","Dental Plan Name",
+                "Vision Coverage","Vision Plan Name",
+                "COBRA Participation (Y/N)"]
+
+# Values treated as an empty name
+NAME_NULLS = ["nan", "none", "null", ""]
+
+# Fields of every extracted record, and the output columns they finalize into
+RECORD_FIELDS = ["First Name", "Last Name", "Relationship To employee", "Dependent (Y/N)", *OTHER_FIELDS,
+                 "__sheet__", "__original_row_idx__", "__sheet_name__", "Family Group"]
+OUTPUT_SCHEMA = OutputSchema(RECORD_FIELDS)
+
+def _cell_text(val):
+    "Cell value as text; missing cells (real nulls) are empty"
+    if pd.isna(val):
+        return ""
+    return str(val)
+
+def _flatten_mapping(mapping: dict):
+    "Return field -> [(sheet, col), …] from the \"sheet,col\" mapping references"
     col_map = defaultdict(list)  # field -> [(sheet,col), …]
     for field, refs in mapping.items():
-        safe_print(f"🔍 Debug: Processing field '{field}' with refs: {refs}")
+        log.debug("🔍 Debug: Processing field '{}' with refs: {}", field, refs)
         for r in refs:
             if "," in r:
                 sheet_name, col_name = r.split(",", 1)
                 col_name = col_name.strip()  # Remove any whitespace
                 col_map[field].append((sheet_name, col_name))
-                safe_print(f"🔍 Debug: Added mapping {field} -> sheet='{sheet_name}', column='{col_name}' (repr: {repr(col_name)})")
+                log.debug("🔍 Debug: Added mapping {} -> sheet='{}', column='{}' (repr: {!r})", field, sheet_name, col_name, col_name)
     
-    safe_print(f"🔍 Debug: Final col_map = {dict(col_map)}")
+    log.debug("🔍 Debug: Final col_map = {}", dict(col_map))
     
     # Specifically check Relationship mapping
     if "Relationship To employee" in col_map:
-        safe_print(f"🎯 RELATIONSHIP MAPPING DEBUG: {col_map['Relationship To employee']}")
+        log.debug("🎯 RELATIONSHIP MAPPING DEBUG: {}", col_map['Relationship To employee'])
     else:
-        safe_print(f"⚠️ WARNING: 'Relationship To employee' not found in mapping!")
+        log.warning("⚠️ WARNING: 'Relationship To employee' not found in mapping!")
+    return col_map
 
-    # assemble master dataframe
-    master = []
-    safe_print(f"🔍 Debug: Processing {len(all_sheets)} sheets")
-    for sh_name, df in all_sheets.items():
-        safe_print(f"🔍 Debug: Processing sheet '{sh_name}' with {df.shape[0]} rows, {df.shape[1]} columns")
-        safe_print(f"🔍 Debug: Columns in '{sh_name}': {list(df.columns)}")
-        df = df.dropna(how="all").copy()
-        df.name = sh_name
-        safe_print(f"🔍 Debug: After dropna, '{sh_name}' has {len(df)} rows")
-        
-        # Define helper functions for this sheet
-        def find_column(df, col_name):
-            """Find column in DataFrame, handling whitespace and case differences"""
-            col_name = str(col_name).strip()
+class ColumnResolver:
+    """
+    Resolve mapped column names against one sheet's columns.
+    
+    Built once per sheet: exact names, lower-cased names and whitespace-collapsed names
+    are indexed up front, so each lookup is a few dict probes instead of linear scans over
+    df.columns, and each name is resolved (and logged) only once.
+    Matching rules and priority are those of find_column: exact, then case-insensitive,
+    then whitespace-normalized; the first matching column wins.
+    """
+    
+    def __init__(self, columns):
+        self.columns = list(columns)
+        self._exact = set(self.columns)
+        self._lower = {}
+        self._collapsed = {}
+        for actual_col in self.columns:
+            self._lower.setdefault(str(actual_col).strip().lower(), actual_col)
+            self._collapsed.setdefault(" ".join(str(actual_col).split()).lower(), actual_col)
+        self._resolved = {}
+    
+    def resolve(self, col_name):
+        """Actual column for col_name, or None"""
+        try:
+            return self._resolved[col_name]
+        except KeyError:
+            pass
+        key = str(col_name).strip()
+        if key in self._exact:
             # Exact match first (highest priority)
-            if col_name in df.columns:
-                safe_print(f"🔍 find_column: Exact match found for '{col_name}'")
-                return col_name
-            # Try case-insensitive match
-            for actual_col in df.columns:
-                if str(actual_col).strip().lower() == col_name.lower():
-                    safe_print(f"🔍 find_column: Case-insensitive match: '{col_name}' -> '{actual_col}'")
-                    return actual_col
-            # Try matching with whitespace normalization
-            col_name_normalized = " ".join(col_name.split())
-            for actual_col in df.columns:
-                actual_normalized = " ".join(str(actual_col).split())
-                if actual_normalized.lower() == col_name_normalized.lower():
-                    safe_print(f"🔍 find_column: Whitespace-normalized match: '{col_name}' -> '{actual_col}'")
-                    return actual_col
-            safe_print(f"❌ find_column: No match found for '{col_name}'. Available columns: {list(df.columns)}")
-            return None
-        
-        def split_full_name(full_name):
-            """Split full name into first and last name"""
-            if not full_name or not str(full_name).strip():
-                return None, None
-            
-            full_name = str(full_name).strip()
-            
-            # Filter out NaN, nan, None, empty strings
-            if not full_name or full_name.lower() in ["nan", "none", "null", ""]:
-                return None, None
-            
-            # Handle comma-separated format: "Smith, John" or "Smith, John M"
-            if "," in full_name:
-                parts = [p.strip() for p in full_name.split(",")]
-                if len(parts) >= 2:
-                    return parts[1].strip(), parts[0].strip()  # Last name first, then first name
-                elif len(parts) == 1:
-                    return None, parts[0].strip()
-            
-            # Handle space-separated format: "John Smith" or "Mary Jane Doe"
-            parts = full_name.split()
-            if len(parts) >= 2:
-                # Last word is last name, everything else is first name
-                return " ".join(parts[:-1]).strip(), parts[-1].strip()
-            elif len(parts) == 1:
-                # Only one word - assume it's last name
-                return None, parts[0].strip()
-            
-            return None, None
-        
-        def normalize_dob(dob_value):
-            """Normalize DOB by removing timestamp and formatting as YYYY-MM-DD"""
-            if not dob_value or str(dob_value).strip() == "" or str(dob_value).lower() == "nan":
-                return ""
-            
-            dob_str = str(dob_value).strip()
-            
-            # Remove timestamp if present (format: "YYYY-MM-DD HH:MM:SS" or "YYYY-MM-DD 00:00:00")
-            if " " in dob_str:
-                dob_str = dob_str.split(" ")[0]
-            
-            # If it's in datetime format, try to parse and format
+            actual_col = key
+        elif key.lower() in self._lower:
+            actual_col = self._lower[key.lower()]
+            log.debug("🔍 find_column: Case-insensitive match: '{}' -> '{}'", key, actual_col)
+        elif " ".join(key.split()).lower() in self._collapsed:
+            actual_col = self._collapsed[" ".join(key.split()).lower()]
+            log.debug("🔍 find_column: Whitespace-normalized match: '{}' -> '{}'", key, actual_col)
+        else:
+            actual_col = None
+            log.warning("❌ find_column: No match found for '{}'. Available columns: {}", key, self.columns)
+        self._resolved[col_name] = actual_col
+        return actual_col
+    
+    def resolve_refs(self, col_refs, sheet_name):
+        """Actual columns of sheet_name for (sheet, col) refs, in ref order; unknown columns are skipped"""
+        return [actual_col for sh, col in col_refs if sh == sheet_name
+                for actual_col in [self.resolve(col)] if actual_col is not None]
+
+def find_column(df, col_name):
+    """Find column in DataFrame, handling whitespace and case differences"""
+    return ColumnResolver(df.columns).resolve(col_name)
+
+# Generational suffixes stay with the last name ("John Smith Jr" -> John / Smith Jr)
+NAME_SUFFIX = r"(?i)(?:jr|sr|ii|iii|iv)\.?"
+# "First [Middle] Last [Suffix]": last is the final word, plus a trailing suffix when there is one
+SPACED_NAME = r"(?i)^(?P<first>.+?) (?P<last>\S+ (?:jr|sr|ii|iii|iv)\.?|\S+)$"
+# "John Jr" after the comma of "Smith, John Jr"
+TRAILING_SUFFIX = r"(?i)^(?P<head>.+) (?P<suffix>(?:jr|sr|ii|iii|iv)\.?)$"
+_SUFFIX_RE = re.compile(NAME_SUFFIX)
+_SPACED_NAME_RE = re.compile(SPACED_NAME)
+_TRAILING_SUFFIX_RE = re.compile(TRAILING_SUFFIX)
+
+def split_full_name(full_name):
+    """
+    Split full name into first and last name.
+    
+    "Smith, John" / "Smith, Jr., John" / "Smith, John, Jr" / "Smith, John Jr" are last-name first;
+    "John Smith" / "Mary Jane Doe" / "John Smith III" take the last word (plus suffix) as last name.
+    A single word is a last name. Whitespace runs are collapsed; null sentinels give (None, None).
+    split_names is the column-wise version and gives the same results.
+    """
+    if full_name is None or (not isinstance(full_name, str) and pd.isna(full_name)):
+        return None, None
+    
+    full_name = " ".join(str(full_name).split())
+    
+    # Filter out NaN, nan, None, empty strings
+    if full_name.lower() in NAME_NULLS:
+        return None, None
+    
+    # Handle comma-separated format: "Smith, John" or "Smith, John M"
+    if "," in full_name:
+        parts = [p.strip() for p in full_name.split(",")]
+        last, first = parts[0], parts[1]
+        if len(parts) > 2 and _SUFFIX_RE.fullmatch(parts[1]):
+            # "Smith, Jr., John"
+            return parts[2], f"{last} {parts[1]}"
+        if len(parts) > 2 and _SUFFIX_RE.fullmatch(parts[2]):
+            # "Smith, John, Jr"
+            return first, f"{last} {parts[2]}"
+        match = _TRAILING_SUFFIX_RE.match(first)
+        if match:
+            # "Smith, John Jr"
+            return match.group("head"), f"{last} {match.group('suffix')}"
+        return first, last  # Last name first, then first name
+    
+    # Handle space-separated format: "John Smith" or "Mary Jane Doe"
+    match = _SPACED_NAME_RE.match(full_name)
+    if match:
+        return match.group("first"), match.group("last")
+    # Only one word - assume it's last name
+    return None, full_name
+
+def split_names(names):
+    """
+    Split a column of full names into (first, last) Series with the same index.
+    
+    Column-wise split_full_name: each distinct name is split once and the parts are
+    mapped back, so repeated names (dependents sharing a last name, re-listed employees)
+    cost one regex pass. Missing parts are None.
+    """
+    names = pd.Series(names, dtype=object)
+    codes, uniques = pd.factorize(names.to_numpy(dtype=object), use_na_sentinel=False)
+    parts = [split_full_name(name) for name in uniques]
+    first = np.array([p[0] for p in parts], dtype=object)
+    last = np.array([p[1] for p in parts], dtype=object)
+    return (pd.Series(first[codes], index=names.index, dtype=object),
+            pd.Series(last[codes], index=names.index, dtype=object))
+
+# DOB formats in priority order; a column's inferred format is tried first
+DOB_FORMATS = ["%Y-%m-%d", "%m/%d/%Y", "%d/%m/%Y", "%Y-%m-%d %H:%M:%S", "%m/%d/%y"]
+# Excel serial day numbers read as DOBs: 10000 = 1927-05-18, 73050 = 2099-12-31
+EXCEL_SERIAL_PATTERN = r"\d{5}(?:\.0+)?"
+EXCEL_SERIAL_RANGE = (10000, 73050)
+EXCEL_EPOCH = datetime(1899, 12, 30)
+
+def _dob_date_part(dob_value):
+    "DOB cell as text without its time part (\"\" for empty/nan)"
+    dob_str = _cell_text(dob_value).strip()
+    if dob_str.lower() == "nan":
+        return ""
+    # Remove timestamp if present (format: "YYYY-MM-DD HH:MM:SS" or "YYYY-MM-DD 00:00:00")
+    return dob_str.split(" ")[0] if " " in dob_str else dob_str
+
+def _excel_serial_date(dob_str):
+    "YYYY-MM-DD for an Excel serial day number in EXCEL_SERIAL_RANGE, else None"
+    if not re.fullmatch(EXCEL_SERIAL_PATTERN, dob_str):
+        return None
+    days = int(float(dob_str))
+    if not EXCEL_SERIAL_RANGE[0] <= days <= EXCEL_SERIAL_RANGE[1]:
+        return None
+    return (EXCEL_EPOCH + pd.Timedelta(days=days)).strftime("%Y-%m-%d")
+
+def _dob_formats(preferred_format=None):
+    if preferred_format is None:
+        return DOB_FORMATS
+    return [preferred_format] + [fmt for fmt in DOB_FORMATS if fmt != preferred_format]
+
+def normalize_dob(dob_value, preferred_format=None):
+    """
+    Normalize DOB by removing timestamp and formatting as YYYY-MM-DD.
+    
+    preferred_format (usually the column's infer_dob_format) is tried before DOB_FORMATS,
+    so "01/02/1990" in a day-first column reads as 1 Feb. Excel serial day numbers are
+    converted; anything unparseable is returned as-is.
+    """
+    dob_str = _dob_date_part(dob_value)
+    if not dob_str:
+        return ""
+    
+    for fmt in _dob_formats(preferred_format):
+        try:
+            return datetime.strptime(dob_str, fmt).strftime("%Y-%m-%d")
+        except ValueError:
+            continue
+    
+    # Return original if we can't parse it
+    return _excel_serial_date(dob_str) or dob_str
+
+def infer_dob_format(values, sample_size=200):
+    """
+    Dominant DOB format of a column: the DOB_FORMATS entry that parses the most of its
+    first sample_size distinct values (earlier formats win ties). None if nothing parses.
+    """
+    distinct = pd.unique(pd.Series(values).to_numpy(dtype=object))
+    sample = list(islice(dict.fromkeys(filter(None, map(_dob_date_part, distinct[:sample_size * 4]))), sample_size))
+    best_format, best_hits = None, 0
+    for fmt in DOB_FORMATS:
+        hits = 0
+        for dob_str in sample:
             try:
-                # Try various date formats
-                for fmt in ["%Y-%m-%d", "%m/%d/%Y", "%d/%m/%Y", "%Y-%m-%d %H:%M:%S", "%m/%d/%y"]:
-                    try:
-                        dt = datetime.strptime(dob_str, fmt)
-                        return dt.strftime("%Y-%m-%d")
-                    except ValueError:
-                        continue
-            except:
+                datetime.strptime(dob_str, fmt)
+                hits += 1
+            except ValueError:
                 pass
-            
-            # If already in YYYY-MM-DD format, return as-is
-            if len(dob_str) == 10 and dob_str[4] == "-" and dob_str[7] == "-":
-                return dob_str
-            
-            # Return original if we can't parse it
-            return dob_str
-        
-        def get_value_from_cols(col_refs):
-            """Get value from columns, checking if it's a full name"""
-            for sh, col in col_refs:
-                if sh != sh_name: continue
-                actual_col = find_column(df, col)
-                if actual_col is None:
-                    safe_print(f"🔍 Debug: Column '{col}' not found in sheet '{sh_name}'. Available columns: {list(df.columns)}")
-                    continue
-                val = df.iloc[row_idx, df.columns.get_loc(actual_col)]
-                # Handle NaN values properly
-                if pd.isna(val):
-                    continue
-                val = str(val).strip()
-                # Filter out nan strings and empty values
-                if val and val.lower() not in ["nan", "none", "null", ""]:
-                    return val
-            return None
-        
-        # Determine if this row is an employee or dependent row
-        # Strategy: Check if Employee Name columns are filled (employee) vs Dependents/Relationship columns filled (dependent)
-        
-        for row_idx in range(len(df)):
-            row_dict = {}
-            
-            # Check if this is likely an employee row (has Employee Name) or dependent row (has Dependents column)
-            # Handle empty mappings (user selected "None")
-            emp_cols = col_map.get("Employee Name", [])
-            first_cols = col_map.get("First Name", [])
-            last_cols = col_map.get("Last Name", [])
-            rel_cols = col_map.get("Relationship To employee", [])
-            
-            # Check Employee Name column to see if this row has an employee
-            employee_name_value = None
-            for sh, col in emp_cols:
-                if sh != sh_name: continue
-                actual_col = find_column(df, col)
-                if actual_col is None: continue
-                emp_val_raw = df.iloc[row_idx, df.columns.get_loc(actual_col)]
-                # Handle NaN values properly
-                if pd.isna(emp_val_raw):
-                    continue
-                emp_val = str(emp_val_raw).strip()
-                if emp_val and emp_val.lower() not in ["nan", "none", "null", ""]:
-                    employee_name_value = emp_val
-                    break
-            
-            # Check if there's a "Dependents" column or similar (unmapped column that might contain dependent names)
-            dependents_col_value = None
-            dependents_col_name = None
-            relationship_value = None
-            
-            # First, check Relationship column if mapped
-            for sh, col in rel_cols:
-                if sh != sh_name: continue
-                actual_col = find_column(df, col)
-                if actual_col is None:
-                    safe_print(f"🔍 Debug: Relationship column '{col}' not found in sheet '{sh_name}'. Available columns: {list(df.columns)}")
-                    continue
-                rel_val = str(df.iloc[row_idx, df.columns.get_loc(actual_col)]).strip()
-                safe_print(f"🔍 Debug: Relationship mapped to '{col}' -> found column '{actual_col}' with value '{rel_val}' (row {row_idx})")
-                if rel_val and rel_val.lower() not in ["nan", ""]:
-                    relationship_value = rel_val
-                    safe_print(f"✅ Debug: Using relationship value '{relationship_value}' from mapped column '{actual_col}'")
-                    break
-            
-            # Look for unmapped columns that might contain dependent names
-            for col_name in df.columns:
-                actual_col = find_column(df, col_name)
-                if actual_col is None: continue
-                
-                # Skip if already mapped
-                is_mapped = False
-                for mapped_field, mapped_cols in col_map.items():
-                    for sh, mapped_col in mapped_cols:
-                        if sh == sh_name and find_column(df, mapped_col) == actual_col:
-                            is_mapped = True
-                            break
-                    if is_mapped:
-                        break
-                
-                if not is_mapped:
-                    col_lower = str(actual_col).lower()
-                    col_value = str(df.iloc[row_idx, df.columns.get_loc(actual_col)]).strip()
-                    
-                    # Check if this looks like a "Dependents" column
-                    if ("dependent" in col_lower or "spouse" in col_lower or "child" in col_lower) and col_value:
-                        dependents_col_value = col_value
-                        dependents_col_name = actual_col
-                        break
-            
-            # Check if First Name/Last Name columns have values (might be a dependent row)
-            first_name_val = get_value_from_cols(first_cols)
-            last_name_val = get_value_from_cols(last_cols)
-            has_name_values = bool(first_name_val or last_name_val)
-            
-            # Determine if this is an employee row or dependent row
-            # First check relationship value - if it says Child/Spouse, treat as dependent regardless of Employee Name
-            relationship_indicates_dependent = False
-            relationship_is_job_title = False
-            if relationship_value:
-                rel_upper = str(relationship_value).upper().strip()
-                # Check if it's a relationship term (dependent)
-                relationship_indicates_dependent = any(keyword in rel_upper for keyword in [
-                    "SPOUSE", "CHILD", "SON", "DAUGHTER", "WIFE", "HUSBAND", "DEPENDENT"
-                ])
-                # Check if it's a job title (employee) - job titles typically contain job-related keywords
-                # and are longer/more descriptive than simple relationship terms
-                job_title_keywords = ["MANAGER", "ASSISTANT", "ACCOUNTANT", "DIRECTOR", "COORDINATOR", 
-                                      "SPECIALIST", "ANALYST", "SUPERVISOR", "EXECUTIVE", "OFFICER",
-                                      "REPRESENTATIVE", "TECHNICIAN", "ADMINISTRATOR", "CARE", "PATIENT",
-                                      "STAFF", "CLERK", "LEAD", "SENIOR", "JUNIOR", "PRINCIPAL"]
-                relationship_is_job_title = any(keyword in rel_upper for keyword in job_title_keywords) or len(rel_upper) > 15
-            
-            # Employee row: 
-            # 1. Has Employee Name filled AND relationship doesn't indicate dependent
-            # 2. OR has name values (First/Last) AND relationship is a job title (not a relationship term)
-            # If relationship says "Child" or "Spouse", it's a dependent even if Employee Name is filled
-            is_employee_row = (
-                (bool(employee_name_value) and not relationship_indicates_dependent) or
-                (has_name_values and relationship_is_job_title and not relationship_indicates_dependent)
-            )
-            
-            # **IMPORTANT**: Also check ALL unmapped columns for name-like values
-            # This catches cases where dependent rows have names in unmapped columns
-            name_in_unmapped = None
-            if not has_name_values and not is_employee_row:
-                # Priority: Check columns that look like name columns first
-                name_priority_cols = []
-                other_cols = []
-                
-                for col_name in df.columns:
-                    actual_col = find_column(df, col_name)
-                    if actual_col is None: continue
-                    
-                    # Skip if already mapped
-                    is_mapped = False
-                    for mapped_field, mapped_cols in col_map.items():
-                        for sh, mapped_col in mapped_cols:
-                            if sh == sh_name and find_column(df, mapped_col) == actual_col:
-                                is_mapped = True
-                                break
-                        if is_mapped:
-                            break
-                    
-                    if not is_mapped:
-                        col_lower = str(actual_col).lower()
-                        # Prioritize columns that look like name columns
-                        if any(name_term in col_lower for name_term in ["first", "last", "name", "dependent"]):
-                            name_priority_cols.append(actual_col)
-                        else:
-                            other_cols.append(actual_col)
-                
-                # Check priority columns first
-                for actual_col in name_priority_cols + other_cols:
-                    col_lower = str(actual_col).lower()
-                    col_value = str(df.iloc[row_idx, df.columns.get_loc(actual_col)]).strip()
-                    
-                    # Check if this column contains a name-like value (has letters, spaces, might be a person's name)
-                    if col_value and col_value.lower() not in ["nan", ""]:
-                        # Check if it looks like a name (contains letters, possibly spaces, not just numbers)
-                        if any(c.isalpha() for c in col_value) and len(col_value.strip()) > 2:
-                            # Exclude obvious non-name columns
-                            if not any(skip in col_lower for skip in ["zip", "code", "phone", "email", "address", "city", "state", "dob", "birth", "date", "id", "number", "ssn", "coverage", "plan"]):
-                                name_in_unmapped = col_value
-                                has_name_values = True  # Found a name in unmapped column
-                                safe_print(f"🔍 Debug: Row {row_idx} - Found name-like value in unmapped column '{actual_col}': '{col_value}'")
-                                break
-            
-            # Check if Relationship field is mapped - if it is, ONLY use mapped column, never override
-            relationship_is_mapped = len(rel_cols) > 0
-            
-            # Only check unmapped columns if Relationship field is NOT mapped
-            relationship_in_unmapped = None
-            if not relationship_is_mapped:
-                for col_name in df.columns:
-                    actual_col = find_column(df, col_name)
-                    if actual_col is None: continue
-                    
-                    # Skip if already mapped
-                    is_mapped = False
-                    for mapped_field, mapped_cols in col_map.items():
-                        for sh, mapped_col in mapped_cols:
-                            if sh == sh_name and find_column(df, mapped_col) == actual_col:
-                                is_mapped = True
-                                break
-                        if is_mapped:
-                            break
-                    
-                    if not is_mapped:
-                        col_lower = str(actual_col).lower()
-                        col_value = str(df.iloc[row_idx, df.columns.get_loc(actual_col)]).strip()
-                        
-                        # Check if this looks like a relationship column (contains spouse, child, etc.)
-                        if ("relationship" in col_lower or "relation" in col_lower) and col_value:
-                            relationship_in_unmapped = col_value
-                            break
-            
-            # Dependent row detection: 
-            # 1. If relationship value indicates dependent (Child, Spouse, etc.) - it's a dependent (highest priority)
-            # 2. OR if Employee Name is empty BUT has name values or relationship info
-            # IMPORTANT: If relationship is a job title, it's NOT a dependent (it's an employee)
-            is_dependent_row = (
-                relationship_indicates_dependent or  # Relationship value says it's a dependent (highest priority)
-                (not is_employee_row and not relationship_is_job_title and (  # Not an employee row AND not a job title
-                    bool(dependents_col_value) or  # Has Dependents column filled
-                    (bool(relationship_value) and not relationship_is_job_title) or  # Has Relationship column filled (mapped) AND it's not a job title
-                    (not relationship_is_mapped and bool(relationship_in_unmapped)) or  # Has Relationship column filled (unmapped) - only if not mapped
-                    (has_name_values and relationship_value and not relationship_is_job_title) or  # Has name AND relationship (mapped) AND it's not a job title
-                    (has_name_values and not relationship_is_mapped and relationship_in_unmapped) or  # Has name AND relationship (unmapped) - only if not mapped
-                    (has_name_values and not relationship_value and not relationship_is_job_title)  # Just has name values (First/Last Name) without Employee Name = likely dependent
-                ))
-            )
-            
-            # Use unmapped relationship ONLY if Relationship field is NOT mapped
-            if not relationship_is_mapped and relationship_in_unmapped:
-                relationship_value = relationship_in_unmapped
-            
-            safe_print(f"🔍 Debug: Row {row_idx} - Employee Name: '{employee_name_value}', Dependents: '{dependents_col_value}', Relationship: '{relationship_value}'")
-            safe_print(f"   → Is Employee Row: {is_employee_row}, Is Dependent Row: {is_dependent_row}")
-            
-            first, last = None, None
-            
-            if is_employee_row:
-                # Priority 1: If separate First Name and Last Name columns exist and have values, use them directly
-                first_val = get_value_from_cols(first_cols)
-                last_val = get_value_from_cols(last_cols)
-                
-                # Check if First Name and Last Name columns have actual separate values (not full names)
-                has_separate_name_columns = False
-                if first_val and last_val:
-                    first_clean = str(first_val).strip().lower()
-                    last_clean = str(last_val).strip().lower()
-                    if (first_clean not in ["nan", "none", "null", ""] and 
-                        last_clean not in ["nan", "none", "null", ""]):
-                        # Check if First Name column doesn't contain a full name (no comma, single word or proper first name pattern)
-                        # If First Name has multiple words and Last Name is empty or single word, it might be a full name
-                        first_parts = first_clean.split()
-                        last_parts = last_clean.split()
-                        # If First Name has 1-2 words and Last Name has 1 word, likely separate columns
-                        # If First Name has 2+ words and Last Name is empty/weak, First Name might be a full name
-                        if len(first_parts) <= 2 and len(last_parts) == 1:
-                            has_separate_name_columns = True
-                            first = first_val
-                            last = last_val
-                            safe_print(f"🔍 Debug: Employee row {row_idx} - Using separate First Name='{first}' and Last Name='{last}' columns")
-                
-                # Priority 2: If we have Employee Name column (combined name), split it
-                if not has_separate_name_columns and employee_name_value:
-                    first, last = split_full_name(employee_name_value)
-                    safe_print(f"🔍 Debug: Employee row {row_idx} - Split Employee Name '{employee_name_value}' → first='{first}', last='{last}'")
-                
-                # Priority 3: Fallback - use First Name/Last Name even if they might be full names (split if needed)
-                if not first or not last:
-                    if first_val and first_val.lower() not in ["nan", "none", "null", ""]:
-                        # Check if First Name contains a full name (has multiple words)
-                        first_parts = str(first_val).split()
-                        if len(first_parts) > 1:
-                            # Might be a full name, try to split it
-                            temp_first, temp_last = split_full_name(first_val)
-                            if temp_first and temp_last:
-                                first = temp_first
-                                last = temp_last if not last_val else last_val
-                                safe_print(f"🔍 Debug: Employee row {row_idx} - Split First Name column '{first_val}' → first='{first}', last='{last}'")
-                            else:
-                                first = first_val
-                        else:
-                            first = first_val
-                    if last_val and last_val.lower() not in ["nan", "none", "null", ""]:
-                        last = last_val
-                
-                # Filter out "nan" strings from first and last names
-                if first and str(first).lower() in ["nan", "none", "null"]:
-                    first = None
-                if last and str(last).lower() in ["nan", "none", "null"]:
-                    last = None
-                
-                if not first and not last:
-                    safe_print(f"🔍 Debug: Skipping employee row {row_idx} - no name found")
-                    continue
-                
-                row_dict["First Name"] = str(first).strip() if first else ""
-                row_dict["Last Name"] = str(last).strip() if last else ""
-                # Extract relationship value directly from mapped column - no substitution, no defaults
-                if relationship_value:
-                    row_dict["Relationship To employee"] = relationship_value
-                    safe_print(f"🔍 Debug: Employee row {row_idx} - Using relationship value '{relationship_value}' directly from mapped column")
-                else:
-                    row_dict["Relationship To employee"] = ""  # Empty if no value found, don't invent values
-                    safe_print(f"🔍 Debug: Employee row {row_idx} - No relationship value found, leaving empty")
-                row_dict["Dependent (Y/N)"] = "N"
-                
-            elif is_dependent_row:
-                # Extract dependent - try multiple sources with correct priority
-                # Priority 1: If separate First Name and Last Name columns exist and have values, use them directly
-                first_val = get_value_from_cols(first_cols)
-                last_val = get_value_from_cols(last_cols)
-                
-                has_separate_name_columns = False
-                if first_val and last_val:
-                    first_clean = str(first_val).strip().lower()
-                    last_clean = str(last_val).strip().lower()
-                    if (first_clean not in ["nan", "none", "null", ""] and 
-                        last_clean not in ["nan", "none", "null", ""]):
-                        # Check if these look like separate columns
-                        first_parts = first_clean.split()
-                        last_parts = last_clean.split()
-                        if len(first_parts) <= 2 and len(last_parts) == 1:
-                            has_separate_name_columns = True
-                            first = first_val
-                            last = last_val
-                            safe_print(f"🔍 Debug: Dependent row {row_idx} - Using separate First Name='{first}' and Last Name='{last}' columns")
-                
-                # Priority 2: Dependents column (combined name)
-                if not has_separate_name_columns and dependents_col_value and dependents_col_value.lower() not in ["nan", "none", "null", ""]:
-                    dep_name = str(dependents_col_value).strip()
-                    # Remove relationship info if present in parentheses
-                    if "(" in dep_name:
-                        dep_name = dep_name.split("(")[0].strip()
-                    first, last = split_full_name(dep_name)
-                    safe_print(f"🔍 Debug: Dependent row {row_idx} - Split Dependents column '{dep_name}' → first='{first}', last='{last}'")
-                
-                # Priority 3: Name in unmapped column (combined name)
-                if (not first or not last) and name_in_unmapped:
-                    if str(name_in_unmapped).lower() not in ["nan", "none", "null", ""]:
-                        first, last = split_full_name(name_in_unmapped)
-                        safe_print(f"🔍 Debug: Dependent row {row_idx} - Split unmapped column '{name_in_unmapped}' → first='{first}', last='{last}'")
-                
-                # Priority 4: Fallback - First Name/Last Name columns, split if they contain full names
-                if not first or not last:
-                    if first_val and first_val.lower() not in ["nan", "none", "null", ""]:
-                        if " " in first_val or "," in first_val:
-                            dep_first, dep_last = split_full_name(first_val)
-                            if dep_first and dep_first.lower() not in ["nan", "none", "null"]:
-                                first = dep_first
-                            if dep_last and dep_last.lower() not in ["nan", "none", "null"]:
-                                last = dep_last
-                            safe_print(f"🔍 Debug: Dependent row {row_idx} - Split First Name column '{first_val}' → first='{first}', last='{last}'")
-                        else:
-                            first = first_val
-                    
-                    if last_val and last_val.lower() not in ["nan", "none", "null", ""]:
-                        if " " in last_val or "," in last_val:
-                            dep_first, dep_last = split_full_name(last_val)
-                            if dep_first and dep_first.lower() not in ["nan", "none", "null"]:
-                                first = dep_first
-                            if dep_last and dep_last.lower() not in ["nan", "none", "null"]:
-                                last = dep_last
-                        else:
-                            if not last:
-                                last = last_val
-                    
-                    if first or last:
-                        safe_print(f"🔍 Debug: Dependent row {row_idx} - extracted from First/Last Name columns: first='{first}', last='{last}'")
-                
-                # Filter out "nan" strings from first and last names
-                if first and str(first).lower() in ["nan", "none", "null"]:
-                    first = None
-                if last and str(last).lower() in ["nan", "none", "null"]:
-                    last = None
-                
-                if not first and not last:
-                    safe_print(f"🔍 Debug: Skipping dependent row {row_idx} - no name found")
-                    continue
-                
-                row_dict["First Name"] = str(first).strip() if first else ""
-                row_dict["Last Name"] = str(last).strip() if last else ""
-                
-                # Extract relationship from Relationship column - use value as-is, no normalization
-                safe_print(f"🔍 Debug: Dependent row {row_idx} - Setting relationship from relationship_value='{relationship_value}'")
-                if relationship_value:
-                    row_dict["Relationship To employee"] = relationship_value
-                    safe_print(f"🔍 Debug: Using relationship value as-is: '{relationship_value}'")
-                else:
-                    row_dict["Relationship To employee"] = ""  # Empty if no value found, don't invent values
-                    safe_print(f"🔍 Debug: No relationship value found, leaving empty")
-                
-                row_dict["Dependent (Y/N)"] = "Y"
-                
-            else:
-                # Neither employee nor dependent row - skip
-                safe_print(f"🔍 Debug: Skipping row {row_idx} - not identified as employee or dependent")
-                continue
+        if hits > best_hits:
+            best_format, best_hits = fmt, hits
+    return best_format
 
-            # ---- Extract other fields ------------------------------------------
-            for field in ["DOB","Gender","Medical Coverage","Medical Plan Name",
-                          "Dental Coverage","Dental Plan Name",
-                          "Vision Coverage","Vision Plan Name",
-                          "COBRA Participation (Y/N)"]:
-                # Check if field is mapped (not empty list)
-                field_cols = col_map.get(field, [])
-                if not field_cols or len(field_cols) == 0:
-                    # Field is unmapped - leave empty
-                    row_dict[field] = ""
-                    continue
-                
-                vals = []
-                for sh,col in field_cols:
-                    if sh!=sh_name: continue
-                    actual_col = find_column(df, col)
-                    if actual_col is None:
-                        continue
-                    v = str(df.iloc[row_idx, df.columns.get_loc(actual_col)]).strip()
-                    if v and v.lower()!="nan":
-                        vals.append(v)
-                # Normalize DOB to remove timestamps
-                if field == "DOB":
-                    row_dict[field] = normalize_dob(vals[0]) if vals else ""
-                else:
-                    row_dict[field] = vals[0] if vals else ""
-
-            # For dependent rows, extract DOB from Date Of Birth column if available
-            if is_dependent_row:
-                # Look for Date Of Birth column (might be unmapped)
-                for col_name in df.columns:
-                    actual_col = find_column(df, col_name)
-                    if actual_col is None:
-                        continue
-                    col_lower = str(actual_col).lower()
-                    if "birth" in col_lower or "dob" in col_lower:
-                        dob_val = str(df.iloc[row_idx, df.columns.get_loc(actual_col)]).strip()
-                        if dob_val and dob_val.lower() not in ["nan", ""]:
-                            row_dict["DOB"] = normalize_dob(dob_val)
-                            break
-
-            row_dict["__sheet__"] = sh_name
-            row_dict["__original_row_idx__"] = row_idx  # Preserve original row order for grouping
-            row_dict["__sheet_name__"] = sh_name
-            
-            # Add the record (employee or dependent)
-            if is_employee_row:
-                # Add employee record
-                master.append(row_dict.copy())
-                safe_print(f"🔍 Debug: Added employee row {row_idx} to master: {row_dict.get('First Name', '')} {row_dict.get('Last Name', '')}")
-                
-                # Check if employee row also has a dependent in Dependents column (same row)
-                if dependents_col_value:
-                    # Parse dependent name from Dependents column (might contain relationship info)
-                    dep_name = dependents_col_value
-                    
-                    # Extract relationship from Dependents column if present (e.g., "... (Relationship: WIFE, ...)")
-                    extracted_relationship = None
-                    extracted_dob = None
-                    
-                    if "(" in dep_name:
-                        # Try to extract relationship from parentheses
-                        paren_content = dep_name[dep_name.index("(")+1:dep_name.rindex(")")]
-                        dep_name = dep_name.split("(")[0].strip()
-                        
-                        # Look for "Relationship:" pattern
-                        if "relationship" in paren_content.lower():
-                            rel_match = None
-                            if "relationship:" in paren_content.lower():
-                                parts = paren_content.split("relationship:")
-                                if len(parts) > 1:
-                                    rel_part = parts[1].split(",")[0].strip()
-                                    extracted_relationship = rel_part
-                            elif "relationship" in paren_content.lower():
-                                # Try other patterns
-                                for word in ["WIFE", "SPOUSE", "SON", "DAUGHTER", "CHILD"]:
-                                    if word in paren_content.upper():
-                                        extracted_relationship = word
-                                        break
-                        
-                        # Look for DOB in parentheses (Date Of Birth: or DOB:)
-                        if "date of birth" in paren_content.lower():
-                            # Extract after "Date Of Birth:" or "Date of Birth:"
-                            dob_parts = paren_content.split("Date Of Birth:")
-                            if len(dob_parts) < 2:
-                                dob_parts = paren_content.split("Date of Birth:")
-                            if len(dob_parts) < 2:
-                                dob_parts = paren_content.split("date of birth:")
-                            if len(dob_parts) >= 2:
-                                dob_part = dob_parts[1].strip()
-                                if "," in dob_part:
-                                    dob_part = dob_part.split(",")[0].strip()
-                                extracted_dob = dob_part
-                        elif "dob:" in paren_content.lower():
-                            dob_parts = paren_content.split("DOB:")
-                            if len(dob_parts) < 2:
-                                dob_parts = paren_content.split("dob:")
-                            if len(dob_parts) >= 2:
-                                dob_part = dob_parts[1].strip()
-                                if "," in dob_part:
-                                    dob_part = dob_part.split(",")[0].strip()
-                                extracted_dob = dob_part
-                    
-                    dep_first, dep_last = split_full_name(dep_name)
-                    if dep_first or dep_last:
-                        # Create dependent record from same row
-                        dependent_record = row_dict.copy()
-                        dependent_record["First Name"] = dep_first or ""
-                        dependent_record["Last Name"] = dep_last or ""
-                        
-                        # Extract relationship - use value from mapped column as-is, no normalization
-                        if extracted_relationship:
-                            dependent_record["Relationship To employee"] = extracted_relationship
-                        elif relationship_value:
-                            dependent_record["Relationship To employee"] = relationship_value
-                        else:
-                            dependent_record["Relationship To employee"] = ""  # Empty if no value, don't invent values
-                        
-                        # Set DOB if extracted (normalize to remove timestamp)
-                        if extracted_dob:
-                            dependent_record["DOB"] = normalize_dob(extracted_dob)
-                        
-                        dependent_record["Dependent (Y/N)"] = "Y"
-                        dependent_record["__original_row_idx__"] = row_idx  # Same row as employee
-                        master.append(dependent_record)
-                        safe_print(f"🔍 Debug: Added dependent from same row {row_idx}: {dep_first} {dep_last} (Relationship: {dependent_record.get('Relationship To employee', 'Unknown')}) (from Dependents column)")
-            
-            elif is_dependent_row:
-                # Add dependent record (will be grouped with employee later)
-                master.append(row_dict.copy())
-                safe_print(f"🔍 Debug: Added dependent row {row_idx} to master: {row_dict.get('First Name', '')} {row_dict.get('Last Name', '')} (Relationship: {row_dict.get('Relationship To employee', '')})")
+def normalize_dobs(values, date_format="infer"):
+    """
+    Column-wise normalize_dob.
+    
+    Works on the distinct cells: real datetime cells are formatted directly, the rest is
+    parsed in one pd.to_datetime call with the column's format (inferred from a sample
+    unless given), Excel serial numbers are converted in one call, and only the remaining
+    outliers go through normalize_dob one by one. Same results as
+    normalize_dob(value, date_format) per value.
+    
+    Returns (object array of YYYY-MM-DD strings, counts of cells per path:
+    empty / datetime / format / serial / fallback).
+    """
+    values = pd.Series(values)
+    if date_format == "infer":
+        date_format = infer_dob_format(values)
+    counts = dict.fromkeys(["empty", "datetime", "format", "serial", "fallback"], 0)
+    
+    if pd.api.types.is_datetime64_any_dtype(values.dtype):
+        is_datetime = values.notna().to_numpy()
+        out = np.full(len(values), "", dtype=object)
+        out[is_datetime] = values[is_datetime].dt.strftime("%Y-%m-%d").to_numpy()
+        counts["datetime"] = int(is_datetime.sum())
+        counts["empty"] = len(values) - counts["datetime"]
+        return out, counts
+    
+    codes, distinct = pd.factorize(values.to_numpy(dtype=object), use_na_sentinel=False)
+    out = np.full(len(distinct), "", dtype=object)
+    path = np.full(len(distinct), "empty", dtype=object)
+    
+    is_datetime = np.fromiter((isinstance(v, (datetime, pd.Timestamp)) and not pd.isna(v) for v in distinct),
+                              dtype=bool, count=len(distinct))
+    out[is_datetime] = [v.strftime("%Y-%m-%d") for v in distinct[is_datetime]]
+    path[is_datetime] = "datetime"
+    
+    text = pd.Series([_dob_date_part(v) for v in distinct], dtype=object)
+    pending = ~is_datetime & (text != "").to_numpy()
+    
+    if date_format is not None and pending.any():
+        parsed = pd.to_datetime(text[pending], format=date_format, errors="coerce")
+        ok = parsed.notna().to_numpy()
+        rows = np.flatnonzero(pending)[ok]
+        out[rows] = parsed[ok].dt.strftime("%Y-%m-%d").to_numpy()
+        path[rows] = "format"
+        pending[rows] = False
+    
+    if pending.any():
+        # Excel serial numbers only when no date format matches (as in normalize_dob)
+        candidates = text[pending]
+        serial = candidates.str.fullmatch(EXCEL_SERIAL_PATTERN).to_numpy(dtype=bool)
+        if serial.any():
+            days = candidates[serial].astype(float).astype(int)
+            in_range = days.between(*EXCEL_SERIAL_RANGE).to_numpy()
+            rows = np.flatnonzero(pending)[serial][in_range]
+            out[rows] = pd.to_datetime(days[in_range], unit="D", origin=EXCEL_EPOCH).dt.strftime("%Y-%m-%d").to_numpy()
+            path[rows] = "serial"
+            pending[rows] = False
+    
+    # Outliers: formats other than the column's, or unparseable text returned as-is
+    rows = np.flatnonzero(pending)
+    out[rows] = [normalize_dob(dob_str, date_format) for dob_str in text.to_numpy()[rows]]
+    path[rows] = "fallback"
+    
+    cells_per_value = np.bincount(codes, minlength=len(distinct))
+    for name in counts:
+        counts[name] = int(cells_per_value[path == name].sum())
+    return out[codes], counts
 
-    # Group employees and dependents based on row proximity and last name
-    safe_print(f"🔄 Grouping employees and dependents...")
-    grouped_master = group_employees_and_dependents(master)
+# Dependents cells: "Jane Smith (Relationship: Spouse, Date Of Birth: 01/02/1990)", several
+# dependents separated by ";", "|", new lines or a comma after a closing parenthesis
+DEPENDENT_SEPARATOR = r"\s*(?:[;|\n]|\)\s*,)\s*"
+# Name, then the details inside the parentheses (closing parenthesis optional)
+DEPENDENT_ENTRY = r"^(?P<name>[^(]*?)\s*(?:\((?P<details>[^)]*)\)?.*)?$"
+# "Relationship: Spouse", "relationship child"
+DESCRIPTOR_RELATIONSHIP = r"(?i)\brelationship\b\s*[:=-]?\s*(?P<relationship>[^,;)]*[^,;)\s])"
+# A bare relationship word between commas: "(Spouse, DOB: 01/02/1990)"
+DESCRIPTOR_KEYWORD = (r"(?i)(?:^|,)\s*(?P<relationship>spouse|wife|husband|child|son|daughter|dependent"
+                      r"|domestic partner)\s*(?:,|$)")
+# "Date Of Birth: 01/02/1990", "DOB 3/4/2010"
+DESCRIPTOR_DOB = r"(?i)\b(?:date\s+of\s+birth|dob)\b\s*[:=-]?\s*(?P<dob>[^,;)]*[^,;)\s])"
+_DEPENDENT_SEPARATOR_RE = re.compile(DEPENDENT_SEPARATOR)
+_DEPENDENT_ENTRY_RE = re.compile(DEPENDENT_ENTRY)
+_DESCRIPTOR_RELATIONSHIP_RE = re.compile(DESCRIPTOR_RELATIONSHIP)
+_DESCRIPTOR_KEYWORD_RE = re.compile(DESCRIPTOR_KEYWORD)
+_DESCRIPTOR_DOB_RE = re.compile(DESCRIPTOR_DOB)
+
+def parse_dependent_descriptor(cell):
+    """
+    Split a Dependents cell such as "Jane Smith (Relationship: Spouse, Date Of Birth: 01/02/1990)".
+    
+    Returns a list of (name, relationship, dob), one per dependent in the cell;
+    relationship and dob are None when not present. Labels are case-insensitive and
+    values are returned as written.
+    """
+    dependents = []
+    for entry in _DEPENDENT_SEPARATOR_RE.split(str(cell).strip()):
+        if not entry:
+            continue
+        parts = _DEPENDENT_ENTRY_RE.match(entry)
+        details = parts["details"] or ""
+        relationship = _DESCRIPTOR_RELATIONSHIP_RE.search(details) or _DESCRIPTOR_KEYWORD_RE.search(details)
+        dob = _DESCRIPTOR_DOB_RE.search(details)
+        dependents.append((parts["name"].strip(),
+                           relationship["relationship"] if relationship else None,
+                           dob["dob"] if dob else None))
+    return dependents
+
+def parse_dependent_descriptors(values):
+    """
+    Column version of parse_dependent_descriptor for a whole Dependents column.
+    
+    Each distinct cell is parsed once with the compiled grammar and the results are
+    spread back over the rows, so a column of repeated descriptors or placeholders costs
+    one regex pass per distinct value.
+    
+    Returns a DataFrame with name, relationship and dob columns (None when not present),
+    one row per dependent, indexed by the position of its cell in values.
+    """
+    codes, cells = pd.factorize(pd.Series(values, dtype=object), use_na_sentinel=False)
+    parsed = [parse_dependent_descriptor(cell) for cell in cells]
+    per_cell = np.fromiter(map(len, parsed), dtype=int, count=len(parsed))[codes]
+    return pd.DataFrame([entry for code in codes.tolist() for entry in parsed[code]],
+                        columns=["name", "relationship", "dob"],
+                        index=np.repeat(np.arange(len(codes)), per_cell), dtype=object)
+
+def _has_term(col, terms):
+    col_lower = str(col).lower()
+    return any(term in col_lower for term in terms)
+
+def plan_sheet_extraction(sh_name, columns, col_map):
+    """
+    Work out once per sheet which columns feed which part of the extraction.
+    
+    Returns a dict:
+        resolver           - ColumnResolver of the sheet
+        columns            - the sheet's columns (duplicates removed)
+        fields             - field -> actual columns mapped on this sheet, in mapping order
+        mapped_fields      - fields mapped on any sheet (unmapped fields are left empty)
+        unmapped           - columns no field is mapped to on this sheet
+        dependents_cols    - unmapped columns that may list a dependent ("Dependents", "Spouse", ...)
+        name_cols          - unmapped columns that may hold a name, name-like headers first,
+                             without zip/phone/ssn/date/... columns
+        relationship_cols  - unmapped Relationship columns
+        birth_cols         - all date-of-birth columns, used for dependent rows
+    """
+    resolver = ColumnResolver(columns)
+    fields = {field: resolver.resolve_refs(refs, sh_name) for field, refs in col_map.items()}
+    mapped = {actual_col for cols in fields.values() for actual_col in cols}
+    sheet_cols = list(dict.fromkeys(actual for actual in map(resolver.resolve, columns) if actual is not None))
+    unmapped = [col for col in sheet_cols if col not in mapped]
+    
+    name_priority = [col for col in unmapped if _has_term(col, NAME_COLUMN_TERMS)]
+    name_cols = name_priority + [col for col in unmapped if col not in set(name_priority)]
+    
+    plan = {
+        "resolver": resolver,
+        "columns": sheet_cols,
+        "fields": fields,
+        "mapped_fields": {field for field, refs in col_map.items() if refs},
+        "unmapped": unmapped,
+        "dependents_cols": [col for col in unmapped if _has_term(col, DEPENDENTS_COLUMN_TERMS)],
+        "name_cols": [col for col in name_cols if not _has_term(col, NON_NAME_COLUMN_TERMS)],
+        "relationship_cols": [col for col in unmapped if _has_term(col, RELATIONSHIP_COLUMN_TERMS)],
+        "birth_cols": [col for col in sheet_cols if _has_term(col, BIRTH_COLUMN_TERMS)],
+    }
+    if log.enabled(DEBUG):
+        log.debug("🗺️ Debug: Extraction plan for '{}': mapped {}, dependents {}, names {}, relationship {}, birth {}",
+                  sh_name, sorted(map(str, mapped)), plan["dependents_cols"], plan["name_cols"],
+                  plan["relationship_cols"], plan["birth_cols"])
+    return plan
+
+def _column_text(series):
+    "Whole column as an object array of stripped text, nulls as \"\" - the column-wise _cell_text(val).strip()"
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        # Convert each category once; code -1 (null) picks the trailing ""
+        labels = np.array([_cell_text(c).strip() for c in series.cat.categories] + [""], dtype=object)
+        return labels[series.cat.codes.to_numpy()]
+    if isinstance(series.dtype, pd.StringDtype):
+        values = [v.strip() for v in series.to_numpy(dtype=object, na_value="")]
+    else:
+        values = [_cell_text(v).strip() for v in series.to_numpy(dtype=object)]
+    return np.array(values, dtype=object)
+
+def _per_value(values, func, dtype=bool):
+    """
+    func applied to each element of an object array, evaluated once per distinct value.
+    
+    Census columns repeat heavily (relationship codes, plan names, "nan" placeholders),
+    so the Python-level work scales with the distinct values, not the rows.
+    """
+    codes, uniques = pd.factorize(values, use_na_sentinel=False)
+    results = np.empty(len(uniques), dtype=dtype)
+    results[:] = [func(v) for v in uniques]
+    return results[codes]
+
+def _lower_in(values, words):
+    "Per element: str(value).lower() in words"
+    words = set(words)
+    return _per_value(values, lambda v: str(v).lower() in words)
+
+def _filled(values):
+    "Truthiness of each element of a str/None object array (None and \"\" are False)"
+    return np.not_equal(values, None) & np.not_equal(values, "")
+
+def _split_names(values):
+    "split_names over an object array -> (first, last) object arrays"
+    first, last = split_names(values)
+    return first.to_numpy(dtype=object), last.to_numpy(dtype=object)
+
+def _drop_null_names(names):
+    "Blank out \"nan\"/\"none\"/\"null\" left over after splitting"
+    names[_filled(names) & _lower_in(names, NAME_NULLS[:3])] = None
+
+def _is_dependent_relationship(value):
+    return any(keyword in str(value).upper().strip() for keyword in DEPENDENT_KEYWORDS)
+
+def _is_job_title(value):
+    rel_upper = str(value).upper().strip()
+    return any(keyword in rel_upper for keyword in JOB_TITLE_KEYWORDS) or len(rel_upper) > 15
+
+def _looks_like_name(value):
+    return value.lower() not in ["nan", ""] and any(c.isalpha() for c in value) and len(value) > 2
+
+def _extract_sheet_records(sh_name, df, col_map, row_offset=0, timer=None):
+    """
+    Classify and extract the employee/dependent records of one sheet, column-wise.
+    
+    Each input column is converted to text once, cell tests run once per distinct value,
+    and the employee/dependent rules are boolean masks over whole columns. The records
+    match the original cell-by-cell loop (tests/baseline_hunter.py) apart from the
+    deliberate changes covered in tests/test_extraction_parity.py.
+    """
+    timer = timer or StageTimer()
+    log.debug("🔍 Debug: Processing sheet '{}' with {} rows, {} columns", sh_name, df.shape[0], df.shape[1])
+    log.debug("🔍 Debug: Columns in '{}': {}", sh_name, list(df.columns))
+    df = df.dropna(how="all")
+    n = len(df)
+    log.debug("🔍 Debug: After dropna, '{}' has {} rows", sh_name, n)
+    if n == 0:
+        return []
+    
+    # ---- Resolve columns once per sheet -----------------------------------
+    with timer.stage("resolve columns"):
+        plan = plan_sheet_extraction(sh_name, df.columns, col_map)
+    field_cols = lambda field: plan["fields"].get(field, [])
+    
+    texts = {}
+    def text(col):
+        if col not in texts:
+            texts[col] = _column_text(df[col])
+        return texts[col]
+    
+    # Cell tests over arrays of values
+    not_null_name = lambda values: ~_lower_in(values, NAME_NULLS)
+    not_nan = lambda values: ~_lower_in(values, ["nan", ""])
+    non_empty = lambda values: values != ""
+    looks_like_name = lambda values: _per_value(values, _looks_like_name)
+    
+    def first_valid(cols, is_valid, rows=None, convert=None):
+        """
+        Per row, the first value among cols that passes is_valid ("" when none does).
+        convert(col, row_positions) transforms the picked values of each column.
+        """
+        out = np.full(n, "", dtype=object)
+        missing = np.ones(n, dtype=bool) if rows is None else rows.copy()
+        for col in cols:
+            idx = np.flatnonzero(missing)
+            if not len(idx):
+                break
+            values = text(col)[idx]
+            ok = is_valid(values)
+            out[idx[ok]] = values[ok] if convert is None else convert(col, idx[ok])
+            missing[idx[ok]] = False
+        return out
+    
+    dob_paths = defaultdict(int)
+    dob_formats = {}
+    def normalized_dobs(col, rows):
+        "normalize_dobs on the raw cells (real datetimes stay native) with the column's inferred format"
+        if col not in dob_formats:
+            dob_formats[col] = infer_dob_format(text(col))
+        normalized, counts = normalize_dobs(df[col].iloc[rows], dob_formats[col])
+        for path, count in counts.items():
+            dob_paths[path] += count
+        return normalized
+    
+    # ---- Classify rows -----------------------------------------------------
+    employee_name = first_valid(field_cols("Employee Name"), not_null_name)
+    first_val = first_valid(field_cols("First Name"), not_null_name)
+    last_val = first_valid(field_cols("Last Name"), not_null_name)
+    relationship = first_valid(field_cols("Relationship To employee"), not_nan)
+    dependents = first_valid(plan["dependents_cols"], non_empty)
+    
+    has_relationship = relationship != ""
+    rel_dependent = has_relationship & _per_value(relationship, _is_dependent_relationship)
+    rel_job_title = has_relationship & _per_value(relationship, _is_job_title)
+    has_names = (first_val != "") | (last_val != "")
+    is_employee = (((employee_name != "") & ~rel_dependent)
+                   | (has_names & rel_job_title & ~rel_dependent))
+    
+    # Rows without a name or employee marker may carry the name in an unmapped column
+    needs_name = ~has_names & ~is_employee
+    name_unmapped = np.full(n, "", dtype=object)
+    if needs_name.any():
+        name_unmapped = first_valid(plan["name_cols"], looks_like_name, rows=needs_name)
+    has_names_any = has_names | (name_unmapped != "")
+    
+    # An unmapped Relationship column is only used when the field is mapped nowhere
+    relationship_is_mapped = "Relationship To employee" in plan["mapped_fields"]
+    relationship_unmapped = np.full(n, "", dtype=object)
+    if not relationship_is_mapped:
+        relationship_unmapped = first_valid(plan["relationship_cols"], non_empty)
+        relationship = relationship_unmapped
+    
+    is_dependent = rel_dependent | (~is_employee & ~rel_job_title & (
+        (dependents != "") | has_relationship | (relationship_unmapped != "") | has_names_any))
+    
+    log.debug("🔍 Debug: '{}' - {} employee rows, {} dependent rows, {} skipped", sh_name,
+              int(is_employee.sum()), int(is_dependent.sum()), int((~is_employee & ~is_dependent).sum()))
+    
+    # ---- Names -------------------------------------------------------------
+    first = np.full(n, None, dtype=object)
+    last = np.full(n, None, dtype=object)
+    first_words = _per_value(first_val, lambda v: len(v.split()), dtype=int)
+    last_words = _per_value(last_val, lambda v: len(v.split()), dtype=int)
+    separate = (first_val != "") & (last_val != "") & (first_words <= 2) & (last_words == 1)
+    
+    def assign_split(rows, values):
+        if rows.any():
+            first[rows], last[rows] = _split_names(values[rows])
+    
+    def assign_parts_of(rows, values):
+        "Split values and take each non-null part, keeping the current name otherwise"
+        if not rows.any():
+            return
+        idx = np.flatnonzero(rows)
+        for part, target in zip(_split_names(values[idx]), (first, last)):
+            ok = _filled(part) & ~_lower_in(part, NAME_NULLS[:3])
+            target[idx[ok]] = part[ok]
+    
+    # Employee rows: separate First/Last columns, else the combined Employee Name, else First/Last fallback
+    emp = is_employee
+    first[emp & separate] = first_val[emp & separate]
+    last[emp & separate] = last_val[emp & separate]
+    assign_split(emp & ~separate & (employee_name != ""), employee_name)
+    fallback = emp & ~(_filled(first) & _filled(last))
+    multi = fallback & (first_val != "") & (first_words > 1)
+    if multi.any():
+        idx = np.flatnonzero(multi)
+        split_first, split_last = _split_names(first_val[idx])
+        ok = _filled(split_first) & _filled(split_last)
+        first[idx[ok]] = split_first[ok]
+        last[idx[ok]] = np.where(last_val[idx[ok]] != "", last_val[idx[ok]], split_last[ok])
+        first[idx[~ok]] = first_val[idx[~ok]]
+    single = fallback & (first_val != "") & (first_words <= 1)
+    first[single] = first_val[single]
+    last[fallback & (last_val != "")] = last_val[fallback & (last_val != "")]
+    
+    # Dependent rows: separate First/Last, else Dependents column, else unmapped name, else First/Last fallback
+    dep = is_dependent & ~is_employee
+    first[dep & separate] = first_val[dep & separate]
+    last[dep & separate] = last_val[dep & separate]
+    # Dependents cells of kept rows, parsed in one pass; a dependent row takes the first name in its cell
+    descriptors = parse_dependent_descriptors(dependents[(is_employee | dep) & (dependents != "")])
+    descriptors.index = np.flatnonzero((is_employee | dep) & (dependents != ""))[descriptors.index.to_numpy(dtype=int)]
+    dep_names = np.full(n, "", dtype=object)
+    first_entries = descriptors[~descriptors.index.duplicated()]
+    dep_names[first_entries.index] = first_entries["name"].to_numpy()
+    assign_split(dep & ~separate & ~_lower_in(dependents, NAME_NULLS), dep_names)
+    unmapped_ok = (name_unmapped != "") & ~_lower_in(name_unmapped, NAME_NULLS)
+    assign_split(dep & ~(_filled(first) & _filled(last)) & unmapped_ok, name_unmapped)
+    fallback = dep & ~(_filled(first) & _filled(last))
+    has_separator = lambda values: _per_value(values, lambda v: " " in v or "," in v)
+    first_split = fallback & (first_val != "") & has_separator(first_val)
+    assign_parts_of(first_split, first_val)
+    plain_first = fallback & (first_val != "") & ~first_split
+    first[plain_first] = first_val[plain_first]
+    last_split = fallback & (last_val != "") & has_separator(last_val)
+    assign_parts_of(last_split, last_val)
+    plain_last = fallback & (last_val != "") & ~last_split & ~_filled(last)
+    last[plain_last] = last_val[plain_last]
+    
+    _drop_null_names(first)
+    _drop_null_names(last)
+    keep = (emp | dep) & (_filled(first) | _filled(last))
+    
+    # ---- Other fields ------------------------------------------------------
+    values = {}
+    for field in OTHER_FIELDS:
+        if field not in plan["mapped_fields"]:
+            values[field] = np.full(n, "", dtype=object)  # Field is unmapped - leave empty
+            continue
+        values[field] = first_valid(field_cols(field), not_nan,
+                                    convert=normalized_dobs if field == "DOB" else None)
+    
+    # Dependent rows take their DOB from any Date Of Birth column (mapped or not)
+    birth_cols = plan["birth_cols"]
+    if birth_cols and dep.any():
+        dep_dob = first_valid(birth_cols, not_nan, rows=dep, convert=normalized_dobs)
+        use = dep & (dep_dob != "")
+        values["DOB"][use] = dep_dob[use]
+    if dob_formats:
+        log.info("📅 DOB formats in '{}': {}; values per path: {}", sh_name, dob_formats, dict(dob_paths))
+    
+    # Dependents listed on employee rows become records of their own
+    same_row = descriptors[is_employee[descriptors.index]]
+    same_row_first, same_row_last = _split_names(same_row["name"].to_numpy(dtype=object))
+    raw_dobs = same_row["dob"].to_numpy(dtype=object)
+    same_row_dobs, _ = normalize_dobs(raw_dobs, None)
+    same_row_dependents = defaultdict(list)
+    for row_idx, dep_first, dep_last, extracted_relationship, raw_dob, dob in zip(
+            same_row.index.tolist(), same_row_first, same_row_last, same_row["relationship"], raw_dobs, same_row_dobs):
+        if dep_first or dep_last:
+            same_row_dependents[row_idx].append((dep_first, dep_last, extracted_relationship, dob if raw_dob else None))
+    
+    # ---- Records -----------------------------------------------------------
+    master = []
+    for row_idx in np.flatnonzero(keep).tolist():
+        row_dict = {
+            "First Name": str(first[row_idx]).strip() if first[row_idx] else "",
+            "Last Name": str(last[row_idx]).strip() if last[row_idx] else "",
+            "Relationship To employee": relationship[row_idx],
+            "Dependent (Y/N)": "N" if emp[row_idx] else "Y",
+        }
+        for field in OTHER_FIELDS:
+            row_dict[field] = values[field][row_idx]
+        row_dict["__sheet__"] = sh_name
+        row_dict["__original_row_idx__"] = row_offset + row_idx
+        row_dict["__sheet_name__"] = sh_name
+        master.append(row_dict)
+        
+        # An employee row can also hold dependents in its Dependents column
+        for dep_first, dep_last, extracted_relationship, dob in same_row_dependents.get(row_idx, ()) if emp[row_idx] else ():
+            dependent_record = row_dict.copy()
+            dependent_record["First Name"] = dep_first or ""
+            dependent_record["Last Name"] = dep_last or ""
+            dependent_record["Relationship To employee"] = extracted_relationship or relationship[row_idx] or ""
+            if dob is not None:
+                dependent_record["DOB"] = dob
+            dependent_record["Dependent (Y/N)"] = "Y"
+            master.append(dependent_record)
     
-    # Reorder grouped records to maintain original Excel row order
+    log.debug("🔍 Debug: '{}' - extracted {} records", sh_name, len(master))
+    return master
+
+def _finalize_extracted(master, timer=None):
+    "Group, order and tidy the extracted records into the output DataFrame"
+    timer = timer or StageTimer()
+    # Group employees and dependents based on row proximity and last name
+    log.info("🔄 Grouping employees and dependents...")
+    with timer.stage("group"):
+        grouped_master = group_employees_and_dependents(master)
+    with timer.stage("post-process"):
+        return _tidy_grouped(grouped_master)
+
+def _tidy_grouped(grouped_master):
+    "Order the grouped records as in the workbook and finalize them into the output DataFrame"
     # Sort by original row index to preserve Excel order
     grouped_master_sorted = sorted(grouped_master, key=lambda x: (
         x.get("__sheet_name__", ""),
         x.get("__original_row_idx__", 999999)
     ))
     
-    extracted = pd.DataFrame(grouped_master_sorted)
-    safe_print(f"🔍 Debug: Created DataFrame with {len(grouped_master_sorted)} rows")
-    safe_print(f"🔍 Debug: DataFrame columns: {list(extracted.columns) if len(grouped_master_sorted) > 0 else 'No data'}")
+    # Columns, their order and string dates come from the output schema in one pass
+    extracted = OUTPUT_SCHEMA.finalize(grouped_master_sorted)
+    log.debug("🔍 Debug: Created DataFrame with {} rows", len(grouped_master_sorted))
+    log.debug("🔍 Debug: DataFrame columns: {}", list(extracted.columns))
     if len(grouped_master_sorted) > 0:
-        safe_print(f"🔍 Debug: First row: {grouped_master_sorted[0]}")
-    
-    # Remove internal grouping columns before returning
-    if "__original_row_idx__" in extracted.columns:
-        extracted = extracted.drop(columns=["__original_row_idx__"])
-    if "__sheet_name__" in extracted.columns:
-        extracted = extracted.drop(columns=["__sheet_name__"])
-    
-    # Convert datetime objects to strings to prevent PyArrow serialization errors in Streamlit
-    # Convert datetime64 columns first
-    datetime_cols = extracted.select_dtypes(include=['datetime64']).columns
-    for col in datetime_cols:
-        extracted[col] = extracted[col].apply(lambda x: str(x) if pd.notna(x) else "")
-    
-    # Then check object columns for datetime objects
-    for col in extracted.columns:
-        if extracted[col].dtype == 'object':
-            # Check if column contains datetime objects
-            non_null_values = extracted[col].dropna()
-            if len(non_null_values) > 0:
-                try:
-                    sample_val = non_null_values.iloc[0]
-                    if isinstance(sample_val, pd.Timestamp) or (hasattr(sample_val, '__class__') and 'datetime' in str(type(sample_val)).lower()):
-                        extracted[col] = extracted[col].apply(lambda x: str(x) if pd.notna(x) and x is not None else "")
-                except (IndexError, AttributeError):
-                    pass
-    
-    # Reorder columns: Family Group first, then names, then Gender followed by Relationship/Dependent fields
-    if "Family Group" in extracted.columns:
-        cols = extracted.columns.tolist()
-        # Remove Family Group from its current position
-        cols.remove("Family Group")
-        # Insert Family Group before First Name (or at beginning if First Name doesn't exist)
-        if "First Name" in cols:
-            first_name_idx = cols.index("First Name")
-            cols.insert(first_name_idx, "Family Group")
-        else:
-            cols.insert(0, "Family Group")
+        log.debug("🔍 Debug: First row: {}", grouped_master_sorted[0])
+    return extracted
+
+# Parallel extraction only pays off above these sizes (pool start-up and shipping the sheets to workers)
+PARALLEL_MIN_EXTRACT_SHEETS = 2
+PARALLEL_MIN_EXTRACT_ROWS = 100_000
+MAX_EXTRACT_WORKERS = int(os.getenv("EXTRACT_WORKERS", str(min(os.cpu_count() or 1, 8))))
+
+def _extract_sheet_group(sheets, col_map, timer=None):
+    """
+    Extract the given (sheet_name, df) pairs; runs in-process or in a pool worker.
     
-    # Reorder: Move Relationship To employee, Dependent Of Employee Row, and Dependent (Y/N) next to Gender
-    cols = extracted.columns.tolist()
+    Returns ([(sheet_name, records)], stage seconds of this group).
+    """
+    timer = timer or StageTimer()
+    extracted = []
+    for sh_name, df in sheets:
+        with timer.stage("classify rows"):
+            extracted.append((sh_name, _extract_sheet_records(sh_name, df, col_map, timer=timer)))
+    return extracted, timer.seconds
+
+def use_parallel_extraction(all_sheets, parallel=None):
+    """Decide whether to extract sheets in a process pool: parallel=None picks by total rows."""
+    if parallel is not None:
+        return bool(parallel) and len(all_sheets) > 1 and MAX_EXTRACT_WORKERS > 1
+    return (MAX_EXTRACT_WORKERS > 1
+            and len(all_sheets) >= PARALLEL_MIN_EXTRACT_SHEETS
+            and sum(len(df) for df in all_sheets.values()) >= PARALLEL_MIN_EXTRACT_ROWS)
+
+def extract_sheets(all_sheets, col_map, parallel=None, timer=None):
+    """
+    Extract the records of every sheet, serially or in a process pool.
     
-    # Fields to move next to Gender
-    relationship_fields = ["Relationship To employee", "Dependent Of Employee Row", "Dependent (Y/N)"]
+    Sheets are independent until grouping, so each worker extracts a share of them
+    (largest first, dealt round-robin). The per-sheet record lists are always merged in
+    all_sheets order, whichever path ran, so grouping sees the same input either way.
+    Worker stage times are added to timer, so with a pool they are summed CPU-side seconds.
+    """
+    timer = timer or StageTimer()
+    if use_parallel_extraction(all_sheets, parallel):
+        workers = min(MAX_EXTRACT_WORKERS, len(all_sheets))
+        by_size = sorted(all_sheets.items(), key=lambda item: -len(item[1]))
+        groups = [by_size[i::workers] for i in range(workers)]
+        log.info("⚙️ Extracting {} sheets in {} processes", len(all_sheets), workers)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            extracted = {}
+            for group, seconds in pool.map(_extract_sheet_group, groups, [col_map] * workers):
+                extracted.update(group)
+                timer.merge(seconds)
+    else:
+        group, _ = _extract_sheet_group(all_sheets.items(), col_map, timer)
+        extracted = dict(group)
+    return [record for sh_name in all_sheets for record in extracted[sh_name]]
+
+def extract_data(all_sheets: dict[str, pd.DataFrame] | WorkbookSnapshot, mapping: dict, parallel=None, timer=None):
+    """
+    Extract the census records of all mapped sheets.
     
-    # Find Gender position
-    if "Gender" in cols:
-        gender_idx = cols.index("Gender")
-        
-        # Remove relationship fields from their current positions
-        for field in relationship_fields:
-            if field in cols:
-                cols.remove(field)
-        
-        # Re-find Gender position after removals
-        gender_idx = cols.index("Gender")
-        
-        # Insert relationship fields after Gender
-        insert_pos = gender_idx + 1
-        for field in relationship_fields:
-            if field in extracted.columns:
-                cols.insert(insert_pos, field)
-                insert_pos += 1
+    parallel: True/False forces process-pool extraction on or off; None decides by size.
+    timer: optional StageTimer to collect the stage seconds in (parse only when given a
+    WorkbookSnapshot). They are logged but kept out of the stats, which go to the client.
+    """
+    timer = timer or StageTimer()
+    if isinstance(all_sheets, WorkbookSnapshot):
+        if all_sheets.parse_seconds is not None:
+            timer.add("parse", all_sheets.parse_seconds)
+        all_sheets = all_sheets.sheets
+    log.debug("🔍 Debug: extract_data called with {} sheets", len(all_sheets))
+    log.debug("🔍 Debug: mapping = {}", mapping)
     
-    extracted = extracted[cols]
+    col_map = _flatten_mapping(mapping)
+
+    # assemble master dataframe
+    log.debug("🔍 Debug: Processing {} sheets", len(all_sheets))
+    master = extract_sheets(all_sheets, col_map, parallel, timer)
+
+    extracted = _finalize_extracted(master, timer)
+    with timer.stage("stats"):
+        stats = produce_stats(all_sheets, extracted)
+    log.info("⏱️ Stage timings: {}", {name: round(seconds, 3) for name, seconds in timer.seconds.items()})
+    return extracted, stats
+
+def _kept_row_offsets(batches):
+    """
+    (sheet_name, row_offset, batch) with row_offset counting only the non-blank rows above
+    the batch. A whole sheet is numbered after dropna(how="all"), so a batch's rows start
+    where the kept rows of the batches before it end, not at their position in the sheet.
+    """
+    kept = {}
+    for sh_name, _, batch in batches:
+        offset = kept.get(sh_name, 0)
+        kept[sh_name] = offset + int(batch.notna().any(axis=1).sum())
+        yield sh_name, offset, batch
+
+def extract_data_from_batches(batches, mapping: dict, timer=None):
+    """
+    Streaming variant of extract_data for very large workbooks.
     
-    stats = produce_stats(all_sheets, extracted)
+    Consumes (sheet_name, row_offset, batch_df) tuples from workbook.iter_sheet_batches,
+    so only one bounded-size batch of input rows is held in memory at a time.
+    Reading the batches is timed as the "parse" stage of timer.
+    """
+    timer = timer or StageTimer()
+    col_map = _flatten_mapping(mapping)
+    master = []
+    sheet_shapes = {}  # sheet -> (rows, columns) for the stats table
+    batches = _kept_row_offsets(batches)
+    while True:
+        with timer.stage("parse"):
+            item = next(batches, None)
+        if item is None:
+            break
+        sh_name, row_offset, batch = item
+        with timer.stage("classify rows"):
+            master.extend(_extract_sheet_records(sh_name, batch, col_map, row_offset, timer=timer))
+        rows, _ = sheet_shapes.get(sh_name, (0, 0))
+        sheet_shapes[sh_name] = (rows + len(batch), batch.shape[1])
+
+    extracted = _finalize_extracted(master, timer)
+    with timer.stage("stats"):
+        stats = produce_stats(sheet_shapes, extracted)
+    log.info("⏱️ Stage timings: {}", {name: round(seconds, 3) for name, seconds in timer.seconds.items()})
     return extracted, stats
 
+# A dependent is grouped with an employee on its own row or at most this many rows above it
+FAMILY_ROW_WINDOW = 5
+
+def _is_dependent_record(record):
+    relationship = str(record.get("Relationship To employee", "")).lower().strip()
+    return (
+        relationship in ["spouse", "child", "son", "daughter", "wife", "husband", "dependent"] or
+        any(k in relationship for k in ["spouse", "child", "dependent"])
+    )
+
+def _closest_row_at_or_before(rows, row):
+    """Closest row in the sorted list at or above row and within FAMILY_ROW_WINDOW, else None."""
+    i = bisect_right(rows, row)
+    if i and row - rows[i - 1] <= FAMILY_ROW_WINDOW:
+        return rows[i - 1]
+    return None
+
 def group_employees_and_dependents(master_list):
     """
     Group employees and dependents based on:
-    1. Proximity (same row or succeeding rows) - HIGHEST PRIORITY
-    2. Last name matching - SECONDARY
+    1. Last name matching on the dependent's row or within FAMILY_ROW_WINDOW rows above - HIGHEST PRIORITY
+    2. Proximity (closest employee, same row first, within FAMILY_ROW_WINDOW rows above) - SECONDARY
     Preserves original Excel row order in final output.
     Assigns Family Group numbers to employees and their dependents.
+    
+    Employees are indexed per sheet by sorted row and per (sheet, last name), so each
+    dependent is a couple of bisect lookups instead of a scan over every employee.
+    A dependent parsed from an employee's Dependents cell shares that employee's row, so
+    the employee on its own row (distance 0) is the closest; the original scan only looked
+    at rows strictly above.
+    Families are emitted in one final pass: each employee followed by its dependents,
+    then unmatched dependents as their own families.
     """
-    safe_print(f"🔄 Grouping {len(master_list)} records...")
+    log.info("🔄 Grouping {} records...", len(master_list))
     
     if not master_list:
         return master_list
     
     # Sort records by sheet and original row index to maintain Excel order
-    sorted_records = sorted(enumerate(master_list), key=lambda x: (
-        x[1].get("__sheet_name__", ""),
-        x[1].get("__original_row_idx__", 999999)
+    sorted_records = sorted(master_list, key=lambda rec: (
+        rec.get("__sheet_name__", ""),
+        rec.get("__original_row_idx__", 999999)
     ))
     
-    grouped_records = []
-    used_indices = set()
+    families = []  # [employee_record, dependent_records...] in Family Group order
+    family_by_employee = {}  # (sheet, row_idx) -> family; a later employee on the same row wins
     family_group_counter = 1  # Start family group numbering at 1
     
-    # Process records in order - employees first, then dependents
-    # First pass: Process all employees and assign Family Group numbers
-    employee_family_groups = {}  # Map (sheet, row_idx) -> family_group_number
-    employee_records_map = {}  # Map (sheet, row_idx) -> employee_record
-    
-    for idx, record in sorted_records:
-        relationship = str(record.get("Relationship To employee", "")).lower().strip()
-        is_dependent = (
-            relationship in ["spouse", "child", "son", "daughter", "wife", "husband", "dependent"] or
-            any(k in relationship for k in ["spouse", "child", "dependent"])
-        )
+    # First pass: employees get Family Group numbers in Excel order
+    dependents = []
+    for record in sorted_records:
+        if _is_dependent_record(record):
+            dependents.append(record)
+            continue
+        employee_record = dict(record)
+        employee_record["Family Group"] = family_group_counter
+        family = [employee_record]
+        families.append(family)
+        family_by_employee[(record.get("__sheet_name__", ""), record.get("__original_row_idx__", -1))] = family
+        log.debug("   👤 Added employee: {} {} (Family Group: {}, row {})", record.get('First Name', ''), record.get('Last Name', ''),
+                  family_group_counter, record.get('__original_row_idx__', -1))
+        family_group_counter += 1
+    
+    employee_rows = defaultdict(list)  # sheet -> sorted employee rows
+    employee_rows_by_last_name = defaultdict(list)  # (sheet, last name) -> sorted employee rows
+    for (sheet, row), family in family_by_employee.items():
+        employee_rows[sheet].append(row)
+        employee_rows_by_last_name[(sheet, str(family[0].get("Last Name", "")).lower().strip())].append(row)
+    for rows in (*employee_rows.values(), *employee_rows_by_last_name.values()):
+        rows.sort()
+    
+    # Second pass: link dependents to employees
+    standalone_records = []
+    for record in dependents:
+        record_sheet = record.get("__sheet_name__", "")
+        record_row = record.get("__original_row_idx__", -1)
+        record_last_name = str(record.get("Last Name", "")).lower().strip()
         
-        if not is_dependent:
-            # This is an employee - assign family group number
-            employee_record = dict(record)
-            employee_record["Family Group"] = family_group_counter
-            employee_key = (record.get("__sheet_name__", ""), record.get("__original_row_idx__", -1))
-            employee_family_groups[employee_key] = family_group_counter
-            employee_records_map[employee_key] = employee_record
-            grouped_records.append(employee_record)
-            used_indices.add(idx)
-            emp_name = f"{record.get('First Name', '')} {record.get('Last Name', '')}"
-            safe_print(f"   👤 Added employee: {emp_name} (Family Group: {family_group_counter}, row {record.get('__original_row_idx__', -1)})")
+        employee_row = _closest_row_at_or_before(employee_rows_by_last_name.get((record_sheet, record_last_name), []), record_row)
+        if employee_row is not None:
+            log.debug("   🎯 Matched by LAST NAME: {} (distance: {})", record.get('Last Name', ''), record_row - employee_row)
+        else:
+            employee_row = _closest_row_at_or_before(employee_rows.get(record_sheet, []), record_row)
+            if employee_row is not None:
+                log.debug("   🎯 Matched by PROXIMITY only (different last name, distance: {})", record_row - employee_row)
+        
+        if employee_row is None:
+            # No employee found - assign new family group number (standalone dependent becomes a new family)
+            standalone_record = dict(record)
+            standalone_record["Family Group"] = family_group_counter
             family_group_counter += 1
-    
-    # Second pass: Process dependents and link them to employees
-    for idx, record in sorted_records:
-        if idx in used_indices:
+            standalone_records.append(standalone_record)
+            log.debug("   ⚠️ Unmatched dependent: {} {} (Family Group: {})", record.get('First Name', ''), record.get('Last Name', ''), standalone_record['Family Group'])
             continue
         
-        relationship = str(record.get("Relationship To employee", "")).lower().strip()
+        family = family_by_employee[(record_sheet, employee_row)]
+        employee_record = family[0]
+        dependent_record = dict(record)
+        dependent_record["Family Group"] = employee_record["Family Group"]  # Same number as employee!
+        family.append(dependent_record)
+        if log.enabled(DEBUG):
+            distance = record_row - employee_row
+            row_info = "same row" if distance == 0 else f"{distance} rows after employee"
+            log.debug("   ✅ Grouped dependent {} {} with employee {} {} (Family Group: {}) ({})",
+                      record.get('First Name', ''), record.get('Last Name', ''), employee_record.get('First Name', ''),
+                      employee_record.get('Last Name', ''), employee_record['Family Group'], row_info)
+    
+    grouped_records = [rec for family in families for rec in family] + standalone_records
+    log.info("👨‍👩‍👧‍👦 Grouped {} records into {} family groups", len(grouped_records), family_group_counter - 1)
+    return grouped_records
+
+def iter_family_groups(records):
+    """
+    Streaming group_employees_and_dependents: yields each family (employee record followed
+    by its dependents, or one unmatched dependent) as soon as no later row can join it.
+    
+    records must arrive sheet by sheet, in row order within a sheet, as the extraction
+    produces them. Matching is the same (last name first, then the closest
+    employee, on the dependent's row or within FAMILY_ROW_WINDOW rows above), so a family
+    is complete once a record more than FAMILY_ROW_WINDOW rows below its employee arrives,
+    or its sheet ends. Only the families inside that window are held in memory. The
+    records of one row are taken together, employees first.
+    
+    Families are yielded in the order of their first row and numbered in that order, so
+    the Family Group numbers can differ from group_employees_and_dependents, which numbers
+    every employee before the unmatched dependents and takes sheets by name; the families
+    themselves are the same.
+    """
+    family_group_counter = 1
+    pending = deque()  # (last row that can still join, family) in first-row order; None = complete
+    open_families = {}  # employee row -> family on the current sheet; a later employee on the same row wins
+    current_sheet = None
+    record_count = 0
+    row_key = lambda record: (record.get("__sheet_name__", ""), record.get("__original_row_idx__", -1))
+    for (record_sheet, record_row), row_records in groupby(records, key=row_key):
+        if record_sheet != current_sheet:
+            # Sheet change: every family of the previous sheet is complete
+            while pending:
+                yield pending.popleft()[1]
+            open_families.clear()
+            current_sheet = record_sheet
+        while pending and (pending[0][0] is None or pending[0][0] < record_row):
+            last_row, family = pending.popleft()
+            if last_row is not None and open_families.get(last_row - FAMILY_ROW_WINDOW) is family:
+                del open_families[last_row - FAMILY_ROW_WINDOW]
+            yield family
         
-        # Check if this is a dependent
-        is_dependent = (
-            relationship in ["spouse", "child", "son", "daughter", "wife", "husband", "dependent"] or
-            any(k in relationship for k in ["spouse", "child", "dependent"])
-        )
+        # A row's employees are placed before its dependents, which can join them (distance 0)
+        row_records = list(row_records)
+        record_count += len(row_records)
+        dependents = []
+        for record in row_records:
+            if _is_dependent_record(record):
+                dependents.append(record)
+                continue
+            employee_record = dict(record)
+            employee_record["Family Group"] = family_group_counter
+            family_group_counter += 1
+            family = [employee_record]
+            open_families[record_row] = family
+            pending.append((record_row + FAMILY_ROW_WINDOW, family))
+        if not dependents:
+            continue
         
-        if is_dependent:
-            # This is a dependent - find the employee it belongs to
-            employee_found = False
-            record_sheet = record.get("__sheet_name__", "")
-            record_row = record.get("__original_row_idx__", -1)
+        # Employees on this row or within the window above, closest first
+        candidates = [open_families[row] for row in range(record_row, record_row - FAMILY_ROW_WINDOW - 1, -1)
+                      if row in open_families]
+        for record in dependents:
             record_last_name = str(record.get("Last Name", "")).lower().strip()
-            dependent_family_group = None
-            
-            # Strategy: Find the employee this dependent belongs to
-            # Priority 1: Last Name matching (HIGHEST)
-            # Priority 2: Proximity (same row or succeeding rows) (SECONDARY)
-            best_employee_key = None
-            best_employee_record = None
-            min_distance = 999999
-            
-            # Search through all employees that were processed in first pass
-            candidates_same_lastname = []  # Employees with matching last name
-            candidates_by_proximity = []   # Employees by proximity
-            
-            for emp_key, emp_family_group in employee_family_groups.items():
-                # Get employee record from map
-                emp_record = employee_records_map.get(emp_key)
-                if not emp_record:
-                    continue
-                
-                check_sheet = emp_record.get("__sheet_name__", "")
-                check_row = emp_record.get("__original_row_idx__", -1)
-                
-                # Only consider employees from same sheet, before the dependent row
-                if check_sheet != record_sheet or check_row >= record_row:
-                    continue
-                
-                check_last_name = str(emp_record.get("Last Name", "")).lower().strip()
-                distance = record_row - check_row  # Positive because check_row < record_row
-                
-                # Priority 1: Same last name (HIGHEST PRIORITY)
-                if check_last_name == record_last_name and distance <= 5:
-                    candidates_same_lastname.append((emp_key, emp_record, distance))
-                
-                # Priority 2: Proximity - within 5 rows (SECONDARY PRIORITY)
-                elif distance <= 5:
-                    candidates_by_proximity.append((emp_key, emp_record, distance))
-            
-            # Select best employee: First from same last name, then by proximity
-            if candidates_same_lastname:
-                # Same last name - pick closest (smallest distance)
-                best_employee_key, best_employee_record, min_distance = min(candidates_same_lastname, key=lambda x: x[2])
-                safe_print(f"   🎯 Matched by LAST NAME: {record.get('Last Name', '')} (distance: {min_distance})")
-            elif candidates_by_proximity:
-                # No last name match - pick closest by proximity
-                best_employee_key, best_employee_record, min_distance = min(candidates_by_proximity, key=lambda x: x[2])
-                safe_print(f"   🎯 Matched by PROXIMITY only (different last name, distance: {min_distance})")
-            
-            if best_employee_key is not None and best_employee_record is not None:
-                # Found employee - get the employee's family group number
-                dependent_family_group = employee_family_groups.get(best_employee_key)
-                
-                if dependent_family_group is not None:
-                    # Find where the employee is in grouped_records to insert dependent after it
-                    employee_in_grouped = None
-                    for g_idx, grouped_record in enumerate(grouped_records):
-                        if (grouped_record.get("__sheet_name__") == best_employee_key[0] and 
-                            grouped_record.get("__original_row_idx__") == best_employee_key[1] and
-                            grouped_record.get("Family Group") == dependent_family_group):
-                            employee_in_grouped = g_idx
-                            break
-                    
-                    if employee_in_grouped is not None:
-                        # Insert dependent after employee and any existing dependents from same family
-                        insert_pos = employee_in_grouped + 1
-                        
-                        # Insert after employee and any existing dependents from same family group
-                        while (insert_pos < len(grouped_records) and
-                               grouped_records[insert_pos].get("Family Group") == dependent_family_group):
-                            insert_pos += 1
-                        
-                        # Create dependent record with the same Family Group number as the employee
-                        dependent_record = dict(record)
-                        dependent_record["Family Group"] = dependent_family_group  # Same number as employee!
-                        grouped_records.insert(insert_pos, dependent_record)
-                        used_indices.add(idx)
-                        employee_found = True
-                        emp_name = f"{best_employee_record.get('First Name', '')} {best_employee_record.get('Last Name', '')}"
-                        dep_name = f"{record.get('First Name', '')} {record.get('Last Name', '')}"
-                        row_info = "same row" if min_distance == 0 else f"{min_distance} rows after employee"
-                        safe_print(f"   ✅ Grouped dependent {dep_name} with employee {emp_name} (Family Group: {dependent_family_group}) ({row_info})")
-                    else:
-                        safe_print(f"   ⚠️ Employee found but not in grouped_records: {best_employee_record.get('First Name', '')} {best_employee_record.get('Last Name', '')}")
-                else:
-                    safe_print(f"   ⚠️ Employee found but no Family Group number: {best_employee_record.get('First Name', '')} {best_employee_record.get('Last Name', '')}")
-            
-            if not employee_found:
-                # No employee found - assign new family group number (standalone dependent becomes a new family)
-                standalone_record = dict(record)
-                standalone_record["Family Group"] = family_group_counter
+            family = next((family for family in candidates
+                           if str(family[0].get("Last Name", "")).lower().strip() == record_last_name),
+                          candidates[0] if candidates else None)
+            dependent_record = dict(record)
+            if family is None:
+                # No employee found - standalone dependent becomes a new family
+                dependent_record["Family Group"] = family_group_counter
                 family_group_counter += 1
-                grouped_records.append(standalone_record)
-                used_indices.add(idx)
-                safe_print(f"   ⚠️ Unmatched dependent: {record.get('First Name', '')} {record.get('Last Name', '')} (Family Group: {standalone_record['Family Group']})")
+                pending.append((None, [dependent_record]))
+                continue
+            dependent_record["Family Group"] = family[0]["Family Group"]
+            family.append(dependent_record)
     
-    safe_print(f"👨‍👩‍👧‍👦 Grouped {len(grouped_records)} records into {family_group_counter - 1} family groups")
-    return grouped_records
+    while pending:
+        yield pending.popleft()[1]
+    log.info("👨‍👩‍👧‍👦 Streamed {} records in {} family groups", record_count, family_group_counter - 1)
+
+def iter_families(all_sheets: dict[str, pd.DataFrame] | WorkbookSnapshot, mapping: dict):
+    """
+    Streaming variant of extract_data: yields families as lists of output rows (dicts with
+    the extract_data columns) as soon as each family is complete.
+    
+    Sheets are extracted one at a time, in all_sheets order, and grouped with
+    iter_family_groups, so the first families are available after the first sheet and no
+    DataFrame of the whole roster is built. See iter_family_groups for the Family Group numbering.
+    """
+    if isinstance(all_sheets, WorkbookSnapshot):
+        all_sheets = all_sheets.sheets
+    col_map = _flatten_mapping(mapping)
+    records = (record for sh_name, df in all_sheets.items() for record in _extract_sheet_records(sh_name, df, col_map))
+    for family in iter_family_groups(records):
+        yield OUTPUT_SCHEMA.records(family)
+
+def iter_families_from_batches(batches, mapping: dict):
+    """
+    iter_families over (sheet_name, row_offset, batch_df) tuples from workbook.iter_sheet_batches:
+    memory stays bounded by one input batch plus the families still inside the row window.
+    """
+    col_map = _flatten_mapping(mapping)
+    records = (record for sh_name, row_offset, batch in _kept_row_offsets(batches)
+               for record in _extract_sheet_records(sh_name, batch, col_map, row_offset))
+    for family in iter_family_groups(records):
+        yield OUTPUT_SCHEMA.records(family)
+
+def write_families_csv(families, out):
+    """
+    Write streamed families to a CSV file (path or text buffer) as they arrive.
+    
+    Returns a dict: records, families.
+    """
+    counts = {"records": 0, "families": 0}
+    with ExitStack() as stack:
+        if isinstance(out, (str, os.PathLike)):
+            out = stack.enter_context(open(out, "w", newline="", encoding="utf-8"))
+        writer = None
+        for family in families:
+            if writer is None:
+                writer = csv.DictWriter(out, fieldnames=list(family[0]))
+                writer.writeheader()
+            writer.writerows(family)
+            counts["records"] += len(family)
+            counts["families"] += 1
+    return counts
+
+def write_families_excel(families, out, sheet_name="Extracted"):
+    """
+    Write streamed families to an .xlsx file (path or binary buffer) with openpyxl's
+    write-only mode, which keeps only the current row in memory.
+    
+    Returns a dict: records, families.
+    """
+    from openpyxl import Workbook
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet(sheet_name)
+    counts = {"records": 0, "families": 0}
+    columns = None
+    for family in families:
+        if columns is None:
+            columns = list(family[0])
+            worksheet.append(columns)
+        for record in family:
+            worksheet.append([record.get(column) for column in columns])
+        counts["records"] += len(family)
+        counts["families"] += 1
+    workbook.save(out)
+    return counts
 
 def produce_stats(all_sheets, extracted):
     """Produce statistics in markdown table format."""
@@ -935,7 +1133,8 @@ def produce_stats(all_sheets, extracted):
     out.write("| Sheet Name | Rows | Columns |\n")
     out.write("|------------|------|---------|\n")
     for name, df in all_sheets.items():
-        out.write(f"| {name} | {df.shape[0]} | {df.shape[1]} |\n")
+        # Streamed extraction passes (rows, columns) tuples instead of DataFrames
+        rows, cols = df.shape if hasattr(df, "shape") else df
+        out.write(f"| {name} | {rows} | {cols} |\n")
     
     return out.getvalue()
-
@@ -0,0 +1,227 @@
+"""
+LLM Response Cache
+==================
+Content-addressed cache of Groq chat responses (mapper.build_mapping, and
+llm_extractor.get_full_llm_output when LLM_CACHE_EXTRACTION=1).
+
+Re-uploading the same workbook sends the same prompts again. A response is stored under
+the SHA-256 of its request (model, messages, temperature, max_tokens), so the same
+request is answered instantly and without spending rate limit.
+
+Only temperature-0 requests are cached by default: build_mapping runs at 0.0, where a
+stored reply is what the model would return anyway. A reply sampled at a higher
+temperature is one draw of many, and replaying it is a choice the caller makes
+(cached_chat(cache_sampled=True), LLM_CACHE_EXTRACTION).
+
+Prompts and replies hold census rows (names, dates of birth), so by default the cache
+lives in memory and ends with the process. Set LLM_CACHE_PATH to keep it in a SQLite
+file shared by the Streamlit sessions of this machine; the file is made readable by its
+owner only (0600). The cache is opened on first use (get_response_cache), not at
+import:
+- TTL: entries older than LLM_CACHE_TTL_DAYS (default 30) are misses and are deleted
+- LRU: when the stored responses exceed LLM_CACHE_MAX_MB (default 200), the least
+  recently used entries are evicted
+- counters: hits, misses, stores, evictions, expired, bytes_saved and tokens_saved
+  (the usage the cached replies originally cost), see stats()
+
+LLM_CACHE=0 turns the cache off. Empty replies, and replies the caller's validate()
+rejects (no JSON in them), are never stored.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE", "1") != "0"
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", ":memory:")
+LLM_CACHE_TTL_DAYS = float(os.getenv("LLM_CACHE_TTL_DAYS", "30"))
+LLM_CACHE_MAX_MB = float(os.getenv("LLM_CACHE_MAX_MB", "200"))
+
+COUNTERS = ("hits", "misses", "stores", "evictions", "expired", "bytes_saved", "tokens_saved")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    model TEXT,
+    content TEXT NOT NULL,
+    usage TEXT,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed);
+"""
+
+
+def cache_key(model, messages, temperature=None, max_tokens=None):
+    """SHA-256 of a chat request; any change to the model, messages or sampling settings is a new key."""
+    request = {"model": model, "messages": messages, "temperature": temperature, "max_tokens": max_tokens}
+    data = json.dumps(request, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+def usage_dict(response):
+    """{"prompt_tokens", "completion_tokens"} of a Groq response, or None when it reports no usage."""
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return None
+    return {"prompt_tokens": getattr(usage, "prompt_tokens", 0) or 0,
+            "completion_tokens": getattr(usage, "completion_tokens", 0) or 0}
+
+
+class ResponseCache:
+    """
+    SQLite-backed response store with TTL and size-bounded LRU eviction.
+
+    path=":memory:" keeps the cache in this process only; a file is created with mode
+    0600. ttl_seconds and max_bytes of None mean no expiry and no size bound.
+    """
+
+    def __init__(self, path=LLM_CACHE_PATH, ttl_seconds=LLM_CACHE_TTL_DAYS * 86400,
+                 max_bytes=int(LLM_CACHE_MAX_MB * 1024 * 1024), clock=time.time):
+        self.path, self.ttl_seconds, self.max_bytes, self.clock = path, ttl_seconds, max_bytes, clock
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            # Owner-only before SQLite opens it (its -wal/-shm files copy the mode)
+            fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                os.fchmod(fd, 0o600)
+            finally:
+                os.close(fd)
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        if path != ":memory:":
+            self._db.execute("PRAGMA journal_mode=WAL")  # readers in other sessions never block a write
+        self._db.executescript(_SCHEMA)
+        self.purge_expired()
+
+    def _count(self, name, amount=1):
+        self.counters[name] += amount
+
+    def get(self, key):
+        """{"content", "usage"} stored under key, or None (a miss; an expired entry is deleted)."""
+        with self._lock:
+            row = self._db.execute("SELECT content, usage, created FROM responses WHERE key = ?", (key,)).fetchone()
+            now = self.clock()
+            if row and self.ttl_seconds is not None and now - row[2] > self.ttl_seconds:
+                self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._count("expired")
+                row = None
+            if row is None:
+                self._count("misses")
+                return None
+            self._db.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+            content, usage = row[0], json.loads(row[1]) if row[1] else None
+            self._count("hits")
+            self._count("bytes_saved", len(content.encode("utf-8")))
+            if usage:
+                self._count("tokens_saved", usage.get("prompt_tokens", 0) + usage.get("completion_tokens", 0))
+            return {"content": content, "usage": usage}
+
+    def put(self, key, content, model=None, usage=None):
+        """Store a reply (empty replies are skipped), then evict down to max_bytes."""
+        if not content or not content.strip():
+            return
+        now = self.clock()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, model, content, usage, size, created, accessed) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, model, content, json.dumps(usage) if usage else None, len(content.encode("utf-8")), now, now))
+            self._count("stores")
+            self._evict()
+
+    def _evict(self):
+        """Delete least recently used entries until the stored replies fit max_bytes (lock held)."""
+        if self.max_bytes is None:
+            return
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self._db.execute("SELECT key, size FROM responses ORDER BY accessed").fetchall():
+            self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._count("evictions")
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def purge_expired(self):
+        """Delete every entry past the TTL; returns how many were deleted."""
+        if self.ttl_seconds is None:
+            return 0
+        with self._lock:
+            deleted = self._db.execute("DELETE FROM responses WHERE created < ?",
+                                       (self.clock() - self.ttl_seconds,)).rowcount
+            self._count("expired", deleted)
+            return deleted
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM responses")
+
+    def stats(self):
+        """Counters plus the entries and bytes currently stored."""
+        with self._lock:
+            entries, size = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        return {**self.counters, "entries": entries, "bytes": size}
+
+    def close(self):
+        self._db.close()
+
+
+def cached_chat(client, model, messages, temperature=None, max_tokens=None, cache=None, validate=None,
+                cache_sampled=False):
+    """
+    Chat completion through the cache: {"content", "usage", "cached"}.
+
+    On a miss the request goes to client.chat.completions.create and a non-empty reply
+    is stored, unless validate(content) is falsy (a reply the caller cannot use is
+    asked again next time); usage is what the original request cost (None when not
+    reported). cache defaults to the shared get_response_cache() (None when LLM_CACHE=0:
+    always sent).
+
+    Only temperature 0.0 requests use the cache unless cache_sampled=True.
+    """
+    if temperature != 0 and not cache_sampled:
+        cache = None
+    else:
+        cache = cache or get_response_cache()
+    key = cache_key(model, messages, temperature, max_tokens) if cache else None
+    if cache:
+        hit = cache.get(key)
+        if hit:
+            return {**hit, "cached": True}
+
+    kwargs = {"temperature": temperature} if temperature is not None else {}
+    if max_tokens is not None:
+        kwargs["max_tokens"] = max_tokens
+    response = client.chat.completions.create(model=model, messages=messages, **kwargs)
+    content = response.choices[0].message.content or ""
+    usage = usage_dict(response)
+    if cache and (validate is None or validate(content)):
+        cache.put(key, content, model=model, usage=usage)
+    return {"content": content, "usage": usage, "cached": False}
+
+
+# Shared by every caller in this process, opened by the first get_response_cache()
+_response_cache = None
+_response_cache_opened = False
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache():
+    """The shared ResponseCache at LLM_CACHE_PATH, or None when LLM_CACHE=0 or it cannot be opened."""
+    global _response_cache, _response_cache_opened
+    with _response_cache_lock:
+        if not _response_cache_opened:
+            _response_cache_opened = True
+            if LLM_CACHE_ENABLED:
+                try:
+                    _response_cache = ResponseCache()
+                except (sqlite3.Error, OSError) as e:
+                    print(f"⚠️ LLM response cache unavailable at '{LLM_CACHE_PATH}' ({e}), sending every request")
+        return _response_cache
+
@@ -0,0 +1,187 @@
+"""
+LLM Request Dispatch
+====================
+Concurrent, rate-limited dispatch of chunked LLM requests (llm_extractor.py).
+
+dispatch() sends one request per chunk from a thread pool, keeps at most max_in_flight
+of them open, and yields the results in chunk order as soon as every earlier chunk is
+done. The send function calls limiter.acquire() before every HTTP request it makes
+(continuations included), taking one request and its tokens from a TokenBucketLimiter:
+two buckets refilled continuously from the requests-per-minute and tokens-per-minute
+budgets, so concurrent workers together stay inside the account's Groq limits. Groq
+counts prompt and completion tokens against the per-minute budget, so a request
+reserves its prompt plus the output it may produce, and settle() corrects the bucket
+with the usage the response reports. A 429 response pauses the limiter for every worker
+(Retry-After when the server sends one, else exponential backoff) and the chunk is sent
+again.
+
+Timeouts, 5xx responses and failed connections are sent again with the same backoff,
+without pausing the other workers. The Groq client is built with max_retries=0, so every
+retry goes through here and the limiter sees each failure.
+tests/groq_stub.py imitates the API for the tests and benchmarks/bench_llm_dispatch.py.
+"""
+
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+try:
+    from groq import APIConnectionError  # also raised for timeouts
+except ImportError:
+    APIConnectionError = ConnectionError
+
+from token_budget import get_estimator
+
+# Besides 429 and 5xx, the statuses the Groq SDK would retry on its own
+RETRY_STATUSES = {408, 409}
+
+
+def estimate_tokens(text):
+    """Token count of a prompt for budget accounting (token_budget's shared "text" estimator)."""
+    return get_estimator("text").count(text)
+
+
+class TokenBucketLimiter:
+    """
+    Requests-per-minute and tokens-per-minute buckets shared by all workers.
+
+    acquire() reserves right away and sleeps off any deficit, so callers are served in
+    the order they asked and a request larger than the whole token budget still goes
+    through (after waiting for a full minute of budget). A budget of None is unlimited.
+    """
+
+    def __init__(self, requests_per_minute=None, tokens_per_minute=None, clock=time.monotonic, sleep=time.sleep):
+        self.capacity = (requests_per_minute, tokens_per_minute)
+        self.levels = [requests_per_minute or 0, tokens_per_minute or 0]  # start with a full minute of budget
+        self.clock, self.sleep = clock, sleep
+        self._updated = clock()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+        self.waited = 0.0  # total seconds callers slept, for reporting
+
+    def _refill(self, now):
+        elapsed = now - self._updated
+        self._updated = now
+        for i, capacity in enumerate(self.capacity):
+            if capacity:
+                self.levels[i] = min(capacity, self.levels[i] + elapsed * capacity / 60)
+
+    def reserve(self, tokens=0):
+        """Take one request and tokens from the buckets; returns the seconds to wait before sending."""
+        with self._lock:
+            now = self.clock()
+            self._refill(now)
+            wait_seconds = max(0.0, self._paused_until - now)
+            for i, amount in enumerate((1, tokens)):
+                capacity = self.capacity[i]
+                if capacity:
+                    self.levels[i] -= amount
+                    if self.levels[i] < 0:
+                        wait_seconds = max(wait_seconds, -self.levels[i] * 60 / capacity)
+            self.waited += wait_seconds
+            return wait_seconds
+
+    def acquire(self, tokens=0):
+        """Block until a request of this many tokens fits the budgets."""
+        wait_seconds = self.reserve(tokens)
+        if wait_seconds:
+            self.sleep(wait_seconds)
+
+    def settle(self, reserved, used):
+        """Return the reserved tokens a request did not use (or take the extra it used)."""
+        capacity = self.capacity[1]
+        if not capacity:
+            return
+        with self._lock:
+            self._refill(self.clock())
+            self.levels[1] = min(capacity, self.levels[1] + reserved - used)
+
+    def pause(self, seconds):
+        """Hold back every request not yet reserved for the given seconds (after a 429)."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, self.clock() + seconds)
+
+
+def _retry_after(exc, attempt):
+    """Seconds to back off after a failure: the Retry-After header when present, else 1, 2, 4 ... seconds."""
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return float(2 ** attempt)
+
+
+def is_rate_limited(exc):
+    """True for a 429 from the Groq client (RateLimitError) or anything else carrying status_code 429."""
+    return getattr(exc, "status_code", None) == 429
+
+
+def is_transient(exc):
+    """True for a timeout, conflict or 5xx response, or a connection that failed: worth sending again."""
+    status = getattr(exc, "status_code", None)
+    if status is not None:
+        return status in RETRY_STATUSES or status >= 500
+    return isinstance(exc, (APIConnectionError, ConnectionError, TimeoutError))
+
+
+def send_with_retries(send, chunk, limiter=None, max_retries=5, counters=None):
+    """
+    send(chunk), sent again after each 429 or transient failure up to max_retries times;
+    other errors are raised. A 429 pauses the limiter for every worker; a transient failure
+    only backs off this one.
+    """
+    attempt = 0
+    while True:
+        try:
+            return send(chunk)
+        except Exception as exc:
+            rate_limited = is_rate_limited(exc)
+            if not (rate_limited or is_transient(exc)) or attempt >= max_retries:
+                raise
+            delay = _retry_after(exc, attempt)
+            counter = "rate_limited" if rate_limited else "retried"
+            if counters is not None:
+                counters[counter] = counters.get(counter, 0) + 1
+            if rate_limited and limiter is not None:
+                limiter.pause(delay)  # send's next acquire() waits it out, as do the other workers'
+            else:
+                time.sleep(delay)
+            attempt += 1
+
+
+_END = object()
+
+
+def dispatch(chunks, send, max_in_flight=4, limiter=None, max_retries=5, counters=None):
+    """
+    Yield send(chunk) for every chunk, in chunk order, with up to max_in_flight sends running.
+
+    chunks can be a generator; it is only read as far as the open requests require.
+    A chunk that still fails (or keeps getting 429s) raises from here, and the chunks
+    not yet started are cancelled. counters, when given, collects "rate_limited" and "retried".
+    """
+    chunks = iter(chunks)
+    pool = ThreadPoolExecutor(max_workers=max(1, max_in_flight), thread_name_prefix="llm-dispatch")
+    in_flight = {}  # future -> chunk index
+    results = {}  # finished out of order, waiting for earlier chunks
+    next_index = submitted = 0
+    try:
+        while True:
+            while len(in_flight) < max(1, max_in_flight):
+                chunk = next(chunks, _END)
+                if chunk is _END:
+                    break
+                future = pool.submit(send_with_retries, send, chunk, limiter, max_retries, counters)
+                in_flight[future] = submitted
+                submitted += 1
+            if not in_flight:
+                break
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                results[in_flight.pop(future)] = future.result()
+            while next_index in results:
+                yield results.pop(next_index)
+                next_index += 1
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
@@ -16,9 +16,16 @@ import math
 import time
 import re
 import os
-import tempfile
+import io
 from groq import Groq
 from dotenv import load_dotenv
+from workbook import (WorkbookSnapshot, iter_sheet_batches, sniff_workbook, skipped_summary,
+                      is_delimited, read_delimited, _upload_bytes)
+from output_schema import OutputSchema
+from llm_dispatch import TokenBucketLimiter, dispatch
+from llm_cache import cache_key, get_response_cache, usage_dict
+from token_budget import get_estimator, model_budget, observe_records, plan_chunks
+from table_format import serialize_table, table_text
 
 # Load environment variables
 load_dotenv()
@@ -28,11 +35,34 @@ api_key = os.getenv("GROQ_API_KEY")
 if not api_key:
     raise ValueError("❌ GROQ_API_KEY not found in environment variables. Please set it in .env file.")
 
-client = Groq(api_key=api_key)
+# No SDK retries: llm_dispatch sends failed chunks again, behind the shared limiter
+client = Groq(api_key=api_key, max_retries=0)
 LLM_MODEL = "llama-3.3-70b-versatile"
-MAX_INPUT_CHARS = 40000
+# max_tokens per request (default: the model's largest completion); chunks are sized so their records fit
+LLM_MAX_OUTPUT_TOKENS = int(os.getenv("LLM_MAX_OUTPUT_TOKENS", str(model_budget(LLM_MODEL)["max_output"])))
 MAX_OUTPUT_CHECK = 40000
 
+# Chunk requests in flight at once, and the account's Groq rate limits they share
+LLM_MAX_IN_FLIGHT = int(os.getenv("LLM_MAX_IN_FLIGHT", "4"))
+LLM_REQUESTS_PER_MINUTE = int(os.getenv("LLM_REQUESTS_PER_MINUTE", "30"))
+LLM_TOKENS_PER_MINUTE = int(os.getenv("LLM_TOKENS_PER_MINUTE", "60000"))
+# Share of a minute's tokens (after the prompt) a reply may take when the limit is below
+# prompt + LLM_MAX_OUTPUT_TOKENS (12k/30k tiers); the rest is left for the chunk's rows
+LLM_OUTPUT_SHARE = float(os.getenv("LLM_OUTPUT_SHARE", "0.8"))
+# That max_tokens is rounded down to a multiple of this, so estimator calibration keeps it (and cache keys) stable
+OUTPUT_LIMIT_STEP = 512
+limiter = TokenBucketLimiter(LLM_REQUESTS_PER_MINUTE, LLM_TOKENS_PER_MINUTE)
+
+# How sheets are written into prompts (table_format): compact "pipe" rows by default, "table" for
+# the padded DataFrame.to_string text; LLM_VALUE_CODES=1 replaces repeated long values with codes
+LLM_TABLE_FORMAT = os.getenv("LLM_TABLE_FORMAT", "pipe")
+LLM_VALUE_CODES = os.getenv("LLM_VALUE_CODES", "0") == "1"
+estimator = get_estimator(LLM_TABLE_FORMAT)
+
+# Extraction replies are sampled (temperature 0.2) and hold the census rows; LLM_CACHE_EXTRACTION=1
+# replays the first reply for the same chunk (see llm_cache)
+LLM_CACHE_EXTRACTION = os.getenv("LLM_CACHE_EXTRACTION", "0") == "1"
+
 # Field mapping from nf7.py format to canonical format
 FIELD_MAPPING = {
     "last_name": "Last Name",
@@ -52,6 +82,20 @@ FIELD_MAPPING = {
     "dependent_of_employee_row": "Dependent Of Employee Row"
 }
 
+# Fields the LLM returns for every record (the prompt's field list)
+OUTPUT_FIELDS = list(FIELD_MAPPING)
+
+# Canonical fields every converted record carries, empty when the LLM did not return them
+CANONICAL_FIELDS = [
+    "First Name", "Last Name", "Employee Name", "DOB", "Gender",
+    "Relationship To employee", "Dependent (Y/N)", "Medical Coverage",
+    "Medical Plan Name", "Dental Coverage", "Dental Plan Name",
+    "Vision Coverage", "Vision Plan Name", "COBRA Participation (Y/N)"
+]
+
+# Output columns of converted records: FIELD_MAPPING fields, Dependent (Y/N), then the other canonical fields
+OUTPUT_SCHEMA = OutputSchema(list(dict.fromkeys([*FIELD_MAPPING.values(), "Dependent (Y/N)", *CANONICAL_FIELDS])))
+
 
 def clean_json_output(output_text):
     """Extract and fix valid JSON content from messy LLM output."""
@@ -91,96 +135,321 @@ def clean_json_output(output_text):
     return "[]"
 
 
-def get_full_llm_output(prompt, model=LLM_MODEL, log=None):
-    """Send prompt to Groq and request continuation if truncated."""
+def get_full_llm_output(prompt, model=LLM_MODEL, log=None, limiter=None, expected_output_tokens=None):
+    """
+    Send prompt to Groq and request continuation if truncated.
+    
+    limiter: optional TokenBucketLimiter; every request (continuations included) waits
+    for its budget instead of the fixed 1s pause between parts. A request reserves its
+    prompt tokens plus expected_output_tokens (default, and for continuations, the whole
+    max_tokens of output_token_limit), then the limiter is settled with the usage Groq reports.
+
+    With LLM_CACHE_EXTRACTION=1 the assembled output, when it holds JSON records, is kept
+    in the LLM response cache (llm_cache) under the first request, and the same chunk of
+    the same workbook gets that reply again instead of a new sample.
+    Continuation requests are never cached on their own: their prompt is the same for
+    every chunk.
+    """
+    messages = [{"role": "user", "content": prompt}]
+    max_tokens = output_token_limit(model)
+    key = cache_key(model, messages, 0.2, max_tokens)
+    response_cache = get_response_cache() if LLM_CACHE_EXTRACTION else None
+    if response_cache:
+        hit = response_cache.get(key)
+        if hit:
+            if log:
+                log("💾 Answered from the LLM response cache")
+            return hit["content"]
+
     full_output = ""
     part = 1
+    spent = {"prompt_tokens": 0, "completion_tokens": 0}
 
     while True:
         if log:
             log(f"🧠 Sending LLM request part {part}...")
+        reserved = estimator.count(prompt) + min(expected_output_tokens or max_tokens, max_tokens)
+        if limiter:
+            limiter.acquire(reserved)
 
-        response = client.chat.completions.create(
-            model=model,
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=16384,
-            temperature=0.2
-        )
+        try:
+            response = client.chat.completions.create(
+                model=model,
+                messages=[{"role": "user", "content": prompt}],
+                max_tokens=max_tokens,
+                temperature=0.2
+            )
+        except Exception:
+            if limiter:
+                limiter.settle(reserved, 0)  # a rejected request (429) spent no tokens
+            raise
 
         output = response.choices[0].message.content.strip()
+        usage = usage_dict(response)
+        if limiter and usage is not None:
+            limiter.settle(reserved, usage["prompt_tokens"] + usage["completion_tokens"])
+        if usage is not None:
+            # Calibrate chunk sizing on the real prompt tokens of the table
+            estimator.observe(prompt, usage["prompt_tokens"])
+            spent = {name: spent[name] + usage[name] for name in spent}
         full_output += output
 
         if len(output) >= MAX_OUTPUT_CHECK and not output.strip().endswith(("]", "}")):
             if log:
                 log(f"⏩ Output truncated. Requesting continuation (part {part+1})...")
             prompt = "Continue from where you left off. Do not repeat earlier content."
+            expected_output_tokens = None
             part += 1
-            time.sleep(1)
+            if not limiter:
+                time.sleep(1)
             continue
         break
 
+    cleaned = clean_json_output(full_output)
+    if cleaned != "[]":
+        # Calibrate the records per chunk on the real output tokens per record
+        records = json.loads(cleaned)
+        observe_records(OUTPUT_FIELDS, len(records) if isinstance(records, list) else 1, spent["completion_tokens"])
+    if response_cache and cleaned != "[]":
+        response_cache.put(key, full_output, model=model, usage=spent)
     return full_output
 
 
-def read_all_sheets(file_path_or_object, log=None):
+def _is_relevant_sheet(sheet_name, columns, log=None):
+    """Skip company/enrollment info sheets and sheets without employee-related columns."""
+    # Skip irrelevant sheets early
+    if sheet_name.lower() in ["company info", "enrollment info"]:
+        if log:
+            log(f"⚠️ Skipping irrelevant sheet '{sheet_name}'")
+        return False
+
+    # Skip if no employee-related content
+    combined_cols = " ".join(str(c) for c in columns)
+    return any(k in combined_cols.lower() for k in ["name", "dob", "employee", "dependent", "zip"])
+
+
+def _included_sheets(sheets, log=None):
+    """(sheet name, DataFrame) of the parsed sheets that are sent to the LLM."""
+    if log:
+        log(f"📘 Loaded workbook with {len(sheets)} sheets")
+
+    for sheet_name, df in sheets.items():
+        if sheet_name.lower() not in ["company info", "enrollment info"] and df.empty:
+            continue
+        if not _is_relevant_sheet(sheet_name, df.columns, log=log):
+            continue
+
+        if log:
+            log(f"📄 Including sheet '{sheet_name}' ({len(df)} rows)")
+        yield sheet_name, df
+
+
+def _combine_sheets(sheets, log=None):
+    """Combine already parsed sheets (name -> DataFrame) into one text block for the LLM."""
+    combined_text = ""
+    for sheet_name, df in _included_sheets(sheets, log=log):
+        combined_text += f"\n\n### SHEET: {sheet_name}\n"
+        combined_text += table_text(df, LLM_TABLE_FORMAT, LLM_VALUE_CODES)
+
+    if not combined_text.strip():
+        raise ValueError("❌ No valid employee-related data found in any sheet.")
+
+    return combined_text
+
+
+# Relationship values of dependent rows (a dependent row stays in the chunk of the employee above it)
+DEPENDENT_RELATIONSHIPS = ["spouse", "child", "son", "daughter", "wife", "husband", "dependent", "partner"]
+DEPENDENT_RELATIONSHIP_CODES = ["sp", "ch", "dp"]
+
+
+def _continues_family(df):
     """
-    Read all Excel sheets into a single combined text representation.
+    Per row, True when it belongs to the family of the row above it: its relationship
+    column names a dependent or, without one, its Employee column is blank.
+    Sheets with neither column have no families; every row stands alone.
+    """
+    columns = [str(c).lower() for c in df.columns]
+    rel_idx = next((i for i, c in enumerate(columns) if "relation" in c), None)
+    if rel_idx is not None:
+        rel = df.iloc[:, rel_idx].astype(str).str.lower().str.strip()
+        return (rel.str.contains("|".join(DEPENDENT_RELATIONSHIPS)) | rel.isin(DEPENDENT_RELATIONSHIP_CODES)).tolist()
+    emp_idx = next((i for i, c in enumerate(columns) if "employee" in c), None)
+    if emp_idx is not None:
+        emp = df.iloc[:, emp_idx]
+        return (emp.isna() | (emp.astype(str).str.strip() == "")).tolist()
+    return [False] * len(df)
+
+
+def iter_family_units(sections):
+    """
+    Rendered rows of (sheet_name, DataFrame) sections grouped into families.
+
+    Yields (sheet_name, header_line, rows): an employee row with the dependent rows
+    that follow it, or a single row. Consecutive sections of the same sheet (streamed
+    batches) continue each other, so a family can span two batches.
+    """
+    unit = None
+    for sheet_name, df in sections:
+        header, lines = serialize_table(df, LLM_TABLE_FORMAT, LLM_VALUE_CODES)
+        for row, continues in zip(lines, _continues_family(df)):
+            if unit and continues and unit[0] == sheet_name:
+                unit[2].append(row)
+                continue
+            if unit:
+                yield unit
+            unit = (sheet_name, header, [row])
+    if unit:
+        yield unit
+
+
+def pack_chunks(units, max_size, size=len, max_rows=None):
+    """
+    Pack family units into LLM text chunks.
+
+    A chunk holds at most max_size, measured with size (characters by default, or an
+    estimator's count for tokens), and at most max_rows rows, so the records it produces
+    fit the output budget. Every chunk starts with the sheet marker and header (repeated
+    when a chunk continues a sheet, moves on to the next one, or a streamed batch brings
+    a different header or value codes), and a family never straddles two chunks unless
+    it alone exceeds a chunk; then it is cut between rows.
+    """
+    max_rows = max_rows or math.inf
+    chunk, chunk_size, chunk_rows, chunk_section = [], 0, 0, None
+    for sheet_name, header, rows in units:
+        section = f"\n\n### SHEET: {sheet_name}\n{header}\n"
+        section_size = size(section)
+        text = "".join(row + "\n" for row in rows)
+        text_size = size(text)
+        if section_size + text_size > max_size or len(rows) > max_rows:
+            # One family larger than a chunk - cut it between rows
+            pieces = [(row + "\n", size(row + "\n"), 1) for row in rows]
+        else:
+            pieces = [(text, text_size, len(rows))]
+
+        for piece, piece_size, piece_rows in pieces:
+            needs_section = not chunk or chunk_section != section
+            extra = piece_size + (section_size if needs_section else 0)
+            if chunk and (chunk_size + extra > max_size or chunk_rows + piece_rows > max_rows):
+                yield "".join(chunk)
+                chunk, chunk_size, chunk_rows = [], 0, 0
+            if not chunk or chunk_section != section:
+                chunk.append(section)
+                chunk_size += section_size
+                chunk_section = section
+            chunk.append(piece)
+            chunk_size += piece_size
+            chunk_rows += piece_rows
+
+    if chunk:
+        yield "".join(chunk)
+
+
+def output_token_limit(model=LLM_MODEL):
+    """
+    max_tokens of an extraction request: LLM_MAX_OUTPUT_TOKENS (capped at the model's
+    largest completion), or LLM_OUTPUT_SHARE of the tokens-per-minute limit after the
+    prompt when the whole request would not fit one minute otherwise.
+    """
+    room = LLM_TOKENS_PER_MINUTE - estimator.count(_chunk_prompt("", "1/1"))
+    max_tokens = min(LLM_MAX_OUTPUT_TOKENS, model_budget(model)["max_output"])
+    if room - max_tokens < room * (1 - LLM_OUTPUT_SHARE):
+        max_tokens = max(int(room * LLM_OUTPUT_SHARE) // OUTPUT_LIMIT_STEP * OUTPUT_LIMIT_STEP, OUTPUT_LIMIT_STEP)
+    return max_tokens
+
+
+def chunk_budget(model=LLM_MODEL):
+    """
+    Token budgets of one chunk request (token_budget.plan_chunks): input_tokens the data
+    may take after the prompt and max_records rows whose records fit output_token_limit().
+    A request (prompt, data and reply) also has to fit the tokens-per-minute limit on its own.
+    """
+    prompt = _chunk_prompt("", "1/1")
+    max_tokens = output_token_limit(model)
+    per_minute_room = LLM_TOKENS_PER_MINUTE - max_tokens - estimator.count(prompt)
+    return plan_chunks(model, OUTPUT_FIELDS, "", max_tokens, prompt=prompt,
+                       max_input_tokens=max(per_minute_room, 1), estimator=estimator)
+
+
+def iter_text_chunks(batches, budget=None, log=None):
+    """
+    Build LLM text chunks from streamed sheet batches (workbook.iter_sheet_batches).
+
+    Chunks are packed by pack_chunks within the token budget (default chunk_budget()):
+    cut between families, never inside a row, and every chunk starts with the sheet
+    marker and column header line. Only the current chunk and family are held in memory.
+    """
+    budget = budget or chunk_budget()
+
+    def sections():
+        skipped = set()
+        for sheet_name, row_offset, batch in batches:
+            if sheet_name in skipped:
+                continue
+            if row_offset == 0:
+                if not _is_relevant_sheet(sheet_name, batch.columns, log=log):
+                    skipped.add(sheet_name)
+                    continue
+                if log:
+                    log(f"📄 Streaming sheet '{sheet_name}'")
+            yield sheet_name, batch
+
+    yield from pack_chunks(iter_family_units(sections()), budget["input_tokens"], estimator.count, budget["max_records"])
+
+
+def read_sheets(file_path_or_object, log=None):
+    """
+    Parse the sheets of a workbook (or a CSV/TSV export) that can hold census data.
+    
+    Everything is read in memory - uploads are never copied to a temporary file.
     
     Args:
-        file_path_or_object: Either a file path (str) or file-like object (for Streamlit uploads)
+        file_path_or_object: One of
+            - a WorkbookSnapshot or a dict of already parsed sheets (sheet name -> DataFrame)
+            - raw workbook or CSV/TSV bytes, bytearray or memoryview
+            - a file-like object (BytesIO, Streamlit upload)
+            - a file path (str)
         log: Optional logging function
     
     Returns:
-        str: Combined text representation of all sheets
+        dict: sheet name -> DataFrame
     """
-    # Handle file objects (Streamlit uploads)
-    if hasattr(file_path_or_object, 'read'):
-        # Save to temporary file
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.xlsx') as tmp_file:
-            tmp_file.write(file_path_or_object.read())
-            tmp_path = tmp_file.name
-        file_path = tmp_path
-        cleanup_temp = True
+    if isinstance(file_path_or_object, WorkbookSnapshot):
+        # Already parsed by app.py - no need to open the workbook again
+        return file_path_or_object.original_sheets
+    if isinstance(file_path_or_object, dict):
+        return file_path_or_object
+
+    name = file_path_or_object if isinstance(file_path_or_object, str) else getattr(file_path_or_object, 'name', None)
+    if is_delimited(name, None if name else _upload_bytes(file_path_or_object)):
+        # CSV/TSV export - a single sheet, read with the C parser
+        sheet_name, df = read_delimited(_upload_bytes(file_path_or_object), name)
+        return {sheet_name: df}
+
+    if isinstance(file_path_or_object, (bytes, bytearray, memoryview)):
+        source = io.BytesIO(file_path_or_object)
+    elif hasattr(file_path_or_object, 'read'):
+        # Handle file objects (Streamlit uploads) - pandas reads them directly
+        if hasattr(file_path_or_object, 'seek'):
+            file_path_or_object.seek(0)
+        source = file_path_or_object
     else:
-        file_path = file_path_or_object
-        cleanup_temp = False
-    
-    try:
-        xls = pd.ExcelFile(file_path)
-        combined_text = ""
-
-        if log:
-            log(f"📘 Loaded workbook with {len(xls.sheet_names)} sheets")
+        source = file_path_or_object
 
-        for sheet_name in xls.sheet_names:
-            # Skip irrelevant sheets early
-            if sheet_name.lower() in ["company info", "enrollment info"]:
-                if log:
-                    log(f"⚠️ Skipping irrelevant sheet '{sheet_name}'")
-                continue
-
-            df = xls.parse(sheet_name)
-            if df.empty:
-                continue
+    xls = pd.ExcelFile(source)
 
-            # Skip if no employee-related content
-            combined_cols = " ".join(df.columns.astype(str))
-            if not any(k in combined_cols.lower() for k in ["name", "dob", "employee", "dependent", "zip"]):
-                continue
-
-            if log:
-                log(f"📄 Including sheet '{sheet_name}' ({len(df)} rows)")
+    # Sniff the first rows of each sheet and only parse the ones that can hold census data
+    reports = sniff_workbook(xls, source)
+    skipped = skipped_summary(reports)
+    if log and skipped["sheets"]:
+        log(f"⏭️ Skipped {skipped['sheets']} sheet(s) without census columns "
+            f"({skipped['rows']:,} rows, {skipped['bytes'] / 1024:,.0f} KB not parsed)")
 
-            combined_text += f"\n\n### SHEET: {sheet_name}\n"
-            combined_text += df.to_string(index=False)
+    return {sheet_name: xls.parse(sheet_name) for sheet_name, report in reports.items() if report["relevant"]}
 
-        if not combined_text.strip():
-            raise ValueError("❌ No valid employee-related data found in any sheet.")
 
-        return combined_text
-    finally:
-        if cleanup_temp and os.path.exists(file_path):
-            os.unlink(file_path)
+def read_all_sheets(file_path_or_object, log=None):
+    """Read all sheets (see read_sheets) into a single combined text representation."""
+    return _combine_sheets(read_sheets(file_path_or_object, log=log), log=log)
 
 
 def convert_to_canonical_format(records):
@@ -218,14 +487,7 @@ def convert_to_canonical_format(records):
             canonical_record["Dependent (Y/N)"] = "Y" if relationship else "N"
         
         # Add missing canonical fields with empty defaults
-        canonical_fields = [
-            "First Name", "Last Name", "Employee Name", "DOB", "Gender",
-            "Relationship To employee", "Dependent (Y/N)", "Medical Coverage",
-            "Medical Plan Name", "Dental Coverage", "Dental Plan Name",
-            "Vision Coverage", "Vision Plan Name", "COBRA Participation (Y/N)"
-        ]
-        
-        for field in canonical_fields:
+        for field in CANONICAL_FIELDS:
             if field not in canonical_record:
                 canonical_record[field] = ""
         
@@ -234,38 +496,16 @@ def convert_to_canonical_format(records):
     return canonical_records
 
 
-def extract_with_full_context(file_path_or_object, log=None):
-    """
-    Extract census data using full LLM context (robust approach).
-    
-    This is the main entry point for full-context extraction.
-    It combines all sheets, chunks if needed, and sends to LLM.
-    
-    Args:
-        file_path_or_object: Either a file path (str) or file-like object
-        log: Optional logging function (for Streamlit integration)
-    
-    Returns:
-        pandas.DataFrame: Extracted data in canonical format
-    """
-    all_results = []
-
-    try:
-        # Step 1: Combine all sheets
-        combined_text = read_all_sheets(file_path_or_object, log=log)
-        total_len = len(combined_text)
-        num_chunks = math.ceil(total_len / MAX_INPUT_CHARS)
-
-        if log:
-            log(f"🧩 Combined all sheets into {num_chunks} chunk(s) (total {total_len:,} chars)")
+# Extra rule when sheets carry value codes (LLM_VALUE_CODES)
+_VALUE_CODES_RULE = """
+                - codes like @1 stand for the value listed for them under "Value codes" above the sheet header; output the value, never the code; a cell written \\@... is literal text starting with @"""
 
-        # Step 2: Process each chunk
-        for i in range(num_chunks):
-            chunk_text = combined_text[i * MAX_INPUT_CHARS : (i + 1) * MAX_INPUT_CHARS]
 
-            prompt = f"""
+def _chunk_prompt(chunk_text, chunk_label):
+    """Extraction prompt for one chunk of the combined workbook text."""
+    return f"""
             You are an expert data extractor.
-            From the following combined census workbook text (chunk {i+1}/{num_chunks}),
+            From the following combined census workbook text (chunk {chunk_label}),
             extract all employee and dependent records in sequence.
             Return only valid JSON list — no explanations, no markdown.
 
@@ -299,13 +539,78 @@ def extract_with_full_context(file_path_or_object, log=None):
                 - if relationship_to_employee not found leave blank
                 - If employee data repeated in another sheet, do not repeat in output, employee row is unique also provide the dependent name in name column not the employee
                 - provide employee name in respective dependent_of_employee_row
-                - in coverage level, do not fill data split from coverage. if coverage level not available provide blank
+                - in coverage level, do not fill data split from coverage. if coverage level not available provide blank{_VALUE_CODES_RULE if LLM_VALUE_CODES else ""}
 
             Table chunk:
             {chunk_text}
             """
 
-            output_text = get_full_llm_output(prompt, log=log)
+
+def extract_with_full_context(file_path_or_object, log=None, streaming=False, batch_size=5000,
+                              max_in_flight=LLM_MAX_IN_FLIGHT):
+    """
+    Extract census data using full LLM context (robust approach).
+    
+    This is the main entry point for full-context extraction.
+    It combines all sheets, chunks if needed, and sends to LLM.
+    
+    Args:
+        file_path_or_object: Anything read_all_sheets accepts (WorkbookSnapshot, parsed
+            sheet dict, bytes/memoryview, file-like object or file path)
+        log: Optional logging function (for Streamlit integration)
+        streaming: Read rows in bounded batches (workbook.iter_sheet_batches) and build
+            chunks as they arrive, so peak memory stays flat for very large workbooks
+        batch_size: Rows per streamed batch
+        max_in_flight: Chunk requests sent concurrently (all share the module's rate limiter,
+            set from LLM_REQUESTS_PER_MINUTE / LLM_TOKENS_PER_MINUTE)
+    
+    Returns:
+        pandas.DataFrame: Extracted data in canonical format
+    """
+    all_results = []
+
+    try:
+        # Step 1: Combine all sheets
+        if streaming and not isinstance(file_path_or_object, dict):
+            if isinstance(file_path_or_object, WorkbookSnapshot):
+                file_path_or_object = file_path_or_object.data
+            batches = iter_sheet_batches(file_path_or_object, batch_size=batch_size)
+            budget = chunk_budget()
+            chunks = iter_text_chunks(batches, budget, log=log)
+            num_chunks = None
+
+            if log:
+                log(f"🧩 Streaming sheets into family-aligned chunks of up to {budget['input_tokens']:,} tokens "
+                    f"and {budget['max_records']:,} rows")
+        else:
+            sheets = read_sheets(file_path_or_object, log=log)
+            # Whole families per chunk, each chunk starting with its sheet's header line
+            budget = chunk_budget()
+            chunks = list(pack_chunks(iter_family_units(_included_sheets(sheets, log=log)),
+                                      budget["input_tokens"], estimator.count, budget["max_records"]))
+            if not chunks:
+                raise ValueError("❌ No valid employee-related data found in any sheet.")
+            total_len = sum(len(chunk) for chunk in chunks)
+            num_chunks = len(chunks)
+
+            if log:
+                log(f"🧩 Combined all sheets into {num_chunks} chunk(s) (total {total_len:,} chars, "
+                    f"up to {budget['max_records']:,} rows per chunk)")
+
+        # Step 2: Process the chunks, up to max_in_flight at a time, results in chunk order
+        def chunk_label(i):
+            return f"{i+1}/{num_chunks}" if num_chunks else f"{i+1}"
+
+        def send(item):
+            i, chunk_text = item
+            # About one record per row line (the sheet marker and header lines are slack)
+            expected = chunk_text.count("\n") * budget["output_tokens_per_record"]
+            return get_full_llm_output(_chunk_prompt(chunk_text, chunk_label(i)), limiter=limiter,
+                                       expected_output_tokens=expected)
+
+        if log:
+            log(f"🚀 Sending chunks with up to {max_in_flight} request(s) in flight")
+        for i, output_text in enumerate(dispatch(enumerate(chunks), send, max_in_flight=max_in_flight, limiter=limiter)):
             cleaned = clean_json_output(output_text)
 
             try:
@@ -320,8 +625,7 @@ def extract_with_full_context(file_path_or_object, log=None):
                 continue
 
             if log:
-                log(f"✅ Finished chunk {i+1}/{num_chunks} ({len(all_results)} records so far)")
-            time.sleep(1)  # Rate limiting
+                log(f"✅ Finished chunk {chunk_label(i)} ({len(all_results)} records so far)")
 
         if log:
             log(f"🎯 Total extracted records: {len(all_results)}")
@@ -331,45 +635,12 @@ def extract_with_full_context(file_path_or_object, log=None):
         
         # Convert to DataFrame
         if canonical_records:
-            df = pd.DataFrame(canonical_records)
-            
-            # Reorder columns: Move Relationship To employee, Dependent Of Employee Row, and Dependent (Y/N) next to Gender
-            cols = df.columns.tolist()
-            
-            # Fields to move next to Gender
-            relationship_fields = ["Relationship To employee", "Dependent Of Employee Row", "Dependent (Y/N)"]
-            
-            # Find Gender position
-            if "Gender" in cols:
-                gender_idx = cols.index("Gender")
-                
-                # Remove relationship fields from their current positions
-                for field in relationship_fields:
-                    if field in cols:
-                        cols.remove(field)
-                
-                # Re-find Gender position after removals
-                gender_idx = cols.index("Gender")
-                
-                # Insert relationship fields after Gender
-                insert_pos = gender_idx + 1
-                for field in relationship_fields:
-                    if field in df.columns:
-                        cols.insert(insert_pos, field)
-                        insert_pos += 1
-                
-                df = df[cols]
-            
+            # Relationship To employee, Dependent Of Employee Row and Dependent (Y/N) follow Gender
+            df = OUTPUT_SCHEMA.finalize(canonical_records)
             return df
         else:
             # Return empty DataFrame with canonical columns
-            canonical_fields = [
-                "First Name", "Last Name", "Employee Name", "DOB", "Gender",
-                "Relationship To employee", "Dependent (Y/N)", "Medical Coverage",
-                "Medical Plan Name", "Dental Coverage", "Dental Plan Name",
-                "Vision Coverage", "Vision Plan Name", "COBRA Participation (Y/N)"
-            ]
-            return pd.DataFrame(columns=canonical_fields)
+            return pd.DataFrame(columns=CANONICAL_FIELDS)
             
     except Exception as e:
         if log:
@@ -2,26 +2,28 @@ import os, json, csv, io, string
 from groq import Groq
 from dotenv import load_dotenv
 from learning_system import learning_system
+from pipeline_log import log
+from llm_cache import cached_chat
 
 # Load environment variables from .env file
 load_dotenv()
 
 api_key = os.getenv("GROQ_API_KEY")
 if api_key:
-    print(f"🔑 API Key loaded from .env file: {api_key[:10]}...")
+    log.info("🔑 API Key loaded from .env file: {}...", api_key[:10])
 else:
-    print("❌ No API key found in .env file!")
+    log.error("❌ No API key found in .env file!")
 
 client = Groq(api_key=api_key)
 
 def _convert_column_letters_to_names(mapping: dict, thin_csv: str) -> dict:
     """Convert column letters (A, B, C) to actual column names and validate content-based mappings"""
-    print("🔄 Starting post-processing...")
+    log.debug("🔄 Starting post-processing...")
     
     # Parse the CSV to get column names and data
     lines = thin_csv.strip().split('\n')
     if not lines:
-        print("❌ No CSV data found")
+        log.warning("❌ No CSV data found")
         return mapping
     
     # Get header row (first line after __sheet__)
@@ -32,12 +34,12 @@ def _convert_column_letters_to_names(mapping: dict, thin_csv: str) -> dict:
             break
     
     if not header_line:
-        print("❌ No header row found")
+        log.warning("❌ No header row found")
         return mapping
     
     # Extract column names (skip the first __sheet__ column)
     column_names = header_line.split(',')[1:]  # Skip __sheet__
-    print(f"🔍 Found columns: {column_names}")
+    log.debug("🔍 Found columns: {}", column_names)
     
     # Create mapping from letter to column name
     letter_to_name = {}
@@ -46,7 +48,7 @@ def _convert_column_letters_to_names(mapping: dict, thin_csv: str) -> dict:
             letter = string.ascii_uppercase[i]
             letter_to_name[letter] = col_name.strip()
     
-    print(f"🔍 Letter mapping: {letter_to_name}")
+    log.debug("🔍 Letter mapping: {}", letter_to_name)
     
     # Get sample data rows for content validation
     data_rows = []
@@ -54,12 +56,12 @@ def _convert_column_letters_to_names(mapping: dict, thin_csv: str) -> dict:
         if line and not line.startswith('__sheet__'):
             data_rows.append(line.split(','))
     
-    print(f"🔍 Sample data rows: {len(data_rows)}")
+    log.debug("🔍 Sample data rows: {}", len(data_rows))
     
     # Convert the mapping and validate content
     converted_mapping = {}
     for field, refs in mapping.items():
-        print(f"🔄 Processing field: {field} with refs: {refs}")
+        log.debug("🔄 Processing field: {} with refs: {}", field, refs)
         converted_refs = []
         for ref in refs:
             if ',' in ref:
@@ -69,27 +71,27 @@ def _convert_column_letters_to_names(mapping: dict, thin_csv: str) -> dict:
                 # If it's a single letter, convert it
                 if len(col_ref) == 1 and col_ref in letter_to_name:
                     converted_ref = f"{sheet_name},{letter_to_name[col_ref]}"
-                    print(f"🔄 Converted '{ref}' to '{converted_ref}'")
+                    log.debug("🔄 Converted '{}' to '{}'", ref, converted_ref)
                     converted_refs.append(converted_ref)
                 else:
-                    print(f"🔄 Keeping '{ref}' as is")
+                    log.debug("🔄 Keeping '{}' as is", ref)
                     converted_refs.append(ref)
             else:
                 converted_refs.append(ref)
         
         # Content-based validation for Relationship To employee
         if field == "Relationship To employee":
-            print(f"🎯 Validating Relationship To employee mapping...")
+            log.debug("🎯 Validating Relationship To employee mapping...")
             corrected_refs = _validate_relationship_mapping(converted_refs, column_names, data_rows)
             if corrected_refs != converted_refs:
-                print(f"🎯 Content-based correction: {converted_refs} → {corrected_refs}")
+                log.debug("🎯 Content-based correction: {} → {}", converted_refs, corrected_refs)
                 converted_refs = corrected_refs
             else:
-                print(f"🎯 No correction needed for Relationship To employee")
+                log.debug("🎯 No correction needed for Relationship To employee")
         
         converted_mapping[field] = converted_refs
     
-    print(f"🔄 Final converted mapping: {converted_mapping}")
+    log.debug("🔄 Final converted mapping: {}", converted_mapping)
     return converted_mapping
 
 def _validate_relationship_mapping(refs: list, column_names: list, data_rows: list) -> list:
@@ -132,7 +134,7 @@ def _validate_relationship_mapping(refs: list, column_names: list, data_rows: li
             # If the mapped column has more job title keywords than relationship keywords, 
             # it might be wrong - but trust LLM if it's close
             if job_title_score > relationship_score * 2:
-                print(f"⚠️ Warning: Mapped column '{mapped_col}' appears to contain job titles, not relationships")
+                log.warning("⚠️ Warning: Mapped column '{}' appears to contain job titles, not relationships", mapped_col)
                 # Don't override - let user correct if needed
         except (ValueError, IndexError):
             # Column not found or index error - keep original mapping
@@ -146,12 +148,9 @@ def build_mapping(thin_csv: str, canonical: list[str], file_name: str = "unknown
     """
     Returns dict  canonical_field -> list["sheet,col_name", …]
     """
-    print("🔗 Connected to Llama 3.3 70B - Versatile")
-    print("📤 Sending first 5 rows of sample data...")
-    print("📊 Data being sent to Groq API:")
-    print("=" * 50)
-    print(thin_csv)
-    print("=" * 50)
+    log.info("🔗 Connected to Llama 3.3 70B - Versatile")
+    log.info("📤 Sending first 5 rows of sample data...")
+    log.debug("📊 Data being sent to Groq API:\n{}\n{}\n{}", "=" * 50, thin_csv, "=" * 50)
     
     # Extract column names from CSV for learning context
     lines = thin_csv.strip().split('\n')
@@ -165,12 +164,9 @@ def build_mapping(thin_csv: str, canonical: list[str], file_name: str = "unknown
     
     # Debug: Print learning context
     if learning_context:
-        print("🧠 Learning context being applied:")
-        print(learning_context)
-        print("=" * 50)
+        log.debug("🧠 Learning context being applied:\n{}\n{}", learning_context, "=" * 50)
     else:
-        print("🧠 No learning context available")
-        print("=" * 50)
+        log.debug("🧠 No learning context available\n{}", "=" * 50)
     
     prompt = f"""You are a census-data schema expert. Analyze the Excel data below and map columns to standard census fields.
 
@@ -229,26 +225,30 @@ def build_mapping(thin_csv: str, canonical: list[str], file_name: str = "unknown
     RESPOND WITH ONLY THIS JSON FORMAT:
     {{"First Name": ["Census,First"], "Last Name": ["Census,Employee  Name"], "DOB": ["Census,DOB"], "Gender": ["Census,Gender"], "Relationship To employee": ["Census,Role"], "Medical Coverage": ["Census,Coverage Level"], "Medical Plan Name": ["Census,Healthcare"]}}"""
     
-    print("🤖 Sending request to Groq API...")
-    reply = client.chat.completions.create(
-        model="llama-3.3-70b-versatile",
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.0, max_tokens=1500
+    log.info("🤖 Sending request to Groq API...")
+    reply = cached_chat(
+        client, "llama-3.3-70b-versatile",
+        [{"role": "user", "content": prompt}],
+        temperature=0.0, max_tokens=1500,
+        validate=lambda content: "{" in content and "}" in content
     )
     
-    print("✅ Received response from Groq API")
-    print("📋 Parsing JSON response...")
+    if reply["cached"]:
+        log.info("💾 Mapping answered from the LLM response cache")
+    else:
+        log.info("✅ Received response from Groq API")
+    log.debug("📋 Parsing JSON response...")
     
-    content = reply.choices[0].message.content
-    print(f"🔍 Raw API response length: {len(content) if content else 0}")
-    print(f"🔍 Raw API response: {repr(content)}")
+    content = reply["content"]
+    log.debug("🔍 Raw API response length: {}", len(content) if content else 0)
+    log.debug("🔍 Raw API response: {!r}", content)
     
     if not content or content.strip() == "":
-        print("⚠️  Warning: Empty response from Groq API")
+        log.warning("⚠️  Warning: Empty response from Groq API")
         return {}
     
     # Extract JSON from response (handle explanatory text)
-    print("🧹 Extracting JSON from response...")
+    log.debug("🧹 Extracting JSON from response...")
     
     # Try to extract JSON from the response
     if '```json' in content:
@@ -257,36 +257,36 @@ def build_mapping(thin_csv: str, canonical: list[str], file_name: str = "unknown
         end = content.find('```', start)
         if end != -1:
             content = content[start:end].strip()
-            print(f"🧹 Extracted from ```json: '{content}'")
+            log.debug("🧹 Extracted from ```json: '{}'", content)
     elif '```' in content:
         # Extract content between ``` and ```
         start = content.find('```') + 3
         end = content.find('```', start)
         if end != -1:
             content = content[start:end].strip()
-            print(f"🧹 Extracted from ```: '{content}'")
+            log.debug("🧹 Extracted from ```: '{}'", content)
     
     # Look for JSON object in the content
     if '{' in content and '}' in content:
         start = content.find('{')
         end = content.rfind('}') + 1
         content = content[start:end]
-        print(f"🧹 Extracted JSON object: '{content}'")
+        log.debug("🧹 Extracted JSON object: '{}'", content)
     
     try:
         result = json.loads(content)
-        print("✅ Successfully parsed JSON response")
-        print(f"📋 Parsed result: {result}")
+        log.info("✅ Successfully parsed JSON response")
+        log.debug("📋 Parsed result: {}", result)
         
         # Post-process to convert column letters to column names and validate content
         result = _convert_column_letters_to_names(result, thin_csv)
-        print(f"🔄 Post-processed result: {result}")
+        log.debug("🔄 Post-processed result: {}", result)
         
         return result
     except json.JSONDecodeError as e:
-        print(f"❌ Warning: Failed to parse JSON from Groq API: {e}")
-        print(f"📄 Raw response: {content}")
-        print(f"📄 Response type: {type(content)}")
+        log.warning("❌ Warning: Failed to parse JSON from Groq API: {}", e)
+        log.warning("📄 Raw response: {}", content)
+        log.debug("📄 Response type: {}", type(content))
         return {}
 
 def store_successful_mapping(original_mapping: dict, corrected_mapping: dict, 
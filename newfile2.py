@@ -17,6 +17,8 @@ import threading
 # =========================================================
 import os
 from dotenv import load_dotenv
+from token_budget import get_estimator, plan_chunks
+from table_format import records_text
 load_dotenv()
 api_key = os.getenv("GROQ_API_KEY")
 if not api_key:
@@ -25,11 +27,18 @@ client = Groq(api_key=api_key)
 MODEL_NAME = "llama-3.3-70b-versatile"
 
 # 🚀 Optimized limits for faster processing
-CHUNK_SIZE = 15           # smaller chunks for faster processing
-MAX_CHARS = 12000         # reduced input limit for speed
+CHUNK_SIZE = None         # rows per chunk; None sizes chunks from the token budgets
+MAX_DATA_TOKENS = 4000    # reduced input limit for speed (Excel JSON per request)
 MAX_TOKENS = 8000         # reduced response limit for speed
-SUBCHUNK_CHARS = 8000     # smaller sub-chunks
-ABSOLUTE_MAX_CHARS = 12000  # reduced hard limit
+SUBCHUNK_TOKENS = 2700    # smaller sub-chunks
+
+# Fields the LLM returns for every record (sizes the output of a chunk)
+OUTPUT_FIELDS = ["last_name", "first_name", "employee_name", "home_zip_code", "dob", "gender",
+                 "medical_coverage", "vision_coverage", "dental_coverage", "cobra_participation",
+                 "relationship_to_employee", "dependent_of_employee_row"]
+
+# Token counts of the Excel rows sent in prompts (compact pipe rows, see table_format)
+data_tokens = get_estimator("pipe")
 
 # =========================================================
 # UTILITY FUNCTIONS
@@ -58,17 +67,18 @@ def excel_to_json_all(file_path):
         result[sheet_name] = df.to_dict(orient="records")
     return result
 
-def truncate_json_data(records, max_chars=MAX_CHARS):
-    """Ensure JSON string stays under token limits."""
-    text = json.dumps(records, indent=2)
-    if len(text) > max_chars:
-        text = text[:max_chars] + "... (truncated)"
+def truncate_json_data(records, max_tokens=MAX_DATA_TOKENS):
+    """Render records as compact pipe rows (header once) that stay under token limits."""
+    text = records_text(records)
+    tokens = data_tokens.count(text)
+    if tokens > max_tokens:
+        text = text[:len(text) * max_tokens // tokens].rsplit("\n", 1)[0] + "\n... (truncated)"
     return text
 
-def split_large_json(records, max_chars=SUBCHUNK_CHARS):
+def split_large_json(records, max_tokens=SUBCHUNK_TOKENS):
     """Split large JSON into smaller chunks."""
     text = json.dumps(records, indent=2)
-    if len(text) <= max_chars:
+    if data_tokens.count(records_text(records)) <= max_tokens or len(records) < 2:
         return [text]
     
     # Split by records
@@ -77,9 +87,9 @@ def split_large_json(records, max_chars=SUBCHUNK_CHARS):
     for i in range(0, len(records), chunk_size):
         chunk = records[i:i + chunk_size]
         chunk_text = json.dumps(chunk, indent=2)
-        if len(chunk_text) > max_chars:
+        if data_tokens.count(records_text(chunk)) > max_tokens:
             # Further split this chunk
-            sub_chunks = split_large_json(chunk, max_chars)
+            sub_chunks = split_large_json(chunk, max_tokens)
             chunks.extend(sub_chunks)
         else:
             chunks.append(chunk_text)
@@ -87,7 +97,7 @@ def split_large_json(records, max_chars=SUBCHUNK_CHARS):
 
 def ask_question_chunk(chunk_data, question, model=MODEL_NAME, attempt=1):
     """Send one chunk of Excel data to Groq safely within limits."""
-    safe_json = truncate_json_data(chunk_data, max_chars=min(MAX_CHARS, ABSOLUTE_MAX_CHARS))
+    safe_json = truncate_json_data(chunk_data, max_tokens=MAX_DATA_TOKENS)
 
     final_input = f"""
     You are a JSON data extraction engine. Always output strictly valid JSON, no explanations.
@@ -111,7 +121,8 @@ def ask_question_chunk(chunk_data, question, model=MODEL_NAME, attempt=1):
         "dependent_of_employee_row"
     ]
 
-    Excel Data (sample): {safe_json}
+    Excel Data (sample, one row per line, columns separated by |, a "\\|" inside a value is a literal |):
+{safe_json}
 
     REMEMBER: Only extract people whose names are actually in the input data. Do not create fake people.
 
@@ -173,20 +184,21 @@ def ask_question_chunk(chunk_data, question, model=MODEL_NAME, attempt=1):
 
 def process_large_input(records, question, model=MODEL_NAME, log_callback=None):
     """Handle very large chunks (e.g. 100K+ chars) by splitting and merging."""
-    text = json.dumps(records, indent=2)
-    if len(text) <= MAX_CHARS:
+    text = records_text(records)
+    tokens = data_tokens.count(text)
+    if tokens <= MAX_DATA_TOKENS:
         result = ask_question_chunk(records, question, model)
         if result == "RATE_LIMIT_EXCEEDED":
             if log_callback:
                 log_callback("🚫 Rate limit exceeded - aborting operations...")
         return result
 
-    msg = f"⚙️ Large input detected ({len(text)} chars). Splitting into sub-chunks..."
+    msg = f"⚙️ Large input detected ({len(text)} chars, ~{tokens} tokens). Splitting into sub-chunks..."
     print(msg)
     if log_callback:
         log_callback(msg)
     
-    split_chunks = split_large_json(records, max_chars=SUBCHUNK_CHARS)
+    split_chunks = split_large_json(records, max_tokens=SUBCHUNK_TOKENS)
     combined = []
 
     for idx, chunk_text in enumerate(split_chunks, 1):
@@ -469,16 +481,19 @@ def process_excel_in_chunks(file_path, question, chunk_size=CHUNK_SIZE, log_call
                 log_callback(msg)
             continue
 
-        msg = f"\n📄 Processing sheet: {sheet_name} ({len(records)} rows)"
+        # Rows per chunk: as many as fit MAX_DATA_TOKENS and whose records fit MAX_TOKENS
+        rows = chunk_size or plan_chunks(MODEL_NAME, OUTPUT_FIELDS, records_text(records), MAX_TOKENS,
+                                         rows=len(records), fmt="pipe", max_input_tokens=MAX_DATA_TOKENS)["rows"]
+        msg = f"\n📄 Processing sheet: {sheet_name} ({len(records)} rows, {rows} per chunk)"
         print(msg)
         if log_callback:
             log_callback(msg)
         
-        num_chunks = math.ceil(len(records) / chunk_size)
+        num_chunks = math.ceil(len(records) / rows)
 
         for i in range(num_chunks):
-            start = i * chunk_size
-            end = start + chunk_size
+            start = i * rows
+            end = start + rows
             chunk = records[start:end]
             msg = f"➡️ Rows {start + 1}-{min(end, len(records))}/{len(records)}"
             print(msg)
@@ -999,7 +1014,7 @@ class GroqCensusExtractorUI:
             
             self.log_status(f"🚀 Starting extraction using model: {model}")
             self.log_status(f"✅ Model '{model}' connected successfully")
-            self.log_status(f"⚙️ Config: CHUNK_SIZE={CHUNK_SIZE}, MAX_CHARS={MAX_CHARS}, MAX_TOKENS={MAX_TOKENS}")
+            self.log_status(f"⚙️ Config: CHUNK_SIZE={CHUNK_SIZE or 'token budget'}, MAX_DATA_TOKENS={MAX_DATA_TOKENS}, MAX_TOKENS={MAX_TOKENS}")
             self.log_status(f"📄 Processing file: {os.path.basename(file_path)}")
             
             # Set up output paths
@@ -20,6 +20,7 @@ from pathlib import Path
 from groq import Groq
 from openpyxl import load_workbook
 from dotenv import load_dotenv
+from token_budget import plan_chunks
 import warnings
 
 warnings.filterwarnings("ignore")
@@ -36,8 +37,9 @@ if not api_key:
 # Configuration
 # ----------------------------
 MODEL_NAME = "llama-3.3-70b-versatile"
-#CHUNK_SIZE = 5000
-CHUNK_SIZE = 8000  # characters per chunk
+MAX_OUTPUT_TOKENS = 4096  # max_tokens per request; chunks are sized so their records fit
+OUTPUT_FIELDS = ["first_name", "last_name", "relationship", "dependent",
+                 "medical_plan", "dental_plan", "vision_plan"]
 OUTPUT_SUFFIX = "_employees.json"
 
 client = Groq(api_key=api_key)
@@ -60,8 +62,9 @@ def read_excel_text(file_path):
     return sheet_texts
 
 
-def chunk_text(text, size=CHUNK_SIZE):
-    """Splits text into smaller pieces."""
+def chunk_text(text, size=None):
+    """Splits text into smaller pieces (by default as many characters as fit the token budgets)."""
+    size = size or plan_chunks(MODEL_NAME, OUTPUT_FIELDS, text, MAX_OUTPUT_TOKENS, fmt="pipe")["chars"]
     return [text[i:i + size] for i in range(0, len(text), size)]
 
 
@@ -138,7 +141,7 @@ Input data:
                 {"role": "user", "content": prompt},
             ],
             temperature=0,
-            max_tokens=4096,
+            max_tokens=MAX_OUTPUT_TOKENS,
         )
 
         response_text = response.choices[0].message.content.strip()
@@ -5,7 +5,7 @@
 Census Extractor (nf5_working_v3_5.py)
 --------------------------------------
 Final full version:
-✅ Adaptive chunking (≤3000 chars)
+✅ Adaptive chunking (sized from the model's token budgets)
 ✅ Recursive sub-splitting & tail continuation
 ✅ Summary sheet in Excel
 ✅ Reliable 100% extraction
@@ -16,6 +16,7 @@ from datetime import datetime
 from pathlib import Path
 from groq import Groq
 from dotenv import load_dotenv
+from token_budget import plan_chunks
 from openpyxl import load_workbook, Workbook
 from openpyxl.styles import Font, PatternFill, Alignment
 from openpyxl.utils import get_column_letter
@@ -32,6 +33,11 @@ if not api_key:
 
 MODEL_NAME = "llama-3.3-70b-versatile"
 MAX_RETRIES = 3
+MAX_OUTPUT_TOKENS = 3072
+OUTPUT_FIELDS = ["last_name","first_name","employee_name","home_zip_code","dob","gender",
+                 "medical_coverage","medical_coverage_level","vision_coverage","vision_coverage_level",
+                 "dental_coverage","dental_coverage_level","cobra_participation",
+                 "relationship_to_employee","dependent_of_employee_row"]
 OUTPUT_SUFFIX = "_employees.json"
 client = Groq(api_key=api_key)
 
@@ -49,10 +55,9 @@ def read_excel_text(file_path):
         sheet_texts.append((sheet_name, text))
     return sheet_texts, total_len
 
-def adaptive_chunk_size(text_length):
-    if text_length < 10000: return 3000
-    elif text_length < 50000: return 2500
-    else: return 2000
+def adaptive_chunk_size(text):
+    """Chunk plan for one sheet: as many rows as fit the input budget and whose records fit MAX_OUTPUT_TOKENS."""
+    return plan_chunks(MODEL_NAME, OUTPUT_FIELDS, text, MAX_OUTPUT_TOKENS, fmt="pipe")
 
 def chunk_text(text, size):
     return [text[i:i + size] for i in range(0, len(text), size)]
@@ -102,7 +107,7 @@ Table:
             model=MODEL_NAME,
             messages=[{"role": "system", "content": "Return strictly valid JSON array only."},
                       {"role": "user", "content": prompt}],
-            temperature=0, max_tokens=3072,
+            temperature=0, max_tokens=MAX_OUTPUT_TOKENS,
         )
         raw = response.choices[0].message.content.strip()
         data = clean_json_output(raw)
@@ -132,7 +137,7 @@ Table:
             model=MODEL_NAME,
             messages=[{"role": "system","content":"Return strictly valid JSON array only."},
                       {"role": "user","content":prompt}],
-            temperature=0, max_tokens=3072,
+            temperature=0, max_tokens=MAX_OUTPUT_TOKENS,
         )
         raw = response.choices[0].message.content.strip()
         return clean_json_output(raw)
@@ -186,20 +191,20 @@ def main():
 
     print(f"📘 Loaded workbook '{file_path}'")
     sheets, total_len = read_excel_text(file_path)
-    chunk_size = adaptive_chunk_size(total_len)
-    print(f"📏 Adaptive chunk size selected: {chunk_size} chars")
+    print(f"📏 Workbook text: {total_len:,} chars")
 
     all_records, failed = [], 0
     for sheet_name, text in sheets:
-        chunks = chunk_text(text, chunk_size)
-        print(f"📄 Sheet '{sheet_name}' → {len(chunks)} chunks")
+        budget = adaptive_chunk_size(text)
+        chunks = chunk_text(text, budget["chars"])
+        print(f"📄 Sheet '{sheet_name}' → {len(chunks)} chunks ({budget['chars']:,} chars / ~{budget['rows']} rows each)")
         for i, chunk in enumerate(chunks, start=1):
             data = extract_from_chunk(chunk, i, len(chunks), sheet_name)
             if not data: failed += 1
             all_records.extend(data)
 
         # Tail continuation if undercounted
-        if len(all_records) < len(chunks)*25:  # heuristic
+        if len(all_records) < len(chunks) * budget["rows"] // 2:  # heuristic: under half the rows per chunk
             tail_records = continue_tail(text)
             all_records.extend(tail_records)
 
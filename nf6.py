@@ -17,14 +17,20 @@ import platform
 # =========================================================
 import os
 from dotenv import load_dotenv
+from token_budget import plan_chunks
 load_dotenv()
 api_key = os.getenv("GROQ_API_KEY")
 if not api_key:
     raise ValueError("❌ GROQ_API_KEY not found in .env file")
 client = Groq(api_key=api_key)
 LLM_MODEL = "llama-3.3-70b-versatile"
-MAX_INPUT_CHARS = 40000  # per prompt
+MAX_OUTPUT_TOKENS = 12288  # max_tokens per request; chunks are sized so their records fit
 MAX_OUTPUT_CHECK = 40000  # if too short, request continuation
+# Fields the LLM returns for every record (sizes the output of a chunk)
+OUTPUT_FIELDS = ["last_name", "first_name", "employee_name", "home_zip_code", "dob", "gender",
+                 "medical_coverage", "medical_coverage_level", "vision_coverage", "vision_coverage_level",
+                 "dental_coverage", "dental_coverage_level", "cobra_participation",
+                 "relationship_to_employee", "dependent_of_employee_row"]
 
 # =========================================================
 # HELPER FUNCTIONS
@@ -123,7 +129,7 @@ def get_full_llm_output(prompt, model=None, log=None):
         response = client.chat.completions.create(
             model=model,
             messages=[{"role": "user", "content": prompt}],
-            max_tokens=12288,
+            max_tokens=MAX_OUTPUT_TOKENS,
             temperature=0.2
         )
 
@@ -168,14 +174,16 @@ def process_excel_in_chunks(file_path, model=None, log=None):
 
             sheet_text = df.to_string(index=False)
             total_len = len(sheet_text)
-            num_chunks = math.ceil(total_len / MAX_INPUT_CHARS)
+            # Chunk size from the model's token budgets: input room and records that fit MAX_OUTPUT_TOKENS
+            chunk_chars = plan_chunks(model, OUTPUT_FIELDS, sheet_text, MAX_OUTPUT_TOKENS)["chars"]
+            num_chunks = math.ceil(total_len / chunk_chars)
             sheet_results = []
 
             if log:
-                log(f"📄 Sheet '{sheet_name}' -> {num_chunks} chunks")
+                log(f"📄 Sheet '{sheet_name}' -> {num_chunks} chunks ({chunk_chars:,} chars each)")
 
             for i in range(num_chunks):
-                chunk_text = sheet_text[i * MAX_INPUT_CHARS : (i + 1) * MAX_INPUT_CHARS]
+                chunk_text = sheet_text[i * chunk_chars : (i + 1) * chunk_chars]
 
                 prompt = f"""
                 You are an expert data extractor.
@@ -459,7 +467,7 @@ class GroqCensusExtractorUI:
             
             self.log_status(f"🚀 Starting extraction using model: {model}")
             self.log_status(f"✅ Model '{model}' connected successfully")
-            self.log_status(f"⚙️ Config: MAX_INPUT_CHARS={MAX_INPUT_CHARS}, MAX_OUTPUT_CHECK={MAX_OUTPUT_CHECK}")
+            self.log_status(f"⚙️ Config: MAX_OUTPUT_TOKENS={MAX_OUTPUT_TOKENS}, MAX_OUTPUT_CHECK={MAX_OUTPUT_CHECK}")
             self.log_status(f"📄 Processing file: {os.path.basename(file_path)}")
             
             # Set up output paths
@@ -7,6 +7,7 @@ import csv
 from groq import Groq
 from tkinter import Tk, filedialog
 import os
+from token_budget import plan_chunks
 from dotenv import load_dotenv
 
 # =========================================================
@@ -18,8 +19,13 @@ if not api_key:
     raise ValueError("❌ GROQ_API_KEY not found in .env file")
 client = Groq(api_key=api_key)
 LLM_MODEL = "llama-3.3-70b-versatile"
-MAX_INPUT_CHARS = 40000
+MAX_OUTPUT_TOKENS = 16384  # max_tokens per request; chunks are sized so their records fit
 MAX_OUTPUT_CHECK = 40000
+# Fields the LLM returns for every record (sizes the output of a chunk)
+OUTPUT_FIELDS = ["last_name", "first_name", "employee_name", "home_zip_code", "dob", "gender",
+                 "medical_coverage", "medical_coverage_level", "vision_coverage", "vision_coverage_level",
+                 "dental_coverage", "dental_coverage_level", "cobra_participation",
+                 "relationship_to_employee", "dependent_of_employee_row"]
 
 
 # =========================================================
@@ -76,7 +82,7 @@ def get_full_llm_output(prompt, model=LLM_MODEL, log=None):
         response = client.chat.completions.create(
             model=model,
             messages=[{"role": "user", "content": prompt}],
-            max_tokens=16384,
+            max_tokens=MAX_OUTPUT_TOKENS,
             temperature=0.2
         )
 
@@ -139,14 +145,18 @@ def process_combined_excel(file_path, log=None):
         # Step 1: Combine all sheets
         combined_text = read_all_sheets(file_path, log=log)
         total_len = len(combined_text)
-        num_chunks = math.ceil(total_len / MAX_INPUT_CHARS)
+        # Chunk size from the model's token budgets: input room and records that fit MAX_OUTPUT_TOKENS
+        budget = plan_chunks(LLM_MODEL, OUTPUT_FIELDS, combined_text, MAX_OUTPUT_TOKENS)
+        chunk_chars = budget["chars"]
+        num_chunks = math.ceil(total_len / chunk_chars)
 
         if log:
-            log(f"🧩 Combined all sheets into {num_chunks} chunks (total {total_len:,} chars)")
+            log(f"🧩 Combined all sheets into {num_chunks} chunks (total {total_len:,} chars, "
+                f"{chunk_chars:,} chars / ~{budget['rows']} rows per chunk)")
 
         # Step 2: Process each chunk
         for i in range(num_chunks):
-            chunk_text = combined_text[i * MAX_INPUT_CHARS : (i + 1) * MAX_INPUT_CHARS]
+            chunk_text = combined_text[i * chunk_chars : (i + 1) * chunk_chars]
 
             prompt = f"""
             You are an expert data extractor.
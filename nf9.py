@@ -7,6 +7,7 @@ import csv
 from groq import Groq
 from tkinter import Tk, filedialog
 import os
+from token_budget import plan_chunks
 
 # =========================================================
 # CONFIGURATION
@@ -17,8 +18,13 @@ if not GROQ_API_KEY:
     raise ValueError("GROQ_API_KEY environment variable is required")
 client = Groq(api_key=GROQ_API_KEY)
 LLM_MODEL = "openai/gpt-oss-120b"
-MAX_INPUT_CHARS = 80000
+MAX_OUTPUT_TOKENS = 16384  # max_tokens per request; chunks are sized so their records fit
 MAX_OUTPUT_CHECK = 80000
+# Fields the LLM returns for every record (sizes the output of a chunk)
+OUTPUT_FIELDS = ["last_name", "first_name", "employee_name", "home_zip_code", "dob", "gender",
+                 "medical_coverage", "medical_coverage_level", "vision_coverage", "vision_coverage_level",
+                 "dental_coverage", "dental_coverage_level", "cobra_participation",
+                 "relationship_to_employee", "dependent_of_employee_row"]
 
 
 # =========================================================
@@ -77,7 +83,7 @@ def get_full_llm_output(prompt, model=LLM_MODEL, log=None):
         response = client.chat.completions.create(
             model=model,
             messages=[{"role": "user", "content": prompt}],
-            max_tokens=16384,
+            max_tokens=MAX_OUTPUT_TOKENS,
             temperature=0.2
         )
 
@@ -140,14 +146,18 @@ def process_combined_excel(file_path, log=None):
         # Step 1: Combine all sheets
         combined_text = read_all_sheets(file_path, log=log)
         total_len = len(combined_text)
-        num_chunks = math.ceil(total_len / MAX_INPUT_CHARS)
+        # Chunk size from the model's token budgets: input room and records that fit MAX_OUTPUT_TOKENS
+        budget = plan_chunks(LLM_MODEL, OUTPUT_FIELDS, combined_text, MAX_OUTPUT_TOKENS)
+        chunk_chars = budget["chars"]
+        num_chunks = math.ceil(total_len / chunk_chars)
 
         if log:
-            log(f"🧩 Combined all sheets into {num_chunks} chunks (total {total_len:,} chars)")
+            log(f"🧩 Combined all sheets into {num_chunks} chunks (total {total_len:,} chars, "
+                f"{chunk_chars:,} chars / ~{budget['rows']} rows per chunk)")
 
         # Step 2: Process each chunk
         for i in range(num_chunks):
-            chunk_text = combined_text[i * MAX_INPUT_CHARS : (i + 1) * MAX_INPUT_CHARS]
+            chunk_text = combined_text[i * chunk_chars : (i + 1) * chunk_chars]
 
             prompt = f"""
             You are an expert table data extractor.
@@ -0,0 +1,72 @@
+"""
+Output Schema
+=============
+Output columns and finalization of extracted census records (hunter.py, llm_extractor.py).
+
+An OutputSchema fixes the output column order once, from the fields every record of an
+extraction carries: grouping bookkeeping columns are dropped, and Relationship To
+employee, Dependent Of Employee Row and Dependent (Y/N) follow Gender. finalize()
+writes each record straight into that order with dates already turned into strings,
+so the DataFrame needs no per-column conversion or reordering passes afterwards.
+"""
+
+import datetime as dt
+import numpy as np
+import pandas as pd
+
+# Shown right after Gender, in this order
+RELATIONSHIP_FIELDS = ["Relationship To employee", "Dependent Of Employee Row", "Dependent (Y/N)"]
+
+# Grouping bookkeeping, never part of the output
+INTERNAL_COLUMNS = ("__original_row_idx__", "__sheet_name__")
+
+
+def order_output_columns(columns):
+    """Column order of the output: the relationship fields are moved right after Gender when present."""
+    cols = [col for col in columns if col not in INTERNAL_COLUMNS]
+    if "Gender" not in cols:
+        return cols
+    moved = [field for field in RELATIONSHIP_FIELDS if field in cols]
+    cols = [col for col in cols if col not in moved]
+    insert_pos = cols.index("Gender") + 1
+    return cols[:insert_pos] + moved + cols[insert_pos:]
+
+
+def output_value(value):
+    """Dates as strings (a missing date as ""), so Streamlit's Arrow conversion never sees datetime objects."""
+    if isinstance(value, dt.datetime):
+        return "" if value is pd.NaT else str(value)
+    if isinstance(value, np.datetime64):
+        return "" if np.isnat(value) else str(pd.Timestamp(value))
+    return value
+
+
+class OutputSchema:
+    """Fixed output columns for records that all carry the given fields."""
+
+    def __init__(self, fields):
+        self.columns = order_output_columns(fields)
+
+    def row(self, record):
+        """Record values in column order; fields the record lacks are None."""
+        return [value if value.__class__ is str else output_value(value)
+                for value in map(record.get, self.columns)]
+
+    def records(self, records):
+        """Output rows as dicts in column order (for streamed output)."""
+        return [dict(zip(self.columns, self.row(record))) for record in records]
+
+    def finalize(self, records):
+        """
+        Output DataFrame of the records, in the given record order.
+        
+        pandas selects and orders the columns while building the frame. Only object and
+        datetime64 columns, which can hold dates, go through output_value; a column
+        pandas typed as strings or numbers costs a dtype check, with no values visited.
+        """
+        df = pd.DataFrame(records, columns=self.columns)
+        for col in self.columns:
+            dtype = df[col].dtype
+            if dtype == object or dtype.kind == "M":
+                df[col] = [value if value.__class__ is str else output_value(value) for value in df[col]]
+        return df
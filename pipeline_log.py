@@ -0,0 +1,103 @@
+"""
+Pipeline Logging
+================
+Leveled logging and stage timers for the extraction pipeline (hunter.py, mapper.py).
+
+Log calls take a str.format template plus its arguments instead of an f-string, so a
+message below the active level is never formatted: a disabled debug line inside a
+per-row loop costs one integer comparison. The level comes from CENSUS_LOG_LEVEL
+(debug, info, warning, error; default info) and can be changed at runtime with
+log.set_level("debug").
+
+StageTimer adds up wall-clock seconds per named stage (parse, resolve columns,
+classify rows, group, post-process, stats). Nested stages are taken out of the
+enclosing stage, so the stages of one run add up to its total time.
+"""
+
+import os
+import time
+from contextlib import contextmanager
+
+DEBUG, INFO, WARNING, ERROR = 10, 20, 30, 40
+LEVELS = {"debug": DEBUG, "info": INFO, "warning": WARNING, "error": ERROR}
+
+
+class PipelineLogger:
+    """print()-based logger with levels; templates are formatted only when the level is enabled."""
+
+    def __init__(self, level=None):
+        self.set_level(level or os.getenv("CENSUS_LOG_LEVEL", "info"))
+
+    def set_level(self, level):
+        self.level = LEVELS[level.strip().lower()] if isinstance(level, str) else int(level)
+
+    def enabled(self, level):
+        """True when messages of this level are printed (guard for expensive arguments)."""
+        return level >= self.level
+
+    def log(self, level, template, *args):
+        if level < self.level:
+            return
+        try:
+            print(template.format(*args))
+        except (BrokenPipeError, OSError):
+            # Streamlit redirects stdout, pipe can close - ignore the error
+            pass
+
+    def debug(self, template, *args):
+        if DEBUG >= self.level:
+            self.log(DEBUG, template, *args)
+
+    def info(self, template, *args):
+        if INFO >= self.level:
+            self.log(INFO, template, *args)
+
+    def warning(self, template, *args):
+        if WARNING >= self.level:
+            self.log(WARNING, template, *args)
+
+    def error(self, template, *args):
+        if ERROR >= self.level:
+            self.log(ERROR, template, *args)
+
+
+class StageTimer:
+    """Wall-clock seconds per named stage, in the order the stages first ran."""
+
+    def __init__(self):
+        self.seconds = {}
+        self._nested = []  # seconds spent in nested stages, per open stage
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        self._nested.append(0.0)
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.add(name, elapsed - self._nested.pop())
+            if self._nested:
+                self._nested[-1] += elapsed
+
+    def add(self, name, seconds):
+        self.seconds[name] = self.seconds.get(name, 0.0) + seconds
+
+    def merge(self, seconds):
+        """Add the stage seconds of another run (e.g. a pool worker)."""
+        for name, value in seconds.items():
+            self.add(name, value)
+
+    @property
+    def total(self):
+        return sum(self.seconds.values())
+
+    def to_markdown(self):
+        out = ["### Stage Timings", "", "| Stage | Seconds |", "|-------|---------|"]
+        out += [f"| {name} | {value:.3f} |" for name, value in self.seconds.items()]
+        out.append(f"| **Total** | {self.total:.3f} |")
+        return "\n".join(out) + "\n"
+
+
+# Shared logger for the pipeline modules
+log = PipelineLogger()
@@ -0,0 +1,218 @@
+"""
+Table Formats
+=============
+Compact serialization of census sheets for LLM prompts (llm_extractor.py, newfile2.py).
+
+DataFrame.to_string pads every cell to its column width, and json.dumps(records,
+indent=2) repeats every column name on every row; on a census sheet most of those
+prompt tokens are formatting. The compact formats send the same cells with less:
+- "pipe": one line per row, cells joined by " | ", the header line once
+- "csv": comma-separated with csv quoting, the header line once
+Both drop columns that are empty on every row and render missing values (NaN, None,
+NaT) as nothing, dates without a midnight time and whole floats without ".0" (ZIP
+codes read as numbers).
+
+With dictionary=True, long values repeated down a column (plan names, coverage
+descriptions) are replaced by short codes (@1, @2 ...) listed once above the header,
+when the codes save more than their legend costs.
+
+Cell text is escaped, never rewritten, so every cell reads back as it was:
+- pipe: a backslash is written "\\\\" and a "|" in a value "\\|"
+- with codes, a value that itself starts with "@" is written "\\@..." (csv: a leading
+  "@" or backslash gets a backslash in front)
+
+measure_formats() compares the formats on real sheets (characters and tokens, see
+token_budget.get_estimator); benchmarks/measure_table_formats.py prints the savings.
+"""
+
+import csv
+import datetime as dt
+import io
+import json
+import math
+
+import pandas as pd
+
+from token_budget import get_estimator
+
+# "table" and "json" are the previous prompt formats, kept for comparison
+FORMATS = ("table", "json", "csv", "pipe")
+
+PIPE_SEPARATOR = " | "
+
+# Time part of a date-only value that was already turned into text ("1980-01-02 00:00:00")
+MIDNIGHT = " 00:00:00"
+
+# Dictionary encoding: values at least this long that occur at least this often in a column
+DICT_MIN_CHARS = 12
+DICT_MIN_COUNT = 3
+DICT_CODE_PREFIX = "@"
+DICT_LEGEND_TITLE = "Value codes (each code stands for its value; \\@ starts a value that really begins with @):"
+
+
+def cell_text(value):
+    """Prompt text of one cell: missing values empty, midnight dates as dates (also as text), whole floats as integers."""
+    if value is None or value is pd.NaT:
+        return ""
+    if isinstance(value, str):
+        value = " ".join(value.split()) if "\n" in value or "\r" in value else value.strip()
+        return value[:-9] if value.endswith(MIDNIGHT) and value[:4].isdigit() else value
+    if isinstance(value, float):
+        if math.isnan(value):
+            return ""
+        return str(int(value)) if value.is_integer() and abs(value) < 1e15 else str(value)
+    if isinstance(value, dt.datetime):
+        return value.date().isoformat() if value.time() == dt.time(0) else str(value)
+    if value is pd.NA:
+        return ""
+    return str(value).strip()
+
+
+def table_cells(df):
+    """(column names, rows of cell texts) of a sheet, without the columns that are empty on every row."""
+    columns, values = [], []
+    for i, name in enumerate(df.columns):
+        cells = [cell_text(value) for value in df.iloc[:, i].tolist()]
+        if any(cells):
+            columns.append(cell_text(name))
+            values.append(cells)
+    return columns, [list(row) for row in zip(*values)] if values else [[] for _ in range(len(df))]
+
+
+def build_dictionary(rows, min_chars=DICT_MIN_CHARS, min_count=DICT_MIN_COUNT):
+    """
+    {value: code} for the long values that repeat down a column, when a code pays off.
+
+    A value is coded when its repeats save more characters than its legend line
+    ("@n = value") adds. Codes are numbered by first appearance.
+    """
+    counts = {}
+    for row in rows:
+        for cell in row:
+            if len(cell) >= min_chars:
+                counts[cell] = counts.get(cell, 0) + 1
+
+    dictionary = {}
+    for value, count in counts.items():
+        code = f"{DICT_CODE_PREFIX}{len(dictionary) + 1}"
+        if count >= min_count and count * (len(value) - len(code)) > len(value) + len(code) + 3:
+            dictionary[value] = code
+    return dictionary
+
+
+def _legend(dictionary):
+    return [DICT_LEGEND_TITLE] + [f"{code} = {value}" for value, code in dictionary.items()]
+
+
+def _pipe_cell(cell, coded=False):
+    """Pipe row cell: backslashes and "|" escaped, and a leading "@" when codes are in use."""
+    cell = cell.replace("\\", "\\\\").replace("|", "\\|")
+    return "\\" + cell if coded and cell.startswith(DICT_CODE_PREFIX) else cell
+
+
+def _csv_cell(cell, coded=False):
+    """CSV cell (csv quoting handles separators): a leading "@" or backslash escaped when codes are in use."""
+    return "\\" + cell if coded and cell.startswith((DICT_CODE_PREFIX, "\\")) else cell
+
+
+def _csv_line(cells):
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="").writerow(cells)
+    return buffer.getvalue()
+
+
+def serialize_table(df, fmt="pipe", dictionary=False):
+    """
+    (header, row lines) of a sheet in a line format ("table", "csv" or "pipe").
+
+    There is one row line per DataFrame row, in order, so rows can be grouped and
+    chunked like the DataFrame (llm_extractor.iter_family_units). The header is the
+    column line, preceded by the value-code legend when dictionary encoding applies.
+    """
+    if fmt == "table":
+        lines = df.to_string(index=False).split("\n")
+        return lines[0], lines[1:]
+    if fmt not in ("csv", "pipe"):
+        raise ValueError(f"❌ Unknown line format '{fmt}' (use table, csv or pipe)")
+
+    columns, rows = table_cells(df)
+    codes = build_dictionary(rows) if dictionary else {}
+    escape = _pipe_cell if fmt == "pipe" else _csv_cell
+    coded = bool(codes)
+    columns = [escape(cell, coded) for cell in columns]
+    rows = [[codes[cell] if cell in codes else escape(cell, coded) for cell in row] for row in rows]
+    if fmt == "pipe":
+        header = PIPE_SEPARATOR.join(columns)
+        lines = [PIPE_SEPARATOR.join(row) for row in rows]
+    else:
+        header = _csv_line(columns)
+        lines = [_csv_line(row) for row in rows]
+    if codes:
+        header = "\n".join(_legend(codes) + [header])
+    return header, lines
+
+
+def table_text(df, fmt="pipe", dictionary=False):
+    """Whole sheet in one format; "json" is the indented records array newfile2 used to send."""
+    if fmt == "json":
+        return json.dumps(df.fillna("").astype(str).to_dict(orient="records"), indent=2)
+    header, lines = serialize_table(df, fmt, dictionary)
+    return "\n".join([header, *lines])
+
+
+def records_text(records, fmt="pipe", dictionary=False):
+    """table_text of a list of row dicts (newfile2's sheet records)."""
+    return table_text(pd.DataFrame(records), fmt, dictionary)
+
+
+def measure_formats(sheets, formats=FORMATS, dictionary=True):
+    """
+    Characters and tokens of every sheet (name -> DataFrame) in every format.
+
+    Returns one result dict per sheet and format, with the savings against "table"
+    (DataFrame.to_string). Token counts are exact when LLM_TOKENIZER selects a local
+    tokenizer, otherwise estimates from the per-format chars-per-token ratios.
+    """
+    variants = [(fmt, False) for fmt in formats]
+    if dictionary:
+        variants += [(fmt, True) for fmt in formats if fmt in ("csv", "pipe")]
+
+    results = []
+    for sheet_name, df in sheets.items():
+        base = None
+        for fmt, coded in variants:
+            text = table_text(df, fmt, coded)
+            tokens = get_estimator(fmt).count(text)
+            base = base or (len(text), tokens)
+            results.append({
+                "Sheet": sheet_name,
+                "Format": fmt + (" + codes" if coded else ""),
+                "Chars": len(text),
+                "Tokens": tokens,
+                "Chars saved %": round(100 * (1 - len(text) / base[0]), 1) if base[0] else 0.0,
+                "Tokens saved %": round(100 * (1 - tokens / base[1]), 1) if base[1] else 0.0,
+            })
+    return results
+
+
+def _sample_census(rows=400):
+    """Census sheet shaped like the uploads: families, sparse columns, repeated plan names, float ZIPs."""
+    plans = ["BCBS PPO Gold 500 Copay Plan", "BCBS HDHP Silver 3000 with HSA", "Kaiser HMO Bronze 60"]
+    data = []
+    for r in range(rows):
+        employee = r % 3 == 0
+        data.append({
+            "Employee Name": f"Last{r // 3}, First{r // 3}" if employee else None,
+            "Dependent Name": None if employee else f"Dep{r} Last{r // 3}",
+            "Relationship": "Employee" if employee else ("Spouse" if r % 3 == 1 else "Child"),
+            "DOB": pd.Timestamp(1960 + r % 40, 1 + r % 12, 1 + r % 28),
+            "Gender": "MF"[r % 2],
+            "Medical Plan": plans[r // 3 % 3],
+            "Dental Plan": "Delta Dental PPO Basic" if r % 5 else None,
+            "Vision Plan": "VSP Vision Choice Plan" if r % 4 else None,
+            "Coverage Level": ["Employee Only", "Employee + Spouse", "Family"][r // 3 % 3] if employee else None,
+            "ZIP CODE": float(10000 + r // 3 % 90000),
+            "Notes": None,
+        })
+    return {"Sample Census": pd.DataFrame(data)}
+
@@ -0,0 +1,4 @@
+import os
+
+# llm_extractor and mapper build their Groq clients at import; the tests never reach the API
+os.environ.setdefault("GROQ_API_KEY", "test")
@@ -0,0 +1,128 @@
+"""
+Groq API Stub
+=============
+Local stand-in for the Groq chat-completions endpoint, for the tests and
+benchmarks/bench_llm_dispatch.py: per-minute limits, injected failures and a fixed
+latency, so the dispatcher can be exercised without an API key. Point a client at it
+with Groq(api_key="stub", base_url=stub.base_url, max_retries=0).
+"""
+
+import json
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from llm_dispatch import estimate_tokens
+
+
+class GroqStubServer:
+    """
+    Local stand-in for the Groq chat-completions API (POST .../chat/completions).
+
+    respond(prompt) gives the reply content (default: a JSON list echoing the prompt's
+    last line). The server answers 429 with Retry-After when a request exceeds its own
+    requests_per_minute, and fail_status (429 by default, e.g. 503) to the first fail_first
+    requests. Counters: requests, rate_limited, failed, max_concurrent.
+    """
+
+    def __init__(self, respond=None, latency=0.0, requests_per_minute=None, fail_first=0, retry_after=1,
+                 fail_status=429):
+        self.respond = respond or (lambda prompt: json.dumps([{"line": prompt.strip().splitlines()[-1]}]))
+        self.latency, self.requests_per_minute = latency, requests_per_minute
+        self.fail_first, self.retry_after, self.fail_status = fail_first, retry_after, fail_status
+        self.counters = {"requests": 0, "rate_limited": 0, "failed": 0, "max_concurrent": 0}
+        self._accepted = deque()  # monotonic times of the requests served in the last minute
+        self._concurrent = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def _admit(self):
+        "Count the request; the error status it gets, or None when it is served"
+        with self._lock:
+            self.counters["requests"] += 1
+            now = time.monotonic()
+            while self._accepted and now - self._accepted[0] >= 60:
+                self._accepted.popleft()
+            status = None
+            if self.counters["requests"] <= self.fail_first:
+                status = self.fail_status
+            elif self.requests_per_minute and len(self._accepted) >= self.requests_per_minute:
+                status = 429
+            if status is not None:
+                self.counters["rate_limited" if status == 429 else "failed"] += 1
+                return status
+            self._accepted.append(now)
+            self._concurrent += 1
+            self.counters["max_concurrent"] = max(self.counters["max_concurrent"], self._concurrent)
+            return None
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                if not self.path.endswith("/chat/completions"):
+                    return self._reply(404, {"error": {"message": "not found"}})
+                status = stub._admit()
+                if status == 429:
+                    return self._reply(429, {"error": {"message": "Rate limit reached", "type": "requests",
+                                                       "code": "rate_limit_exceeded"}},
+                                       {"retry-after": str(stub.retry_after)})
+                if status is not None:
+                    return self._reply(status, {"error": {"message": "Service unavailable", "type": "server_error"}},
+                                       {"retry-after": str(stub.retry_after)})
+                try:
+                    time.sleep(stub.latency)
+                    prompt = body["messages"][-1]["content"]
+                    content = stub.respond(prompt)
+                finally:
+                    with stub._lock:
+                        stub._concurrent -= 1
+                self._reply(200, {
+                    "id": f"chatcmpl-stub-{stub.counters['requests']}", "object": "chat.completion",
+                    "created": int(time.time()), "model": body.get("model", ""),
+                    "choices": [{"index": 0, "finish_reason": "stop",
+                                 "message": {"role": "assistant", "content": content}}],
+                    "usage": {"prompt_tokens": estimate_tokens(prompt), "completion_tokens": estimate_tokens(content),
+                              "total_tokens": estimate_tokens(prompt) + estimate_tokens(content)},
+                })
+
+            def _reply(self, status, payload, headers=None):
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
@@ -0,0 +1,114 @@
+"""
+Synthetic Census Data
+=====================
+Random census sheets, workbooks and extracted records shaped like the client files,
+for the tests and the benchmarks (benchmarks/).
+
+census_sheet(revised=False) leaves out the inputs whose handling was changed on purpose
+after the original row loop (tests/baseline_hunter.py), so hunter.py must match the
+baseline on it exactly:
+- name suffixes ("Lee Jr", "Hill III"): kept with the last name since user-012
+- day-first and two-digit-year dates ("31/12/1970", "2/3/85"): one format per column since user-013
+- "Dependents" descriptor cells: parsed per dependent since user-016
+"""
+
+import io
+
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+
+FIRST_NAMES = ["John", "Mary Jane", "Ann", "Bob", "Li", "nan", "José", "Al"]
+LAST_NAMES = ["Smith", "Doe", "Ng", "Brown", "O'Neil", "Van Dyke", "Lee", "Hill"]
+SUFFIXED_LAST_NAMES = ["Lee Jr", "Hill III"]
+RELATIONSHIPS = ["Employee", "Spouse", "Child", "SON", "Wife", "Care Manager", "Self", "None", "nan", ""]
+DOBS = ["1980-01-31 00:00:00", "1990-02-01", "12/25/1985", "", "nan", "unknown", "1975-07-04"]
+REVISED_DOBS = ["01/02/1990", "2/3/85", "31/12/1970"]
+DEPENDENTS = ["", "", "", "Jane Smith (Relationship: Spouse, Date Of Birth: 01/02/1990)",
+              "Ng, Tom (relationship child, DOB: 3/4/2010)", "Kid Doe", "nan",
+              "Ann Lee (Wife, DOB 2/3/1981); Bo Lee (Relationship: SON, Date of Birth: 2012-05-06)",
+              "Al Brown (Spouse), Eve Brown (Child | Sam Brown"]
+
+# Mappings the parity tests and benchmarks run: combined names, separate plus combined
+# names without a relationship column, and references to columns that are missing
+MAPPINGS = [
+    {"Employee Name": ["Census,Employee  Name"], "First Name": [], "Last Name": [],
+     "Relationship To employee": ["Census,Relationship"], "DOB": ["Census,DOB"], "Gender": ["Census,Gender"],
+     "Medical Coverage": ["Census,Coverage Level"], "Medical Plan Name": ["Census,Medical Plan"]},
+    {"Employee Name": ["Census,Employee  Name"], "First Name": ["Census,First"], "Last Name": ["Census,Last"],
+     "Relationship To employee": [], "DOB": ["Census,DOB"], "Gender": ["Census,Gender"]},
+    {"First Name": ["Census,first"], "Last Name": ["Census,LAST", "Other,Last"],
+     "Relationship To employee": ["Other,Relationship"], "DOB": ["Census,Dependent Date of Birth"]},
+]
+
+
+def census_sheet(rows, seed=0, revised=True):
+    """
+    Random census sheet mixing the layouts seen in client files: combined and separate
+    name columns, job titles typed into Relationship, blank rows and "nan"/"None"
+    placeholders; with revised=True also name suffixes, ambiguous dates and a
+    Dependents column of descriptors.
+    """
+    rng = np.random.default_rng(seed)
+    lasts = LAST_NAMES[:6] + SUFFIXED_LAST_NAMES if revised else LAST_NAMES
+    dobs = DOBS + REVISED_DOBS if revised else DOBS
+    pick = lambda values: [values[i] for i in rng.integers(0, len(values), rows)]
+    last = pick(lasts)
+    first = pick(FIRST_NAMES)
+    combined = [f"{l}, {f}" if i % 3 else f"{f} {l}" for i, (f, l) in enumerate(zip(first, last))]
+    is_emp = rng.random(rows) < 0.4
+    columns = {
+        "Employee  Name": np.where(is_emp, combined, ""),
+        "First": np.where(rng.random(rows) < 0.5, first, pick(["", "Sam Lee", "Kim, Ray"])),
+        "Last": np.where(rng.random(rows) < 0.3, last, ""),
+        "Relationship": pick(RELATIONSHIPS),
+        "Relation Type": pick(["", "Spouse", "Child"]),
+        "DOB": pick(dobs),
+        "Dependent Date of Birth": pick(dobs),
+        "Gender": pick(["M", "F", "", "nan"]),
+        "Coverage Level": pick(["EE", "ES", "FAM", ""]),
+        "Medical Plan": pick(["PPO Gold", "HMO", ""]),
+    }
+    if revised:
+        columns["Dependents"] = pick(DEPENDENTS)
+    columns["Member"] = pick(["", "Chris Ng", "12345", "x"])
+    columns["ZIP CODE"] = pick(["12345", "", "02110"])
+    df = pd.DataFrame(columns)
+    df.loc[rng.random(rows) < 0.05] = ""  # blank rows
+    return df.replace("", pd.NA).astype("string")
+
+
+def family_records(count, seed=0, sheets=("Census", "Dependents")):
+    """
+    Random extracted records for the grouping tests: employees followed by spouses and
+    children a few rows down, some with another last name, some too far from any employee,
+    several records per row, and rows repeated across sheets.
+    """
+    rng = np.random.default_rng(seed)
+    lasts = ["Smith", "Doe", "Ng", "Brown", "O'Neil", "Van Dyke", "nan", ""]
+    relationships = ["Employee", "Employee", "Employee", "Spouse", "Child", "SON", "Wife", "Dependent", "Self", ""]
+    rows = np.cumsum(rng.integers(0, 4, count))
+    return [
+        {"__sheet_name__": sheets[s], "__original_row_idx__": int(r), "First Name": f"P{i}",
+         "Last Name": lasts[l], "Relationship To employee": relationships[k]}
+        for i, (s, r, l, k) in enumerate(zip(rng.integers(0, len(sheets), count), rows,
+                                              rng.integers(0, len(lasts), count),
+                                              rng.integers(0, len(relationships), count)))
+    ]
+
+
+def census_workbook(n_sheets, rows_per_sheet):
+    """xlsx bytes of a census workbook with one sheet per division, each under a two-line title."""
+    wb = Workbook(write_only=True)
+    for s in range(n_sheets):
+        ws = wb.create_sheet(f"Division {s + 1}")
+        ws.append(["Census Report"])
+        ws.append([])
+        ws.append(["Employee Name", "Relationship", "DOB", "Gender", "Coverage Level", "Medical Plan", "ZIP CODE"])
+        for r in range(rows_per_sheet):
+            ws.append([f"Last{r}, First{r}", "Employee" if r % 3 == 0 else "Spouse",
+                       f"{1 + r % 12}/{1 + r % 28}/19{60 + r % 40}", "MF"[r % 2],
+                       ["EE", "ES", "EC", "FAM"][r % 4], "PPO Gold", f"{10000 + r % 90000:05d}"])
+    buffer = io.BytesIO()
+    wb.save(buffer)
+    return buffer.getvalue()
@@ -0,0 +1,68 @@
+import pandas as pd
+import pytest
+
+import hunter
+from tests import baseline_hunter
+from tests.synthetic import MAPPINGS, census_sheet
+
+
+def _records(module, df, mapping, sheet="Census"):
+    return module._extract_sheet_records(sheet, df, module._flatten_mapping(mapping))
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+@pytest.mark.parametrize("mapping", MAPPINGS, ids=["combined", "separate", "missing-columns"])
+def test_matches_baseline_row_loop(mapping, seed):
+    df = census_sheet(1500, seed, revised=False)
+    assert hunter._extract_sheet_records("Census", df, hunter._flatten_mapping(mapping)) \
+        == _records(baseline_hunter, df, mapping)
+
+
+def test_row_offset_shifts_row_indexes_only():
+    df = census_sheet(300, revised=False)
+    col_map = hunter._flatten_mapping(MAPPINGS[0])
+    plain = hunter._extract_sheet_records("Census", df, col_map)
+    shifted = hunter._extract_sheet_records("Census", df, col_map, row_offset=1000)
+    assert [rec["__original_row_idx__"] + 1000 for rec in plain] == [rec["__original_row_idx__"] for rec in shifted]
+
+
+# Inputs whose handling changed on purpose after the baseline; the sheet of one employee per
+# row shows each difference against the baseline records
+REVISED_SHEET = pd.DataFrame({
+    "Employee Name": ["Ann Lee Jr", "Smith, Bob", "Ng, Li"],
+    "Relationship": ["Employee"] * 3,
+    "DOB": ["01/02/1990", "31/12/1970", "2/3/85"],
+    "Dependents": ["", "Jane Smith (Relationship: Spouse, Date Of Birth: 01/02/1990)",
+                   "Ann Ng (Wife, DOB 2/3/1981); Bo Ng (Relationship: SON, Date of Birth: 2012-05-06)"],
+}).replace("", pd.NA).astype("string")
+REVISED_MAPPING = {"Employee Name": ["Census,Employee Name"], "Relationship To employee": ["Census,Relationship"],
+                   "DOB": ["Census,DOB"]}
+REVISED_FIELDS = ["First Name", "Last Name", "Relationship To employee", "Dependent (Y/N)", "DOB",
+                  "__original_row_idx__"]
+
+
+def _revised(module):
+    return [tuple(rec[field] for field in REVISED_FIELDS) for rec in _records(module, REVISED_SHEET, REVISED_MAPPING)]
+
+
+def test_revised_inputs_baseline():
+    assert _revised(baseline_hunter) == [
+        ("Ann Lee", "Jr", "Employee", "N", "1990-01-02", 0),
+        ("Bob", "Smith", "Employee", "N", "1970-12-31", 1),
+        ("Jane", "Smith", "Employee", "Y", "1990-01-02", 1),
+        ("Li", "Ng", "Employee", "N", "1985-02-03", 2),
+        ("Ann", "Ng", "Employee", "Y", "2012-05-06", 2),
+    ]
+
+
+def test_revised_inputs():
+    # Suffix stays with the last name, the DOB column is read day-first (31/12/1970), and
+    # every dependent of a descriptor cell keeps its own relationship and date of birth
+    assert _revised(hunter) == [
+        ("Ann", "Lee Jr", "Employee", "N", "1990-02-01", 0),
+        ("Bob", "Smith", "Employee", "N", "1970-12-31", 1),
+        ("Jane", "Smith", "Spouse", "Y", "1990-01-02", 1),
+        ("Li", "Ng", "Employee", "N", "1985-02-03", 2),
+        ("Ann", "Ng", "Wife", "Y", "1981-02-03", 2),
+        ("Bo", "Ng", "SON", "Y", "2012-05-06", 2),
+    ]
@@ -0,0 +1,87 @@
+from collections import defaultdict
+
+import pandas as pd
+import pytest
+
+import hunter
+from tests import baseline_hunter
+from tests.synthetic import MAPPINGS, census_sheet, family_records
+
+
+def _families(grouped):
+    "Families as sorted member lists, ignoring the Family Group numbers"
+    members = defaultdict(list)
+    for record in grouped:
+        members[record["Family Group"]].append({k: v for k, v in record.items() if k != "Family Group"})
+    return sorted(map(repr, members.values()))
+
+
+def _in_row_order(records):
+    return sorted(records, key=lambda rec: (rec.get("__sheet_name__", ""), rec.get("__original_row_idx__", 999999)))
+
+
+def _extracted(rows=2000):
+    df = census_sheet(rows, revised=False)
+    return hunter._extract_sheet_records("Census", df, hunter._flatten_mapping(MAPPINGS[0]))
+
+
+def _without_same_row_dependents(records):
+    "Records minus the dependents on an employee's row, which the original scan never matched there"
+    employee_rows = {(rec["__sheet_name__"], rec["__original_row_idx__"]) for rec in records
+                     if not hunter._is_dependent_record(rec)}
+    return [rec for rec in records if not hunter._is_dependent_record(rec)
+            or (rec["__sheet_name__"], rec["__original_row_idx__"]) not in employee_rows]
+
+
+@pytest.mark.parametrize("records", [family_records(4000, 1), family_records(4000, 2, sheets=("Census",)), _extracted()],
+                         ids=["two-sheets", "one-sheet", "extracted"])
+def test_matches_baseline_grouping(records):
+    # Same records, order and Family Group numbers as the original scan over every employee
+    records = _without_same_row_dependents(records)
+    assert hunter.group_employees_and_dependents(records) == baseline_hunter.group_employees_and_dependents(records)
+
+
+# John Doe on row 0, Bob Smith on row 1 with his spouse in the Dependents cell
+SAME_ROW_SHEET = pd.DataFrame({
+    "Employee Name": ["Doe, John", "Smith, Bob"],
+    "Relationship": ["Employee", "Employee"],
+    "Dependents": ["", "Jane Smith (Relationship: Spouse, Date Of Birth: 01/02/1990)"],
+}).replace("", pd.NA).astype("string")
+SAME_ROW_MAPPING = {"Employee Name": ["Census,Employee Name"], "Relationship To employee": ["Census,Relationship"]}
+SAME_ROW_FAMILIES = [[("John", "Doe", 1)], [("Bob", "Smith", 2), ("Jane", "Smith", 2)]]
+
+
+def _names(records):
+    return [(rec["First Name"], rec["Last Name"], rec["Family Group"]) for rec in records]
+
+
+def test_same_row_dependent_joins_own_employee():
+    extracted, _ = hunter.extract_data({"Census": SAME_ROW_SHEET}, SAME_ROW_MAPPING, parallel=False)
+    assert _names(extracted.to_dict("records")) == [name for family in SAME_ROW_FAMILIES for name in family]
+
+
+def test_same_row_dependent_joins_own_employee_streaming():
+    assert [_names(family) for family in hunter.iter_families({"Census": SAME_ROW_SHEET}, SAME_ROW_MAPPING)] \
+        == SAME_ROW_FAMILIES
+
+
+def test_same_row_employee_found_when_listed_after_dependent():
+    employee = {"__sheet_name__": "Census", "__original_row_idx__": 3, "First Name": "Bob", "Last Name": "Smith",
+                "Relationship To employee": "Employee"}
+    spouse = {**employee, "First Name": "Jane", "Relationship To employee": "Spouse"}
+    for grouped in (hunter.group_employees_and_dependents([spouse, employee]),
+                    [rec for family in hunter.iter_family_groups([spouse, employee]) for rec in family]):
+        assert _names(grouped) == [("Bob", "Smith", 1), ("Jane", "Smith", 1)]
+
+
+@pytest.mark.parametrize("records", [family_records(4000, 1), family_records(4000, 2, sheets=("Census",))],
+                         ids=["two-sheets", "one-sheet"])
+def test_streaming_groups_same_families(records):
+    streamed = [record for family in hunter.iter_family_groups(_in_row_order(records)) for record in family]
+    assert _families(streamed) == _families(hunter.group_employees_and_dependents(records))
+
+
+def test_streaming_numbers_families_in_row_order():
+    families = list(hunter.iter_family_groups(_in_row_order(family_records(500))))
+    assert [family[0]["Family Group"] for family in families] == list(range(1, len(families) + 1))
+    assert all(record["Family Group"] == family[0]["Family Group"] for family in families for record in family)
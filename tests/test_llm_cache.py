@@ -0,0 +1,97 @@
+import os
+import stat
+import subprocess
+import sys
+
+import pytest
+from groq import Groq
+
+import llm_cache
+from llm_cache import ResponseCache, cached_chat
+from tests.groq_stub import GroqStubServer
+
+MESSAGES = [{"role": "user", "content": "Map these headers:\nEmployee Name, DOB, Sex"}]
+
+
+@pytest.fixture
+def stub():
+    with GroqStubServer() as stub:
+        stub.client = Groq(api_key="stub", base_url=stub.base_url, max_retries=0)
+        yield stub
+
+
+def test_repeat_request_answered_from_cache(stub):
+    cache = ResponseCache(":memory:")
+    first = cached_chat(stub.client, "stub", MESSAGES, temperature=0.0, max_tokens=1500, cache=cache)
+    repeat = cached_chat(stub.client, "stub", MESSAGES, temperature=0.0, max_tokens=1500, cache=cache)
+    assert (first["cached"], repeat["cached"]) == (False, True)
+    assert repeat["content"] == first["content"] and repeat["usage"] == first["usage"]
+    assert stub.counters["requests"] == 1
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["stores"], stats["entries"]) == (1, 1, 1, 1)
+    assert stats["tokens_saved"] == first["usage"]["prompt_tokens"] + first["usage"]["completion_tokens"]
+
+
+def test_other_settings_are_other_keys(stub):
+    cache = ResponseCache(":memory:")
+    cached_chat(stub.client, "stub", MESSAGES, temperature=0.0, max_tokens=1500, cache=cache)
+    assert not cached_chat(stub.client, "stub", MESSAGES, temperature=0.0, max_tokens=800, cache=cache)["cached"]
+    assert stub.counters["requests"] == 2
+
+
+def test_sampled_requests_cached_only_on_request(stub):
+    cache = ResponseCache(":memory:")
+    for _ in range(2):
+        assert not cached_chat(stub.client, "stub", MESSAGES, temperature=0.1, cache=cache)["cached"]
+    assert cache.stats()["entries"] == 0
+    cached_chat(stub.client, "stub", MESSAGES, temperature=0.1, cache=cache, cache_sampled=True)
+    assert cached_chat(stub.client, "stub", MESSAGES, temperature=0.1, cache=cache, cache_sampled=True)["cached"]
+    assert stub.counters["requests"] == 3
+
+
+def test_rejected_replies_not_stored(stub):
+    cache = ResponseCache(":memory:")
+    cached_chat(stub.client, "stub", MESSAGES, temperature=0.0, cache=cache, validate=lambda content: False)
+    assert cache.stats()["stores"] == 0
+
+
+def test_ttl_and_lru():
+    now = [0.0]
+    cache = ResponseCache(":memory:", ttl_seconds=60, max_bytes=350, clock=lambda: now[0])
+    for i in range(4):
+        now[0] += 1
+        cache.put(f"k{i}", "x" * 100)
+        if i == 2:
+            now[0] += 0.5
+            cache.get("k0")  # k0 becomes most recently used, k1 is evicted instead
+    assert sorted(key for (key,) in cache._db.execute("SELECT key FROM responses")) == ["k0", "k2", "k3"]
+    assert cache.stats()["evictions"] == 1
+    now[0] += 61
+    assert cache.get("k3") is None
+    assert cache.stats()["expired"] == 1
+
+
+def test_cache_file_owner_only(tmp_path):
+    path = tmp_path / "cache.sqlite3"
+    path.write_bytes(b"")
+    path.chmod(0o644)
+    cache = ResponseCache(str(path))
+    cache.put("k", "reply")
+    cache.close()
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+
+
+def test_default_cache_in_memory_and_opened_on_first_use(tmp_path):
+    # A fresh interpreter: importing the extractor opens nothing, and the default cache writes no file
+    env = {key: value for key, value in os.environ.items() if not key.startswith("LLM_CACHE")}
+    code = ("import llm_extractor, llm_cache; assert llm_cache._response_cache is None; "
+            "assert llm_cache.get_response_cache().path == ':memory:'")
+    subprocess.run([sys.executable, "-c", code], cwd=tmp_path, env={**env, "PYTHONPATH": os.getcwd()}, check=True)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_cache_off(monkeypatch):
+    monkeypatch.setattr(llm_cache, "LLM_CACHE_ENABLED", False)
+    monkeypatch.setattr(llm_cache, "_response_cache", None)
+    monkeypatch.setattr(llm_cache, "_response_cache_opened", False)
+    assert llm_cache.get_response_cache() is None
@@ -0,0 +1,211 @@
+import json
+import time
+
+import pandas as pd
+import pytest
+from groq import Groq
+
+import llm_extractor
+import token_budget
+from llm_dispatch import TokenBucketLimiter, dispatch, estimate_tokens
+from tests.groq_stub import GroqStubServer
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+def _send(stub, limiter=None):
+    client = Groq(api_key="stub", base_url=stub.base_url, max_retries=0)
+
+    def send(chunk):
+        if limiter is not None:
+            limiter.acquire(estimate_tokens(chunk))
+        reply = client.chat.completions.create(model="stub", messages=[{"role": "user", "content": chunk}])
+        return reply.choices[0].message.content
+    return send
+
+
+CHUNKS = [f"Table chunk\nrow block {i}" for i in range(12)]
+EXPECTED = [json.dumps([{"line": f"row block {i}"}]) for i in range(12)]
+
+
+def _slow_early_chunks(prompt):
+    # Earlier chunks take longer, so replies finish out of chunk order
+    block = int(prompt.rsplit(" ", 1)[-1])
+    time.sleep(0.02 * (12 - block))
+    return json.dumps([{"line": prompt.strip().splitlines()[-1]}])
+
+
+def test_results_in_chunk_order():
+    with GroqStubServer(respond=_slow_early_chunks) as stub:
+        assert list(dispatch(CHUNKS, _send(stub), max_in_flight=4)) == EXPECTED
+
+
+def test_max_in_flight_bound():
+    with GroqStubServer(latency=0.1) as stub:
+        assert list(dispatch(CHUNKS, _send(stub), max_in_flight=3)) == EXPECTED
+    assert 1 < stub.counters["max_concurrent"] <= 3
+
+
+def test_rate_limited_chunks_are_sent_again():
+    limiter = TokenBucketLimiter(requests_per_minute=600)
+    counters = {}
+    with GroqStubServer(fail_first=3, retry_after=0) as stub:
+        results = list(dispatch(CHUNKS, _send(stub, limiter), max_in_flight=4, limiter=limiter, counters=counters))
+    assert results == EXPECTED
+    assert counters["rate_limited"] == stub.counters["rate_limited"] == 3
+    assert stub.counters["requests"] == len(CHUNKS) + 3
+
+
+def test_retry_after_pauses_the_limiter():
+    limiter = TokenBucketLimiter(requests_per_minute=600)
+    with GroqStubServer(fail_first=1, retry_after=1) as stub:
+        start = time.perf_counter()
+        assert list(dispatch(CHUNKS[:1], _send(stub, limiter), limiter=limiter)) == EXPECTED[:1]
+    assert time.perf_counter() - start >= 0.95
+    assert limiter.waited == pytest.approx(1, abs=0.05)
+
+
+def test_give_up_after_max_retries():
+    with GroqStubServer(fail_first=10, retry_after=0) as stub:
+        with pytest.raises(Exception) as excinfo:
+            list(dispatch(CHUNKS[:1], _send(stub), max_retries=2))
+    assert getattr(excinfo.value, "status_code", None) == 429
+    assert stub.counters["requests"] == 3
+
+
+def test_transient_failures_are_sent_again_without_pausing():
+    limiter = TokenBucketLimiter(requests_per_minute=600)
+    counters = {}
+    with GroqStubServer(fail_first=2, fail_status=503, retry_after=0) as stub:
+        results = list(dispatch(CHUNKS[:3], _send(stub, limiter), limiter=limiter, counters=counters))
+    assert results == EXPECTED[:3]
+    assert counters == {"retried": 2} and stub.counters["failed"] == 2
+    assert limiter.waited == 0
+
+
+def test_client_errors_are_not_sent_again():
+    with GroqStubServer(fail_first=1, fail_status=400) as stub:
+        with pytest.raises(Exception) as excinfo:
+            list(dispatch(CHUNKS[:1], _send(stub)))
+    assert getattr(excinfo.value, "status_code", None) == 400
+    assert stub.counters["requests"] == 1
+
+
+def test_extractor_client_leaves_retries_to_dispatch():
+    # The SDK would retry a 429 itself before dispatch saw it, outside the shared limiter pause
+    assert llm_extractor.client.max_retries == 0
+    limiter = TokenBucketLimiter(requests_per_minute=600)
+    counters = {}
+    with GroqStubServer(fail_first=1, retry_after=0) as stub:
+        client = llm_extractor.client.with_options(base_url=stub.base_url)
+        send = lambda chunk: client.chat.completions.create(
+            model="stub", messages=[{"role": "user", "content": chunk}]).choices[0].message.content
+        assert list(dispatch(CHUNKS[:1], send, limiter=limiter, counters=counters)) == EXPECTED[:1]
+    assert counters == {"rate_limited": 1} and stub.counters["requests"] == 2
+
+
+def test_limiter_paces_requests_and_tokens():
+    clock = FakeClock()
+    limiter = TokenBucketLimiter(requests_per_minute=60, tokens_per_minute=600, clock=clock, sleep=clock.sleep)
+    limiter.levels = [1, 600]
+    limiter.acquire(100)
+    assert clock.slept == []
+    limiter.acquire(100)  # request bucket empty: one request per second
+    assert clock.slept == [pytest.approx(1.0)]
+    limiter.acquire(1000)  # more than the token bucket holds: waits for the deficit
+    assert clock.slept[-1] == pytest.approx((1000 - 400 - 10) * 60 / 600)
+
+
+def test_settle_returns_unused_tokens():
+    clock = FakeClock()
+    limiter = TokenBucketLimiter(tokens_per_minute=10_000, clock=clock, sleep=clock.sleep)
+    limiter.acquire(6000)
+    limiter.settle(6000, 1500)
+    assert limiter.levels[1] == 10_000 - 1500
+    limiter.settle(0, 500)  # a request that used more than it reserved
+    assert limiter.levels[1] == 10_000 - 2000
+    limiter.settle(5000, 0)  # refunds never overfill the bucket
+    assert limiter.levels[1] == 10_000
+
+
+@pytest.fixture
+def stub_extractor(monkeypatch):
+    "llm_extractor pointed at a local stub, with fresh token estimators"
+    monkeypatch.setattr(token_budget, "_ESTIMATORS", {})
+    monkeypatch.setattr(llm_extractor, "estimator", token_budget.get_estimator(llm_extractor.LLM_TABLE_FORMAT))
+    monkeypatch.setattr(llm_extractor, "LLM_CACHE_EXTRACTION", False)
+    with GroqStubServer() as stub:
+        monkeypatch.setattr(llm_extractor, "client", llm_extractor.client.with_options(base_url=stub.base_url))
+        yield stub
+
+
+def test_extraction_request_reserves_output_and_settles_from_usage(stub_extractor):
+    clock = FakeClock()
+    limiter = TokenBucketLimiter(tokens_per_minute=50_000, clock=clock, sleep=clock.sleep)
+    reserved = []
+    reserve = limiter.reserve
+    limiter.reserve = lambda tokens=0: reserved.append(tokens) or reserve(tokens)
+    prompt = "Extract the records\nSmith | John | Employee"
+    prompt_tokens = llm_extractor.estimator.count(prompt)
+
+    output = llm_extractor.get_full_llm_output(prompt, limiter=limiter, expected_output_tokens=900)
+    assert reserved == [prompt_tokens + 900]
+    used = estimate_tokens(prompt) + estimate_tokens(output)
+    assert limiter.levels[1] == 50_000 - used
+
+    llm_extractor.get_full_llm_output(prompt, limiter=limiter)
+    assert reserved[-1] == prompt_tokens + llm_extractor.LLM_MAX_OUTPUT_TOKENS
+
+
+@pytest.mark.parametrize("tokens_per_minute", [6_000, 12_000, 30_000, 60_000])
+def test_chunk_budget_fits_the_token_limit(stub_extractor, monkeypatch, tokens_per_minute):
+    # Free and dev tiers (12k, 30k) used to leave 1 input token: one request per row
+    monkeypatch.setattr(llm_extractor, "LLM_TOKENS_PER_MINUTE", tokens_per_minute)
+    budget = llm_extractor.chunk_budget()
+    prompt_tokens = llm_extractor.estimator.count(llm_extractor._chunk_prompt("", "1/1"))
+    assert budget["max_output_tokens"] == llm_extractor.output_token_limit()
+    assert prompt_tokens + budget["input_tokens"] + budget["max_output_tokens"] <= tokens_per_minute
+    assert budget["input_tokens"] >= 1000 and budget["max_records"] >= 15
+
+    census = pd.DataFrame({"Employee Name": [f"Last{i}, First{i}" for i in range(300)],
+                           "DOB": ["1980-01-01"] * 300, "Relationship": ["Employee"] * 300})
+    chunks = list(llm_extractor.pack_chunks(llm_extractor.iter_family_units([("Census", census)]),
+                                            budget["input_tokens"], llm_extractor.estimator.count,
+                                            budget["max_records"]))
+    assert len(chunks) <= 300 // budget["max_records"] + 2
+
+
+def test_low_token_limit_lowers_max_tokens(stub_extractor, monkeypatch):
+    monkeypatch.setattr(llm_extractor, "LLM_TOKENS_PER_MINUTE", 12_000)
+    clock = FakeClock()
+    limiter = TokenBucketLimiter(tokens_per_minute=12_000, clock=clock, sleep=clock.sleep)
+    reserved = []
+    reserve = limiter.reserve
+    limiter.reserve = lambda tokens=0: reserved.append(tokens) or reserve(tokens)
+    prompt = "Extract the records\nSmith | John | Employee"
+
+    llm_extractor.get_full_llm_output(prompt, limiter=limiter)
+    max_tokens = llm_extractor.output_token_limit()
+    assert max_tokens < 12_000 * llm_extractor.LLM_OUTPUT_SHARE
+    assert reserved == [llm_extractor.estimator.count(prompt) + max_tokens]
+    assert clock.now == 0  # fits the bucket without waiting
+
+
+def test_rejected_extraction_request_refunds_its_tokens(stub_extractor):
+    stub_extractor.fail_first = 1
+    clock = FakeClock()
+    limiter = TokenBucketLimiter(tokens_per_minute=50_000, clock=clock, sleep=clock.sleep)
+    with pytest.raises(Exception):
+        llm_extractor.get_full_llm_output("Extract the records\nSmith | John", limiter=limiter)
+    assert limiter.levels[1] == 50_000
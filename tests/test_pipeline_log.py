@@ -0,0 +1,53 @@
+import pandas as pd
+import pytest
+
+import hunter
+import workbook
+from pipeline_log import StageTimer, log
+from tests.synthetic import MAPPINGS, census_sheet, census_workbook
+
+
+def test_stats_leave_out_stage_timings():
+    # The stats become the client workbook's Stats sheet; timings go to the caller's timer
+    timer = StageTimer()
+    _, stats = hunter.extract_data({"Census": census_sheet(200)}, MAPPINGS[0], parallel=False, timer=timer)
+    assert "Stage Timings" not in stats and "Seconds" not in stats
+    assert {"resolve columns", "classify rows", "stats"} <= set(timer.seconds)
+
+
+def test_streamed_stats_leave_out_stage_timings():
+    timer = StageTimer()
+    _, stats = hunter.extract_data_from_batches(workbook.iter_sheet_batches(census_workbook(2, 30)),
+                                                {"Employee Name": ["Division 1,Employee Name"]}, timer=timer)
+    assert "Stage Timings" not in stats
+    assert timer.seconds["parse"] > 0
+
+
+def test_process_sheet_debug_only(capsys, monkeypatch):
+    df = pd.DataFrame([["Census Report", None], [None, None], ["Employee Name", "DOB"], ["Smith, Bob", "1980-01-01"]])
+    monkeypatch.setattr(log, "level", log.level)
+    log.set_level("info")
+    workbook.process_sheet(df, "Census")
+    assert capsys.readouterr().out == ""
+    log.set_level("debug")
+    workbook.process_sheet(df, "Census")
+    assert "Detected header row" in capsys.readouterr().out
+
+
+class _Unformattable(str):
+    "A name that fails if a log message is built from it"
+    def __format__(self, spec):
+        raise AssertionError("log message formatted")
+
+
+def test_grouping_formats_nothing_below_debug(monkeypatch):
+    records = [{"__sheet_name__": "Census", "__original_row_idx__": row, "First Name": _Unformattable(first),
+                "Last Name": "Smith", "Relationship To employee": relationship}
+               for row, (first, relationship) in enumerate([("Bob", "Employee"), ("Jane", "Spouse")])]
+    monkeypatch.setattr(log, "level", log.level)
+    log.set_level("info")
+    grouped = hunter.group_employees_and_dependents(records)
+    assert [rec["Family Group"] for rec in grouped] == [1, 1]
+    log.set_level("debug")
+    with pytest.raises(AssertionError, match="formatted"):
+        hunter.group_employees_and_dependents(records)
@@ -0,0 +1,134 @@
+import io
+import re
+import zipfile
+
+import pandas as pd
+import pytest
+from openpyxl import Workbook
+
+import hunter
+import workbook
+from tests.synthetic import census_workbook
+
+MAPPING = {"Employee Name": ["Census,Employee Name"], "Relationship To employee": ["Census,Relationship"],
+           "DOB": ["Census,DOB"], "Gender": ["Census,Gender"]}
+
+
+def _census_book(title=True):
+    """
+    xlsx bytes of a census sheet with blank rows between families, two "Name" columns and
+    one row wider than the header.
+    """
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Census"
+    if title:
+        ws.append(["Census Report"])
+        ws.append([])
+    ws.append(["Employee Name", "Relationship", "DOB", "Name", "Name", "Gender"])
+    for r in range(60):
+        if r % 7 == 3:
+            ws.append([])
+        employee = r % 3 == 0
+        row = [f"Last{r // 3}, First{r}" if employee else None, "Employee" if employee else "Spouse",
+               f"1980-01-{1 + r % 28:02d}", None if employee else f"Dep{r} Last{r // 3}", f"x{r}", "MF"[r % 2]]
+        if r == 40:
+            row += [None, "extra"]
+        ws.append(row)
+    buffer = io.BytesIO()
+    wb.save(buffer)
+    return buffer.getvalue()
+
+
+def _without_dimension(data):
+    "Same workbook without the <dimension> element, as some writers save it"
+    source = zipfile.ZipFile(io.BytesIO(data))
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as target:
+        for item in source.infolist():
+            content = source.read(item.filename)
+            if item.filename.startswith("xl/worksheets/sheet"):
+                content = re.sub(rb"<dimension[^>]*/>", b"", content)
+            target.writestr(item, content)
+    return buffer.getvalue()
+
+
+BOOKS = {
+    "title-rows": _census_book(),
+    "header-first": _census_book(title=False),
+    "no-dimension": _without_dimension(_census_book()),
+}
+
+
+def _full_sheets(data):
+    return workbook.WorkbookSnapshot.from_upload(data, parallel=False).sheets
+
+
+@pytest.mark.parametrize("batch_size", [8, 25, 5000])
+@pytest.mark.parametrize("data", BOOKS.values(), ids=BOOKS.keys())
+def test_streamed_records_match_full_sheet(data, batch_size):
+    col_map = hunter._flatten_mapping(MAPPING)
+    full = hunter._extract_sheet_records("Census", _full_sheets(data)["Census"], col_map)
+    batches = hunter._kept_row_offsets(workbook.iter_sheet_batches(data, batch_size=batch_size))
+    streamed = [record for sheet, offset, batch in batches
+                for record in hunter._extract_sheet_records(sheet, batch, col_map, offset)]
+    assert streamed == full
+
+
+@pytest.mark.parametrize("data", BOOKS.values(), ids=BOOKS.keys())
+def test_streamed_extraction_matches_extract_data(data):
+    full, _ = hunter.extract_data(_full_sheets(data), MAPPING, parallel=False)
+    streamed, _ = hunter.extract_data_from_batches(workbook.iter_sheet_batches(data, batch_size=8), MAPPING)
+    pd.testing.assert_frame_equal(streamed, full)
+
+
+def test_streamed_families_match_full_sheet():
+    data = BOOKS["title-rows"]
+    full = list(hunter.iter_families(_full_sheets(data), MAPPING))
+    streamed = list(hunter.iter_families_from_batches(workbook.iter_sheet_batches(data, batch_size=8), MAPPING))
+    assert streamed == full
+
+
+@pytest.mark.parametrize("data", BOOKS.values(), ids=BOOKS.keys())
+def test_streamed_columns_match_full_sheet(data):
+    full = _full_sheets(data)["Census"]
+    batches = [batch for _, _, batch in workbook.iter_sheet_batches(data, batch_size=8)]
+    # Columns only grow, up to the widest row of the sheet
+    assert list(batches[0].columns) == list(full.columns)[:batches[0].shape[1]]
+    assert list(batches[-1].columns) == list(full.columns)
+    text = lambda df: df.astype(object).fillna("").astype(str).reset_index(drop=True)
+    pd.testing.assert_frame_equal(text(pd.concat(batches, ignore_index=True)), text(full))
+
+
+def test_streamed_workbook_matches_snapshot():
+    data = census_workbook(3, 40)
+    mapping = {"Employee Name": ["Division 1,Employee Name"], "DOB": ["Division 2,DOB"]}
+    full, _ = hunter.extract_data(_full_sheets(data), mapping, parallel=False)
+    streamed, _ = hunter.extract_data_from_batches(workbook.iter_sheet_batches(data, batch_size=16), mapping)
+    pd.testing.assert_frame_equal(streamed, full)
+
+
+@pytest.mark.parametrize("columns", [["Name", "Name", "DOB", "Name"], ["Name", "Name", "DOB", "Name", "Name.1"],
+                                     ["x", "x.1", "x", "x.1", "x"]])
+def test_duplicate_headers_deduped_like_pandas(columns):
+    wb = Workbook()
+    wb.active.append(columns)
+    buffer = io.BytesIO()
+    wb.save(buffer)
+    buffer.seek(0)
+    assert workbook._dedup_like_read_excel(columns) == list(pd.read_excel(buffer).columns)
+
+
+@pytest.mark.parametrize("book, names", [("title-rows", ["Name", "Name_1"]), ("header-first", ["Name", "Name.1"])])
+def test_duplicate_headers_same_when_streamed(book, names):
+    # A detected header row gets process_sheet's "_1" names, a first-row header pandas' ".1" names
+    assert list(_full_sheets(BOOKS[book])["Census"].columns)[3:5] == names
+    assert list(next(workbook.iter_sheet_batches(BOOKS[book]))[2].columns)[3:5] == names
+
+
+def test_process_sheet_keeps_underscore_suffix():
+    # Saved mappings refer to these names
+    rows = [[f"Last{r}, First{r}", "1980-01-02", f"Dep{r}", f"x{r}", f"y{r}", "MF"[r % 2]] for r in range(6)]
+    df = pd.DataFrame([["Census Report"] + [None] * 5, [None] * 6,
+                       ["Employee Name", "DOB", "Name", "Name", "Name_1", "Gender"], *rows])
+    assert list(workbook.process_sheet(df, "Census").columns)[2:5] == ["Name", "Name_1", "Name_1_1"]
@@ -0,0 +1,107 @@
+import csv
+import datetime as dt
+import re
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from table_format import DICT_CODE_PREFIX, DICT_LEGEND_TITLE, build_dictionary, cell_text, serialize_table, table_cells
+
+PLAN = "BCBS PPO Gold 500 Copay Plan"
+
+
+def _split_pipe(line):
+    "Cells of a pipe line, still escaped: split on ' | ' outside escapes"
+    cells, cell, i = [], [], 0
+    while i < len(line):
+        if line[i] == "\\":
+            cell.append(line[i:i + 2])
+            i += 2
+        elif line.startswith(" | ", i):
+            cells.append("".join(cell))
+            cell, i = [], i + 3
+        else:
+            cell.append(line[i])
+            i += 1
+    cells.append("".join(cell))
+    return cells
+
+
+def decode(header, lines, fmt):
+    "(columns, rows) read back from serialize_table output, value codes resolved"
+    *legend, column_line = header.split("\n")
+    codes = dict(entry.split(" = ", 1) for entry in legend[1:])
+    if fmt == "pipe":
+        split, unescape = _split_pipe, lambda cell: re.sub(r"\\(.)", r"\1", cell)
+    else:
+        split = lambda line: next(csv.reader([line]))
+        unescape = lambda cell: cell[1:] if codes and cell.startswith("\\") else cell
+    columns = [unescape(cell) for cell in split(column_line)]
+    rows = [[codes[cell] if cell in codes else unescape(cell) for cell in split(line)] for line in lines]
+    return columns, rows
+
+
+@pytest.mark.parametrize("value, text", [
+    (None, ""), (np.nan, ""), (pd.NA, ""), (pd.NaT, ""),
+    ("  Smith ", "Smith"), ("Line one\nline  two", "Line one line two"),
+    ("1980-01-02 00:00:00", "1980-01-02"), ("Meeting 00:00:00", "Meeting 00:00:00"),
+    (dt.datetime(1980, 1, 2), "1980-01-02"), (pd.Timestamp(1980, 1, 2, 13, 5), "1980-01-02 13:05:00"),
+    (2110.0, "2110"), (12.5, "12.5"), (1e16, "1e+16"), (42, "42"),
+])
+def test_cell_text(value, text):
+    assert cell_text(value) == text
+
+
+def test_table_cells_drop_empty_columns():
+    df = pd.DataFrame({"Name": ["Ann", None], "Notes": [None, np.nan], "ZIP": [2110.0, 10001.0]})
+    assert table_cells(df) == (["Name", "ZIP"], [["Ann", "2110"], ["", "10001"]])
+
+
+def test_build_dictionary_codes_long_repeated_values():
+    rows = [[PLAN, "EE"]] * 3 + [["Kaiser HMO Bronze 60", "EE"]] * 2 + [["Delta Dental PPO Basic", "EE"]] * 4
+    assert build_dictionary(rows) == {PLAN: "@1", "Delta Dental PPO Basic": "@2"}
+    # A value is coded only when its repeats save more than its legend line costs
+    assert build_dictionary([["Twelve chars"]], min_count=1) == {}
+    assert build_dictionary([["Twelve chars"]] * 3) == {"Twelve chars": "@1"}
+    assert build_dictionary([["EE"]] * 50) == {}
+
+
+def test_pipe_escapes_instead_of_rewriting():
+    df = pd.DataFrame({"A|B": ["x | y", "C:\\dir\\", "a\\|b"], "Plan": ["PPO", "HMO", "PPO"]})
+    header, lines = serialize_table(df, "pipe")
+    assert header == "A\\|B | Plan"
+    assert lines == ["x \\| y | PPO", "C:\\\\dir\\\\ | HMO", "a\\\\\\|b | PPO"]
+
+
+def test_code_prefix_escaped_when_codes_in_use():
+    df = pd.DataFrame({"Plan": [PLAN] * 4, "Note": ["@1", "@home", "plain", "\\x"]})
+    header, lines = serialize_table(df, "pipe", dictionary=True)
+    assert header.split("\n")[0] == DICT_LEGEND_TITLE
+    assert lines[:2] == [f"{DICT_CODE_PREFIX}1 | \\@1", "@1 | \\@home"]
+    # Without codes an "@" cell needs no marking
+    assert serialize_table(df.head(2), "pipe", dictionary=True)[1] == [f"{PLAN} | @1", f"{PLAN} | @home"]
+
+
+CASES = {
+    "separators": pd.DataFrame({"Name|Full": ["Doe | Jane", "Smith, Bob", "a\\|b", "x \\"],
+                                "Plan": [PLAN, PLAN, PLAN, "Kaiser"], "Note": ["@1", "\\@2", "@", ""]}),
+    "census": pd.DataFrame({"Employee Name": [f"Last{r}, First{r}" for r in range(12)],
+                            "Medical Plan": [PLAN if r % 4 else "BCBS HDHP Silver 3000 with HSA" for r in range(12)],
+                            "DOB": pd.date_range("1980-01-01", periods=12, freq="400D"),
+                            "ZIP": [2110.0 + r for r in range(12)]}),
+}
+
+
+@pytest.mark.parametrize("dictionary", [False, True])
+@pytest.mark.parametrize("fmt", ["pipe", "csv"])
+@pytest.mark.parametrize("df", CASES.values(), ids=CASES.keys())
+def test_serialize_table_round_trip(df, fmt, dictionary):
+    header, lines = serialize_table(df, fmt, dictionary)
+    assert len(lines) == len(df)
+    assert decode(header, lines, fmt) == table_cells(df)
+
+
+def test_serialize_table_unknown_format():
+    with pytest.raises(ValueError):
+        serialize_table(pd.DataFrame({"A": [1]}), "xml")
@@ -0,0 +1,45 @@
+import pytest
+
+import token_budget
+from token_budget import CharsPerToken, RecordTokens, observe_records, output_tokens_per_record, plan_chunks
+
+FIELDS = [f"field_{i}" for i in range(15)]
+
+
+@pytest.fixture(autouse=True)
+def fresh_estimators(monkeypatch):
+    monkeypatch.setattr(token_budget, "_ESTIMATORS", {})
+    monkeypatch.setattr(token_budget, "_RECORD_TOKENS", {})
+
+
+def test_record_prior_from_fields():
+    # 15 fields at 9.5 tokens plus the braces; cl100k_base measured 143 on census records
+    assert RecordTokens(FIELDS).per_record == 146
+
+
+def test_record_tokens_calibrate_from_replies():
+    observe_records(FIELDS, 100, 12_000)
+    assert output_tokens_per_record(FIELDS) == 135  # (100 x 146 + 12,000) / 200, up to a step of 5
+    observe_records(FIELDS, 0, 5000)  # replies without records teach nothing
+    assert output_tokens_per_record(FIELDS) == 135
+
+
+def test_chars_per_token_rounds_calibration():
+    estimator = CharsPerToken("pipe")
+    assert estimator.chars_per_token == token_budget.FORMAT_CHARS_PER_TOKEN["pipe"]
+    estimator.observe("x" * 20_000, 10_000)
+    assert estimator.chars_per_token % token_budget.CALIBRATION_STEP == 0
+    assert estimator.count("x" * 100) == 100 / estimator.chars_per_token
+
+
+def test_output_budget_caps_rows_per_chunk():
+    plan = plan_chunks("llama-3.3-70b-versatile", FIELDS, "a | b | c\n" * 100, 32768, fmt="pipe")
+    assert plan["max_records"] == int(32768 * token_budget.OUTPUT_HEADROOM // 146)
+    assert plan["rows"] == plan["max_records"]  # input allows far more rows than the output budget
+    observe_records(FIELDS, 1000, 100_000)
+    assert plan_chunks("llama-3.3-70b-versatile", FIELDS, "a | b | c\n" * 100, 32768, fmt="pipe")["max_records"] \
+        > plan["max_records"]
+
+
+def test_max_output_is_capped_by_the_model():
+    assert plan_chunks("llama-3.3-70b-versatile", FIELDS, "row", 10**6)["max_output_tokens"] == 32768
@@ -0,0 +1,11 @@
+import workbook
+from tests.synthetic import census_workbook
+
+
+def test_parallel_parse_matches_serial():
+    data = census_workbook(4, 50)
+    serial = workbook.WorkbookSnapshot.from_upload(data, parallel=False)
+    pooled = workbook.WorkbookSnapshot.from_upload(data, parallel=True)
+    assert serial.sheet_names == pooled.sheet_names == [f"Division {i + 1}" for i in range(4)]
+    for name in serial.sheet_names:
+        assert serial.sheets[name].equals(pooled.sheets[name])
@@ -0,0 +1,234 @@
+"""
+Token Budgets
+=============
+Token estimation and chunk sizing for the LLM extraction paths (llm_extractor.py and the
+nf5, nf5_working, nf6, nf7, nf9 and newfile2 scripts).
+
+Chunks used to be sized in characters, with a different guess in every script. Here a
+chunk is sized from the model's token budgets instead:
+- input: what the context window leaves after the prompt and the reserved output
+- output: the max_tokens of the request; the model writes about one JSON record per
+  input row, so the output budget caps the rows of a chunk. A chunk whose records do
+  not fit is what forced the "continue from where you left off" round trips.
+Output is the binding budget for census sheets: a record costs several times the tokens
+of its input row, so chunks fill max_tokens long before the context window.
+
+Token counts come from a pluggable estimator (get_estimator):
+- LocalTokenizer: exact counts from a local tokenizer, when LLM_TOKENIZER names a
+  tiktoken encoding (e.g. cl100k_base) or a Hugging Face tokenizer.json file and the
+  matching optional package is installed. tiktoken downloads an encoding on first use;
+  without network access, put the file in TIKTOKEN_CACHE_DIR under the SHA-1 of its URL.
+- CharsPerToken: a chars-per-token ratio per serialization format, refined from the
+  prompt_tokens the API reports for each request (observe())
+Output tokens per record come from RecordTokens, refined from the completion_tokens of
+each reply and the records it held (observe_records()).
+"""
+
+import math
+import os
+
+try:
+    import tiktoken  # optional, BPE encodings
+except ImportError:
+    tiktoken = None
+try:
+    from tokenizers import Tokenizer  # optional, loads a model's tokenizer.json
+except ImportError:
+    Tokenizer = None
+
+# Context window and largest completion per model (Groq model cards)
+MODEL_BUDGETS = {
+    "llama-3.3-70b-versatile": {"context": 131072, "max_output": 32768},
+    "llama-3.1-8b-instant": {"context": 131072, "max_output": 131072},
+    "openai/gpt-oss-120b": {"context": 131072, "max_output": 65536},
+    "openai/gpt-oss-20b": {"context": 131072, "max_output": 65536},
+}
+DEFAULT_MODEL_BUDGET = {"context": 8192, "max_output": 4096}
+
+# Starting chars-per-token ratios by serialization format. Llama 3's tokenizer averages
+# about 4 characters per token on English prose; digits, dates, punctuation and quoted
+# JSON keys split into shorter tokens, and to_string padding runs merge into long ones.
+FORMAT_CHARS_PER_TOKEN = {"text": 4.0, "table": 3.6, "pipe": 3.2, "csv": 3.3, "json": 3.0}
+
+# Weight of the starting ratio against observed usage, in characters
+PRIOR_CHARS = 20000
+
+# Calibrated ratios move in steps of this many chars per token, so small drifts between
+# runs leave chunk boundaries (and llm_cache keys of the chunk prompts) unchanged
+CALIBRATION_STEP = 0.25
+
+# Tokens kept for the instructions when the prompt itself is not given
+PROMPT_RESERVE_TOKENS = 1500
+
+# Share of max_tokens planned for records; the rest absorbs longer values and formatting
+OUTPUT_HEADROOM = 0.8
+
+# Starting output tokens per record: indented JSON ("key": "value" lines) costs about 9.5
+# tokens per field with cl100k_base (the base of Llama 3's vocabulary), plus the braces;
+# 300 synthetic census records with the 15 llm_extractor fields measured 143 per record
+OUTPUT_TOKENS_PER_FIELD = 9.5
+OUTPUT_TOKENS_PER_RECORD_BASE = 3
+
+# Weight of the starting per-record estimate against observed replies, in records
+PRIOR_RECORDS = 100
+
+# Calibrated per-record estimates move in steps of this many tokens (stable chunk boundaries)
+RECORD_CALIBRATION_STEP = 5
+
+
+class CharsPerToken:
+    """Token estimate from a chars-per-token ratio, calibrated from observed usage."""
+
+    def __init__(self, fmt="text", chars_per_token=None):
+        self.fmt = fmt
+        self.prior = chars_per_token or FORMAT_CHARS_PER_TOKEN[fmt]
+        self.chars = 0
+        self.tokens = 0
+
+    @property
+    def chars_per_token(self):
+        if not self.tokens:
+            return self.prior
+        ratio = (PRIOR_CHARS + self.chars) / (PRIOR_CHARS / self.prior + self.tokens)
+        return max(CALIBRATION_STEP, round(ratio / CALIBRATION_STEP) * CALIBRATION_STEP)
+
+    def count(self, text):
+        return math.ceil(len(text) / self.chars_per_token)
+
+    def observe(self, text, tokens):
+        """Fold in a real count, e.g. usage.prompt_tokens of the request that sent text."""
+        if tokens:
+            self.chars += len(text)
+            self.tokens += tokens
+
+
+class LocalTokenizer:
+    """Exact token counts from a tiktoken encoding name or a tokenizer.json path."""
+
+    def __init__(self, name):
+        if name.endswith(".json"):
+            if Tokenizer is None:
+                raise ImportError("the tokenizers package is needed for a tokenizer.json")
+            tokenizer = Tokenizer.from_file(name)
+            self._count = lambda text: len(tokenizer.encode(text).ids)
+        else:
+            if tiktoken is None:
+                raise ImportError("the tiktoken package is needed for a BPE encoding")
+            encoding = tiktoken.get_encoding(name)
+            self._count = lambda text: len(encoding.encode(text, disallowed_special=()))
+        self.name = name
+
+    def count(self, text):
+        return self._count(text)
+
+    def observe(self, text, tokens):
+        pass
+
+
+class RecordTokens:
+    """Output tokens per JSON record, calibrated from the completion_tokens of replies."""
+
+    def __init__(self, fields):
+        self.prior = math.ceil(OUTPUT_TOKENS_PER_RECORD_BASE + OUTPUT_TOKENS_PER_FIELD * len(fields))
+        self.records = 0
+        self.tokens = 0
+
+    @property
+    def per_record(self):
+        if not self.records:
+            return self.prior
+        value = (PRIOR_RECORDS * self.prior + self.tokens) / (PRIOR_RECORDS + self.records)
+        return max(RECORD_CALIBRATION_STEP, math.ceil(value / RECORD_CALIBRATION_STEP) * RECORD_CALIBRATION_STEP)
+
+    def observe(self, records, tokens):
+        """Fold in a reply: its completion_tokens and the number of records it held."""
+        if records and tokens:
+            self.records += records
+            self.tokens += tokens
+
+
+_ESTIMATORS = {}
+_RECORD_TOKENS = {}
+
+
+def get_estimator(fmt="text"):
+    """
+    Shared estimator for a serialization format ("text", "table", "pipe", "csv", "json").
+
+    LLM_TOKENIZER selects a local tokenizer for every format; when it is unset or its
+    package is missing, each format gets its own calibrated CharsPerToken.
+    """
+    if fmt not in _ESTIMATORS:
+        estimator = None
+        name = os.getenv("LLM_TOKENIZER")
+        if name:
+            try:
+                estimator = LocalTokenizer(name)
+            except (ImportError, OSError, ValueError) as e:
+                print(f"⚠️ Tokenizer '{name}' unavailable ({e}), estimating from characters")
+        _ESTIMATORS[fmt] = estimator or CharsPerToken(fmt)
+    return _ESTIMATORS[fmt]
+
+
+def model_budget(model):
+    """{"context", "max_output"} tokens of a model (conservative defaults when unknown)."""
+    return MODEL_BUDGETS.get(model, DEFAULT_MODEL_BUDGET)
+
+
+def _record_tokens(fields):
+    key = tuple(fields)
+    if key not in _RECORD_TOKENS:
+        _RECORD_TOKENS[key] = RecordTokens(fields)
+    return _RECORD_TOKENS[key]
+
+
+def output_tokens_per_record(fields):
+    """Tokens of one output record with these fields, as the model writes it (indented JSON)."""
+    return _record_tokens(fields).per_record
+
+
+def observe_records(fields, records, completion_tokens):
+    """Calibrate output_tokens_per_record from a reply of this many records."""
+    _record_tokens(fields).observe(records, completion_tokens)
+
+
+def plan_chunks(model, fields, sample_text, max_output_tokens=None, rows=None, prompt=None,
+                fmt="table", max_input_tokens=None, estimator=None):
+    """
+    Size the chunks of one extraction run from token budgets.
+
+    fields: output field names of one record
+    sample_text: the serialized input (or a representative part of it)
+    max_output_tokens: max_tokens of each request (default: the model's largest completion)
+    rows: input rows in sample_text (default: its lines)
+    prompt: the instructions sent with every chunk (default: PROMPT_RESERVE_TOKENS)
+    max_input_tokens: extra cap on the data tokens of a chunk (prompt not included)
+
+    Returns a dict: input_tokens and max_records per chunk, max_output_tokens,
+    output_tokens_per_record, tokens_per_row, rows (rows per chunk) and chars (the
+    same chunk in characters of sample_text, for callers that slice text).
+    """
+    budget = model_budget(model)
+    max_output_tokens = min(max_output_tokens or budget["max_output"], budget["max_output"])
+    estimator = estimator or get_estimator(fmt)
+    prompt_tokens = estimator.count(prompt) if prompt else PROMPT_RESERVE_TOKENS
+    input_tokens = budget["context"] - prompt_tokens - max_output_tokens
+    if max_input_tokens:
+        input_tokens = min(input_tokens, max_input_tokens)
+    input_tokens = max(input_tokens, 1)
+
+    per_record = output_tokens_per_record(fields)
+    max_records = max(1, int(max_output_tokens * OUTPUT_HEADROOM // per_record))
+
+    rows = rows or sample_text.count("\n") + 1
+    tokens_per_row = max(estimator.count(sample_text) / rows, 1)
+    rows_per_chunk = max(1, min(int(input_tokens // tokens_per_row), max_records))
+    return {
+        "input_tokens": input_tokens,
+        "max_records": max_records,
+        "max_output_tokens": max_output_tokens,
+        "output_tokens_per_record": per_record,
+        "tokens_per_row": round(tokens_per_row, 1),
+        "rows": rows_per_chunk,
+        "chars": max(1, math.ceil(rows_per_chunk * len(sample_text) / rows)),
+    }
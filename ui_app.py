@@ -3,6 +3,9 @@ import pandas as pd
 import json, io, time, re, difflib
 from datetime import datetime
 from groq import Groq
+from header_detection import detect_header, apply_header
+from workbook import is_delimited, read_delimited
+from llm_cache import cached_chat
 
 # ---- CONFIG ----
 import os
@@ -42,17 +45,8 @@ def normalize(text):
     return re.sub(r"[^a-z0-9]+", "", str(text).lower().strip())
 
 def clean_headers(df):
-    first = list(df.columns)
-    if any(re.match(r"^Unnamed", str(x)) for x in first):
-        try:
-            df.columns = [
-                f"{str(a)} {str(b)}".strip()
-                for a, b in zip(df.columns.get_level_values(0), df.columns.get_level_values(1))
-            ]
-        except Exception:
-            df.columns = [str(c).strip() for c in first]
-    else:
-        df.columns = [str(c).strip() for c in first]
+    df = apply_header(df, detect_header(df))
+    df.columns = [str(c).strip() for c in df.columns]
     df = df.dropna(how="all")
     return df
 
@@ -78,13 +72,16 @@ Headers:
 """
     log("🔍 Calling Groq LLaMA 3.3 for mapping...")
     try:
-        resp = client.chat.completions.create(
-            model=LLM_MODEL,
-            messages=[{"role": "user", "content": prompt}],
+        resp = cached_chat(
+            client, LLM_MODEL,
+            [{"role": "user", "content": prompt}],
             temperature=0.1,
             max_tokens=800,
+            validate=lambda content: "{" in content and "}" in content,
         )
-        content = resp.choices[0].message.content
+        if resp["cached"]:
+            log("💾 Mapping answered from the LLM response cache.")
+        content = resp["content"]
         content = re.sub(r"```json|```", "", content).strip()
         mapping = json.loads(content)
         log("✅ Model mapping parsed successfully.")
@@ -107,13 +104,21 @@ def fuzzy_match_column(target, available_cols):
 
 # ---- MAIN EXTRACTION ----
 def process_excel(upload):
-    xls = pd.ExcelFile(upload)
+    if is_delimited(upload.name):
+        # CSV/TSV export: one sheet, read with pandas' C parser
+        csv_sheet, csv_df = read_delimited(upload.getvalue(), upload.name)
+        sheet_names = [csv_sheet]
+        read_sheet = lambda sheet: csv_df
+    else:
+        xls = pd.ExcelFile(upload)
+        sheet_names = xls.sheet_names
+        read_sheet = lambda sheet: pd.read_excel(xls, sheet)
     all_dfs = []
-    total_sheets = len(xls.sheet_names)
+    total_sheets = len(sheet_names)
     progress = st.progress(0)
-    for i, sheet in enumerate(xls.sheet_names):
+    for i, sheet in enumerate(sheet_names):
         try:
-            df = pd.read_excel(xls, sheet)
+            df = read_sheet(sheet)
             df = clean_headers(df)
             headers = [str(c) for c in df.columns]
             log(f"📄 Sheet '{sheet}' headers: {headers}")
@@ -150,7 +155,7 @@ def process_excel(upload):
 # ---- STREAMLIT UI ----
 st.title("📘 Census Extractor – Groq LLaMA 3.3 (Fuzzy Matching Enhanced)")
 st.sidebar.header("🧠 Logs & Progress")
-uploaded = st.file_uploader("Upload Excel File", type=["xlsx"])
+uploaded = st.file_uploader("Upload Excel or CSV File", type=["xlsx", "csv", "tsv", "txt"])
 
 if uploaded:
     if st.button("🚀 Process File"):
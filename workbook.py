@@ -0,0 +1,640 @@
+"""
+Workbook Snapshot
+=================
+Parse an uploaded census workbook exactly once and share the result.
+
+app.py, hunter.extract_data and llm_extractor.extract_with_full_context all
+need the sheets of the same upload. A WorkbookSnapshot opens the xlsx once,
+keeps each sheet as read from Excel (for display and the LLM path) plus a
+processed copy with detected headers and unique column names (for mapping
+and extraction).
+
+Streamlit re-runs app.py on every widget click, so snapshots are also kept in
+a process-wide LRU cache keyed by the SHA-256 of the uploaded bytes.
+
+For very large workbooks (100k+ member rows) iter_sheet_batches streams the
+processed rows in bounded-size batches instead of materializing whole sheets.
+
+sniff_workbook reads only the first rows of each sheet to decide whether it can
+hold census records, so rate tables, plan summaries and "Company Info" sheets
+are never fully parsed.
+
+CSV/TSV exports are read with pandas' C parser (delimiter and encoding are
+sniffed) into the same one-sheet structure, named after the file.
+
+Workbooks with one sheet per division (40-60 sheets) can be parsed in a process
+pool (parse_sheets); small workbooks stay serial because pool start-up would
+cost more than it saves (benchmarks/bench_workbook.py measures where that is).
+"""
+
+import io
+import os
+import csv
+import codecs
+import hashlib
+import threading
+import time
+import zipfile
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+
+try:
+    import pyarrow  # noqa: F401 - optional, enables Arrow-backed string columns
+    STRING_DTYPE = pd.StringDtype("pyarrow")
+except ImportError:
+    STRING_DTYPE = pd.StringDtype()
+
+# Columns with at most this share of distinct values (and enough rows) are stored as categoricals
+CATEGORICAL_MIN_ROWS = 32
+CATEGORICAL_MAX_RATIO = 0.5
+from header_detection import detect_header, apply_header
+from pipeline_log import log
+
+
+def _upload_bytes(file_path_or_object):
+    """Return the raw bytes of a file path, bytes-like object or file-like object."""
+    if isinstance(file_path_or_object, (bytes, bytearray, memoryview)):
+        return bytes(file_path_or_object)
+    if hasattr(file_path_or_object, 'getvalue'):
+        # Streamlit UploadedFile and BytesIO keep the whole upload in memory
+        return file_path_or_object.getvalue()
+    if hasattr(file_path_or_object, 'read'):
+        if hasattr(file_path_or_object, 'seek'):
+            file_path_or_object.seek(0)
+        return file_path_or_object.read()
+    with open(file_path_or_object, 'rb') as f:
+        return f.read()
+
+
+def make_unique_columns(columns):
+    """
+    Rename duplicate column names with a numeric suffix (Name, Name_1, ...)
+
+    The "_1" names are keys of saved mappings (learned_mappings.json, mapping_history.json),
+    so the suffix must stay as it is. A sheet whose header is its first row arrives already
+    deduplicated by pandas (Name, Name.1); _dedup_like_read_excel gives streamed sheets
+    the same names.
+    """
+    new_columns = []
+    seen = set()
+    for col in columns:
+        if col in seen:
+            # Add a suffix to make it unique
+            counter = 1
+            new_col = f"{col}_{counter}"
+            while new_col in seen:
+                counter += 1
+                new_col = f"{col}_{counter}"
+            new_columns.append(new_col)
+            seen.add(new_col)
+        else:
+            new_columns.append(col)
+            seen.add(col)
+    return new_columns
+
+
+def _dedup_like_read_excel(columns):
+    """Rename duplicate header cells the way pandas.read_excel does (Name, Name.1, Name.2, ...)"""
+    columns = list(columns)
+    new_columns = []
+    counts = {}
+    for col in columns:
+        base = col
+        count = counts.get(col, 0)
+        while count > 0:
+            # Add a suffix, skipping suffixed names the row already has
+            counts[base] = count + 1
+            col = f"{base}.{count}"
+            count = count + 1 if col in columns else counts.get(col, 0)
+        new_columns.append(col)
+        counts[col] = count + 1
+    return new_columns
+
+
+def compact_column(series, categorical=True):
+    """
+    Store a column as text in the compact string dtype with real nulls.
+
+    Low-cardinality columns (coverage tier, gender, plan name) become categoricals,
+    so each distinct value is stored once.
+    """
+    non_null = series.notna()
+    # Same text as astype(str) for every value, but missing cells stay missing
+    text = series.astype(str).where(non_null).astype(STRING_DTYPE)
+    if categorical:
+        count = int(non_null.sum())
+        if count >= CATEGORICAL_MIN_ROWS and text.nunique(dropna=True) <= count * CATEGORICAL_MAX_RATIO:
+            return text.astype("category")
+    return text
+
+
+def to_compact(df, categorical=True):
+    """Convert every column of df with compact_column."""
+    return pd.DataFrame(
+        {i: compact_column(df.iloc[:, i], categorical) for i in range(df.shape[1])},
+        index=df.index,
+    ).set_axis(df.columns, axis=1)
+
+
+def process_sheet(df_original, sheet_name="", categorical=True):
+    """
+    Build the extraction copy of a sheet: detected header row, no "Unnamed" columns,
+    unique column names and compact string/categorical columns with real nulls.
+    """
+    df = df_original
+
+    # Find the row that looks most like a header (may be a title/blank row offset or a two-row header)
+    detection = detect_header(df)
+    if detection["row"] >= 0:
+        log.debug("🔍 Debug: Detected header row at index {} for sheet '{}' (rows {}, score {:.1f})",
+                  detection['row'], sheet_name, detection['header_rows'], detection['score'])
+        # Use the detected row(s) as headers and remove all rows up to the last header row
+        df = apply_header(df, detection)
+
+    df = to_compact(df, categorical)
+
+    # Clean up any remaining "Unnamed" columns
+    df.columns = [f"Column_{i}" if 'Unnamed' in str(col) else str(col) for i, col in enumerate(df.columns)]
+
+    # Ensure all column names are unique
+    df.columns = make_unique_columns(df.columns)
+    return df
+
+
+def memory_report(sheets):
+    """
+    Per-sheet memory of processed sheets.
+
+    Returns a list of dicts: sheet, rows, columns, bytes, categorical/string column counts.
+    """
+    report = []
+    for name, df in sheets.items():
+        categorical = sum(isinstance(dtype, pd.CategoricalDtype) for dtype in df.dtypes)
+        report.append({
+            "Sheet": name,
+            "Rows": df.shape[0],
+            "Columns": df.shape[1],
+            "Memory (KB)": round(int(df.memory_usage(index=True, deep=True).sum()) / 1024, 1),
+            "Categorical Columns": categorical,
+            "String Columns": df.shape[1] - categorical,
+        })
+    return report
+
+
+DELIMITED_EXTENSIONS = (".csv", ".tsv", ".txt")
+# xlsx (zip) and legacy xls (OLE) signatures
+EXCEL_SIGNATURES = (b"PK\x03\x04", b"\xd0\xcf\x11\xe0")
+
+
+def is_delimited(name=None, data=None):
+    """True for CSV/TSV uploads, judged by file extension or, without a name, by content."""
+    if name:
+        return str(name).lower().endswith(DELIMITED_EXTENSIONS)
+    if data is not None:
+        return not bytes(data[:4]).startswith(EXCEL_SIGNATURES)
+    return False
+
+
+def _sniff_encoding(sample):
+    for encoding in ("utf-8-sig", "cp1252"):
+        try:
+            codecs.getincrementaldecoder(encoding)().decode(sample, final=False)
+            return encoding
+        except UnicodeDecodeError:
+            continue
+    return "latin-1"
+
+
+def _sniff_delimiter(text, name=None):
+    try:
+        return csv.Sniffer().sniff(text, delimiters=",\t;|").delimiter
+    except csv.Error:
+        return "\t" if name and str(name).lower().endswith(".tsv") else ","
+
+
+def delimited_sheet_name(name):
+    """Sheet name for a CSV/TSV file: its stem (commas removed - they separate sheet and column in mappings)."""
+    stem = os.path.splitext(os.path.basename(str(name or "uploaded.csv")))[0]
+    return stem.replace(",", " ").strip() or "Sheet1"
+
+
+def read_delimited(data, name=None, chunksize=None):
+    """
+    Read CSV/TSV bytes with pandas' C parser, sniffing encoding and delimiter.
+
+    All values are read as text (ZIPs and IDs keep their leading zeros).
+    Returns (sheet_name, DataFrame), or (sheet_name, chunk iterator) when chunksize is given.
+    """
+    sample = bytes(data[:65536])
+    encoding = _sniff_encoding(sample)
+    text = codecs.getincrementaldecoder(encoding)(errors="replace").decode(sample, final=False)
+    delimiter = _sniff_delimiter(text, name)
+
+    # Title lines above the header ("Census Report,,") are narrower than the data;
+    # read them positionally and let process_sheet find the real header row.
+    widths = [len(row) for row in csv.reader(text.splitlines()[:50], delimiter=delimiter) if row]
+    header = {}
+    if widths and widths[0] < max(widths):
+        header = {"header": None, "names": [f"Unnamed: {i}" for i in range(max(widths))]}
+
+    df = pd.read_csv(io.BytesIO(data), sep=delimiter, encoding=encoding, engine="c",
+                     dtype=str, skip_blank_lines=True, chunksize=chunksize, **header)
+    return delimited_sheet_name(name), df
+
+
+# Sheets that never contribute census records
+IRRELEVANT_SHEET_NAMES = ["company info", "enrollment info"]
+
+# Header words that mark a sheet as census data
+RELEVANCE_KEYWORDS = [
+    "name", "first", "last", "dob", "birth", "employee", "dependent", "spouse", "child",
+    "zip", "gender", "sex", "relationship", "coverage", "ssn", "member",
+]
+
+
+def _sheet_sizes(xl, source):
+    """Uncompressed XML size of every worksheet part (sheet name -> bytes), where available."""
+    sizes = {}
+    try:
+        if hasattr(source, 'seek'):
+            source.seek(0)
+        with zipfile.ZipFile(source) as archive:
+            for ws in xl.book.worksheets:
+                path = getattr(ws, "_worksheet_path", None)
+                if path:
+                    sizes[ws.title] = archive.getinfo(path).file_size
+    except Exception:
+        pass
+    return sizes
+
+
+def _sheet_rows(xl, sheet_name):
+    """Row count from the sheet's stored dimension, without reading its rows."""
+    try:
+        return xl.book[sheet_name].max_row
+    except Exception:
+        return None
+
+
+def sniff_workbook(xl, source=None, sniff_rows=15):
+    """
+    Score every sheet's relevance from its first sniff_rows rows only.
+
+    Args:
+        xl: An open pd.ExcelFile
+        source: The same workbook as path or BytesIO, used to report sheet XML sizes
+        sniff_rows: Rows read per sheet
+
+    Returns:
+        dict: sheet name -> {"relevant", "score", "keywords", "rows", "bytes"}, in workbook order
+    """
+    sizes = _sheet_sizes(xl, source) if source is not None else {}
+    reports = {}
+    for sheet_name in xl.sheet_names:
+        # Read the stored dimension first - pandas resets it while parsing
+        rows = _sheet_rows(xl, sheet_name)
+        hits = []
+        if sheet_name.lower() not in IRRELEVANT_SHEET_NAMES:
+            try:
+                head = xl.parse(sheet_name, nrows=sniff_rows)
+            except Exception:
+                # Let the full parse surface the error
+                head = None
+            if head is None:
+                hits = ["<unreadable>"]
+            else:
+                # Header labels plus short text cells (the real header may sit below a title row)
+                labels = [str(c) for c in head.columns]
+                labels += [v for v in head.to_numpy(dtype=object).ravel() if isinstance(v, str) and len(v) < 50]
+                text = " ".join(labels).lower()
+                hits = [k for k in RELEVANCE_KEYWORDS if k in text]
+        reports[sheet_name] = {
+            "relevant": bool(hits),
+            "score": len(hits),
+            "keywords": hits,
+            "rows": rows,
+            "bytes": sizes.get(sheet_name),
+        }
+    return reports
+
+
+def skipped_summary(reports):
+    """Totals for the sheets a sniff pass decided not to load."""
+    skipped = [r for r in reports.values() if not r["relevant"]]
+    return {
+        "sheets": len(skipped),
+        "rows": sum(r["rows"] or 0 for r in skipped),
+        "bytes": sum(r["bytes"] or 0 for r in skipped),
+    }
+
+
+def _trim_row(row):
+    """openpyxl value tuple without its trailing empty cells, as pandas.read_excel reads a row."""
+    end = len(row)
+    while end and (row[end - 1] is None or row[end - 1] == ""):
+        end -= 1
+    return row[:end]
+
+
+def _rows_frame(rows, width):
+    """Build an object DataFrame from openpyxl value tuples, padded to width, empty cells missing."""
+    padded = [tuple(row[:width]) + (None,) * (width - len(row)) for row in rows]
+    df = pd.DataFrame(padded, columns=range(width), dtype=object)
+    return df.where(df.notna(), np.nan)
+
+
+def _iter_delimited_batches(data, name, batch_size):
+    """CSV/TSV counterpart of iter_sheet_batches, built on read_csv(chunksize=...)."""
+    sheet_name, chunks = read_delimited(data, name, chunksize=batch_size)
+    columns = None
+    row_offset = 0
+    for chunk in chunks:
+        if columns is None:
+            batch = process_sheet(chunk, sheet_name, categorical=False)
+            columns = list(batch.columns)
+        else:
+            batch = to_compact(chunk, categorical=False)
+            batch.columns = columns
+        batch.index = range(row_offset, row_offset + len(batch))
+        yield sheet_name, row_offset, batch
+        row_offset += len(batch)
+
+
+def iter_sheet_batches(file_path_or_object, batch_size=5000, sheet_names=None, header_rows=10):
+    """
+    Stream the processed rows of every sheet in bounded-size batches.
+
+    Uses openpyxl's read-only row iteration (iter_rows(values_only=True)), so
+    peak memory depends on batch_size, not on the number of rows. The header is
+    detected on the first header_rows rows exactly like process_sheet does.
+
+    Yields (sheet_name, row_offset, batch) where batch is a processed (string)
+    DataFrame and row_offset is the position of its first row in the sheet.
+
+    Rows are padded to the widest row seen so far, as pandas pads to the widest row of
+    the sheet; openpyxl only pads to the sheet's recorded dimension, which some writers
+    leave out. A batch with a wider row than any before it gets the extra columns
+    (Column_i, as process_sheet names unlabeled columns); earlier batches never had
+    values in them.
+    """
+    name = file_path_or_object if isinstance(file_path_or_object, str) else getattr(file_path_or_object, 'name', None)
+    if is_delimited(name, None if name else _upload_bytes(file_path_or_object)):
+        yield from _iter_delimited_batches(_upload_bytes(file_path_or_object), name, batch_size)
+        return
+
+    if isinstance(file_path_or_object, str):
+        source = file_path_or_object
+    else:
+        source = io.BytesIO(_upload_bytes(file_path_or_object))
+    wb = load_workbook(source, read_only=True, data_only=True)
+    try:
+        for ws in wb.worksheets:
+            if sheet_names is not None and ws.title not in sheet_names:
+                continue
+            rows = map(_trim_row, ws.iter_rows(values_only=True))
+            first = next(rows, None)
+            if first is None:
+                continue
+
+            # Same shape pandas gives: first row as header, rest as data
+            head_rows = list(islice(rows, header_rows))
+            width = max(len(row) for row in [first, *head_rows])
+            head = _rows_frame(head_rows, width)
+            first += (None,) * (width - len(first))
+            head.columns = _dedup_like_read_excel(
+                [f"Unnamed: {i}" if v is None or v == "" else v for i, v in enumerate(first)])
+            head = process_sheet(head, ws.title, categorical=False)
+            columns = list(head.columns)
+
+            row_offset = 0
+            if len(head):
+                yield ws.title, row_offset, head
+                row_offset += len(head)
+
+            while True:
+                block = list(islice(rows, batch_size))
+                if not block:
+                    break
+                block_width = max(map(len, block))
+                if block_width > width:
+                    columns += [f"Column_{i}" for i in range(width, block_width)]
+                    width = block_width
+                # Categories would differ per batch, so batches stay plain compact strings
+                batch = to_compact(_rows_frame(block, width), categorical=False)
+                batch.columns = columns
+                batch.index = range(row_offset, row_offset + len(batch))
+                yield ws.title, row_offset, batch
+                row_offset += len(batch)
+    finally:
+        wb.close()
+
+
+# Parallel parsing only pays off above these sizes (pool start-up is ~0.5-1s)
+PARALLEL_MIN_SHEETS = 8
+PARALLEL_MIN_BYTES = 1024 * 1024
+MAX_PARSE_WORKERS = int(os.getenv("SHEET_PARSE_WORKERS", str(min(os.cpu_count() or 1, 8))))
+
+
+def _parse_sheet_group(source, sheet_names):
+    """
+    Parse and process the given sheets of one workbook.
+
+    source is an open ExcelFile (serial path) or the raw workbook bytes (pool worker).
+    Returns a list of (sheet_name, df_original, df_processed, error).
+    """
+    xl = source if isinstance(source, pd.ExcelFile) else pd.ExcelFile(io.BytesIO(source))
+    results = []
+    for sheet_name in sheet_names:
+        try:
+            # Read original data AS-IS for display
+            df_original = xl.parse(sheet_name)
+            results.append((sheet_name, df_original, process_sheet(df_original, sheet_name), None))
+        except Exception as e:
+            results.append((sheet_name, None, None, str(e)))
+    return results
+
+
+def use_parallel(data, sheet_names, parallel=None):
+    """Decide whether to parse in a process pool: parallel=None picks by workbook size."""
+    if parallel is not None:
+        return bool(parallel) and len(sheet_names) > 1 and MAX_PARSE_WORKERS > 1
+    return (MAX_PARSE_WORKERS > 1
+            and len(sheet_names) >= PARALLEL_MIN_SHEETS
+            and len(data) >= PARALLEL_MIN_BYTES)
+
+
+def parse_sheets(xl, data, sheet_names, parallel=None, sizes=None):
+    """
+    Parse and process sheet_names, serially or in a process pool.
+
+    Each worker opens its own copy of the workbook and parses a share of the sheets
+    (largest first, dealt round-robin using the sizes from _sheet_sizes when given).
+    Results always come back in sheet_names order, whichever path ran.
+
+    Returns (original_sheets, sheets, errors).
+    """
+    if use_parallel(data, sheet_names, parallel):
+        workers = min(MAX_PARSE_WORKERS, len(sheet_names))
+        by_size = sorted(sheet_names, key=lambda s: -(sizes or {}).get(s, 0))
+        groups = [by_size[i::workers] for i in range(workers)]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parsed = {result[0]: result
+                      for group in pool.map(_parse_sheet_group, [data] * workers, groups)
+                      for result in group}
+        results = [parsed[sheet_name] for sheet_name in sheet_names]
+    else:
+        results = _parse_sheet_group(xl, sheet_names)
+
+    original_sheets, sheets, errors = {}, {}, {}
+    for sheet_name, df_original, df_processed, error in results:
+        if error is not None:
+            errors[sheet_name] = error
+            continue
+        original_sheets[sheet_name] = df_original
+        sheets[sheet_name] = df_processed
+    return original_sheets, sheets, errors
+
+
+class WorkbookSnapshot:
+    """All sheets of one uploaded workbook, parsed in a single pass."""
+
+    def __init__(self, name, data, original_sheets, sheets, errors=None, digest=None, skipped=None,
+                 parse_seconds=None):
+        self.name = name
+        self.data = data                          # raw upload bytes
+        self.digest = digest or hashlib.sha256(data).hexdigest()
+        self.original_sheets = original_sheets    # sheet -> DataFrame as-is from Excel (display / LLM)
+        self.sheets = sheets                      # sheet -> processed DataFrame (mapping / extraction)
+        self.errors = errors or {}                # sheet -> error message for unreadable sheets
+        self.skipped = skipped or {}              # sheet -> sniff report for sheets not loaded
+        self.parse_seconds = parse_seconds        # time from_upload took to read and process the sheets
+
+    @classmethod
+    def from_upload(cls, file_path_or_object, name=None, digest=None, sniff=False, parallel=None):
+        """
+        Open the workbook once and parse every sheet from the same ExcelFile.
+        CSV/TSV uploads become a single sheet named after the file.
+
+        With sniff=True only sheets whose first rows look like census data are fully parsed;
+        the others are listed in .skipped with their row and byte counts.
+        parallel: None = process pool only for large many-sheet workbooks, True/False = force.
+        """
+        started = time.perf_counter()
+        data = _upload_bytes(file_path_or_object)
+        if name is None:
+            name = getattr(file_path_or_object, 'name', None) or (
+                file_path_or_object if isinstance(file_path_or_object, str) else None)
+
+        if is_delimited(name, data):
+            sheet_name, df_original = read_delimited(data, name)
+            sheets = {sheet_name: process_sheet(df_original, sheet_name)}
+            return cls(name or "uploaded.csv", data, {sheet_name: df_original}, sheets, digest=digest,
+                       parse_seconds=time.perf_counter() - started)
+
+        name = name or "uploaded.xlsx"
+        buffer = io.BytesIO(data)
+        xl = pd.ExcelFile(buffer)
+        skipped = {}
+        sizes = None
+        if sniff:
+            reports = sniff_workbook(xl, buffer)
+            skipped = {sheet: report for sheet, report in reports.items() if not report["relevant"]}
+            sizes = {sheet: report["bytes"] or 0 for sheet, report in reports.items()}
+        to_parse = [sheet_name for sheet_name in xl.sheet_names if sheet_name not in skipped]
+        original_sheets, sheets, errors = parse_sheets(xl, data, to_parse, parallel=parallel, sizes=sizes)
+        return cls(name, data, original_sheets, sheets, errors, digest=digest, skipped=skipped,
+                   parse_seconds=time.perf_counter() - started)
+
+    @property
+    def sheet_names(self):
+        return list(self.sheets.keys())
+
+    def select(self, sheet_names):
+        """Return the processed sheets for the given names, in workbook order."""
+        wanted = set(sheet_names)
+        return {name: df for name, df in self.sheets.items() if name in wanted}
+
+    def memory_bytes(self):
+        """Approximate memory held by this snapshot (raw bytes plus every DataFrame)."""
+        total = len(self.data)
+        for df in list(self.original_sheets.values()) + list(self.sheets.values()):
+            total += int(df.memory_usage(index=True, deep=True).sum())
+        return total
+
+
+class SnapshotCache:
+    """
+    LRU cache of WorkbookSnapshots keyed by the SHA-256 of the uploaded bytes,
+    bounded by the total memory of the cached DataFrames.
+    """
+
+    def __init__(self, max_bytes=None, sniff=True, parallel=None):
+        if max_bytes is None:
+            max_bytes = int(os.getenv("SHEET_CACHE_MAX_MB", "512")) * 1024 * 1024
+        self.max_bytes = max_bytes
+        self.sniff = sniff              # only fully load sheets that look like census data
+        self.parallel = parallel        # None = process pool for large many-sheet workbooks
+        self._entries = OrderedDict()   # digest -> (snapshot, size in bytes)
+        self._lock = threading.Lock()   # Streamlit serves sessions from several threads
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def load(self, file_path_or_object, name=None):
+        """Return the snapshot for this upload, parsing the workbook only on a cache miss."""
+        data = _upload_bytes(file_path_or_object)
+        digest = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is not None:
+                self._entries.move_to_end(digest)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        if name is None:
+            name = getattr(file_path_or_object, 'name', None)
+        snapshot = WorkbookSnapshot.from_upload(data, name=name, digest=digest, sniff=self.sniff,
+                                                 parallel=self.parallel)
+        self.put(snapshot)
+        return snapshot
+
+    def put(self, snapshot):
+        size = snapshot.memory_bytes()
+        if size > self.max_bytes:
+            # Larger than the whole budget - serve it uncached
+            return
+        with self._lock:
+            if snapshot.digest in self._entries:
+                return
+            self._entries[snapshot.digest] = (snapshot, size)
+            self.total_bytes += size
+            while self.total_bytes > self.max_bytes and self._entries:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.total_bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+
+# Global snapshot cache instance (survives Streamlit reruns)
+snapshot_cache = SnapshotCache()